@@ -0,0 +1,69 @@
+import importlib.util
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_PATH = os.path.join(ROOT, "tool check proxy.py")
+MODULE_NAME = "tool_check_proxy"
+
+
+def load_tool():
+    module = sys.modules.get(MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def closed_port():
+    return free_port()
+
+
+@pytest.fixture(scope="session")
+def tool():
+    return load_tool()
+
+
+@pytest.fixture
+def workdir(tool, tmp_path, monkeypatch):
+    monkeypatch.setattr(tool, "get_current_directory", lambda: str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def echo_server(tool):
+    import asyncio
+    import threading
+
+    port = free_port()
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    runner = {}
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        runner["runner"] = loop.run_until_complete(tool.start_ip_echo_server("127.0.0.1", port))
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield port
+    asyncio.run_coroutine_threadsafe(runner["runner"].cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
@@ -0,0 +1,65 @@
+import asyncio
+
+
+def test_run_bounded_checks_caps_concurrency(tool):
+    running = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return item * 2
+
+    results = asyncio.run(tool.run_bounded_checks(range(50), worker, 5))
+
+    assert sorted(results) == [item * 2 for item in range(50)]
+    assert peak == 5
+
+
+def test_run_bounded_checks_skips_failed_workers(tool):
+    async def worker(item):
+        if item % 2:
+            raise ValueError(item)
+        return item
+
+    assert sorted(asyncio.run(tool.run_bounded_checks(range(6), worker, 3))) == [0, 2, 4]
+
+
+def test_test_proxy_async_skips_global_throttle_and_uses_retries(tool, monkeypatch):
+    seen = {}
+
+    async def fake_enhanced(proxy_url, max_retries=3, rate_limiter=None, probe_mode="best", test_urls=None):
+        seen.update(limiter=rate_limiter, retries=max_retries)
+        return "1.2.3.4", "US", 42
+
+    monkeypatch.setattr(tool, "test_proxy_enhanced_async", fake_enhanced)
+
+    assert asyncio.run(tool.test_proxy_async("1.2.3.4:80", max_retries=1)) == ("1.2.3.4", "US", 42)
+    assert seen == {"limiter": None, "retries": 1}
+
+
+def test_evaluate_proxy_rich_passes_configured_retries(tool, monkeypatch):
+    seen = {}
+
+    async def fake_test_proxy_async(proxy_url, limiter=None, probe_mode="best", test_urls=None, max_retries=2):
+        seen["retries"] = max_retries
+        return None, None, None
+
+    monkeypatch.setattr(tool, "test_proxy_async", fake_test_proxy_async)
+
+    asyncio.run(tool.evaluate_proxy_rich("1.2.3.4:80", {"max_retries": 0}))
+    assert seen["retries"] == 0
+
+
+def test_configure_rate_limits_splits_rate_across_shards(tool):
+    original = tool.rate_limiter.max_requests
+    try:
+        tool.configure_rate_limits({"rate_limit_requests_per_second": 20}, shares=4)
+        assert tool.rate_limiter.max_requests == 5
+        tool.configure_rate_limits({"rate_limit_requests_per_second": 0})
+        assert tool.rate_limiter.reserve() == 0.0
+    finally:
+        tool.rate_limiter.set_rate(original)
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+
+def baseline_filter(proxy_results, config, detect_proxy_type):
+    filtered_results = []
+    preferred_anonymity = set(config.get("preferred_anonymity", []))
+    for result in proxy_results:
+        proxy, ip, country, response_time, geo_data, health_score = result
+        if not ip or not country:
+            continue
+        if response_time > config.get("max_response_time", 1000):
+            continue
+        if health_score < config.get("min_health_score", 60):
+            continue
+        if country in set(config.get("blacklist_countries", [])):
+            continue
+        if config.get("preferred_countries") and country not in set(config["preferred_countries"]):
+            continue
+        if geo_data:
+            if "anonymity" in geo_data and preferred_anonymity and geo_data["anonymity"] not in preferred_anonymity:
+                continue
+            if config.get("exclude_hosting", False) and geo_data.get("is_hosting", False):
+                continue
+            if config.get(f"exclude_{detect_proxy_type(proxy)}", False):
+                continue
+        filtered_results.append(result)
+    return filtered_results
+
+
+def random_results(tool, rng, count=400):
+    results = []
+    for i in range(count):
+        geo = None
+        if rng.random() < 0.8:
+            geo = {"country_code": "US", "is_hosting": rng.random() < 0.3}
+            if rng.random() < 0.9:
+                geo["anonymity"] = rng.choice(["Elite", "Anonymous", "Transparent", "Unknown", "Weird"])
+        scheme = rng.choice(["", "http://", "socks4://", "socks5://"])
+        results.append(tool.ProxyResult(
+            f"{scheme}10.0.{i // 250}.{i % 250}:80",
+            None if rng.random() < 0.1 else "1.1.1.1",
+            rng.choice(["US", "DE", "CN", "VN", None]),
+            rng.randint(10, 2000),
+            geo,
+            rng.randint(0, 100)
+        ))
+    return results
+
+
+CONFIGS = [
+    {},
+    {"max_response_time": 300, "min_health_score": 70},
+    {"blacklist_countries": ["CN"], "preferred_countries": ["US", "DE"]},
+    {"preferred_anonymity": ["Elite", "Anonymous"], "exclude_hosting": True},
+    {"preferred_anonymity": ["Weirder"], "exclude_socks4": True},
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_filter_matches_baseline(tool, monkeypatch, config, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(tool, "np", None)
+    elif tool.np is None:
+        pytest.skip("numpy not installed")
+    results = random_results(tool, random.Random(len(str(config))))
+    settings = tool.build_filter_settings(config)
+
+    expected = baseline_filter(results, config, tool.detect_proxy_type)
+    assert tool.apply_advanced_filters(results, config) == expected
+    assert [result for result in results if tool.result_passes_filters(result, settings)] == expected
+
+
+def test_unknown_preferred_anonymity_never_matches(tool):
+    geo = {"anonymity": "Weird", "country_code": "US"}
+    result = tool.ProxyResult("1.1.1.1:80", "1.1.1.1", "US", 100, geo, 90)
+    assert tool.apply_advanced_filters([result], {"preferred_anonymity": ["Other"]}) == []
+    assert tool.apply_advanced_filters([result], {"preferred_anonymity": ["Elite"]}) == []
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_scores_match_single_scores(tool, monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(tool, "np", None)
+    elif tool.np is None:
+        pytest.skip("numpy not installed")
+    rng = random.Random(7)
+    rows = [(rng.randint(1, 5000), rng.choice([0, 0.7, 3, 12]), rng.randint(-1, 4), rng.random() < 0.5) for _ in range(300)]
+    names = tool.ANONYMITY_NAMES
+
+    batch = tool.calculate_health_scores_batch(*map(list, zip(*rows)))
+    single = [
+        tool.calculate_proxy_health_score(rt, speed, names[code] if 0 <= code < len(names) else "Unknown", hosting)
+        for rt, speed, code, hosting in rows
+    ]
+    assert [int(score) for score in batch] == single
@@ -0,0 +1,100 @@
+import pytest
+
+
+def unfinished_journal(tool, workdir):
+    journal = tool.CheckJournal()
+    journal.start({"source": str(workdir / "proxies.txt"), "settings": {}})
+    journal.record("1.2.3.4:80", ("1.2.3.4:80", "1.2.3.4", "US", 10))
+    journal.record("5.6.7.8:80")
+    journal.close(finished=False)
+    return journal
+
+
+def test_journal_round_trip(tool, workdir):
+    journal = unfinished_journal(tool, workdir)
+
+    restored = tool.CheckJournal()
+    assert restored.load()["source"] == str(workdir / "proxies.txt")
+    assert set(restored.completed) == {"1.2.3.4:80", "5.6.7.8:80"}
+    assert restored.restored_results() == [("1.2.3.4:80", "1.2.3.4", "US", 10)]
+    assert list(restored.pending(["1.2.3.4:80", "9.9.9.9:80"])) == ["9.9.9.9:80"]
+    assert journal.unfinished()[1] == 2
+
+
+def test_interactive_check_refuses_to_overwrite_unfinished_journal(tool, workdir, monkeypatch):
+    journal = unfinished_journal(tool, workdir)
+    before = (workdir / "check_journal.jsonl").read_text()
+    (workdir / "proxies.txt").write_text("9.9.9.9:80\n")
+    monkeypatch.setattr(tool.sys.stdin, "isatty", lambda: True, raising=False)
+    monkeypatch.setattr(tool, "get_yes_no_input", lambda prompt: False)
+
+    assert tool.claim_check_journal() is None
+    assert tool.run_proxy_check(str(workdir / "proxies.txt"), {"max_threads": 1, "output_file": "out.txt"}) == []
+    assert tool.run_proxy_check_from_memory(["9.9.9.9:80"], {"max_threads": 1, "output_file": "out.txt"}) == []
+    assert (workdir / "check_journal.jsonl").read_text() == before
+    assert not (workdir / "check_journal.jsonl.proxies").exists()
+
+    journal.close(finished=True)
+    assert tool.claim_check_journal() is not None
+
+
+def test_headless_check_rotates_unfinished_journal(tool, workdir, monkeypatch):
+    unfinished_journal(tool, workdir)
+    before = (workdir / "check_journal.jsonl").read_text()
+    monkeypatch.setattr(tool.sys.stdin, "isatty", lambda: False, raising=False)
+
+    assert tool.claim_check_journal() is not None
+    assert not (workdir / "check_journal.jsonl").exists()
+    [rotated] = workdir.glob("check_journal.jsonl.*")
+    assert rotated.read_text() == before
+
+
+SETTINGS = {"max_threads": 1, "output_file": "out.txt", "classify": False}
+
+
+def fake_check(seen):
+    def check_proxies(proxies, classify, classify_type, output_path, max_threads, total=None, journal=None, result_sink=None):
+        for proxy in proxies:
+            seen.append(proxy)
+        return []
+    return check_proxies
+
+
+def test_memory_check_skips_journal_when_disabled(tool, workdir, monkeypatch):
+    unfinished_journal(tool, workdir)
+    before = (workdir / "check_journal.jsonl").read_text()
+    seen = []
+    monkeypatch.setattr(tool, "load_config", lambda: {"enable_check_journal": False})
+    monkeypatch.setattr(tool, "check_proxies", fake_check(seen))
+    monkeypatch.setattr(tool, "claim_check_journal", lambda journal=None: pytest.fail("journal claimed"))
+
+    tool.run_proxy_check_from_memory(["9.9.9.9:80"], SETTINGS)
+
+    assert seen == ["9.9.9.9:80"]
+    assert (workdir / "check_journal.jsonl").read_text() == before
+    assert not (workdir / "check_journal.jsonl.proxies").exists()
+
+
+def test_memory_check_snapshots_input_while_streaming(tool, workdir, monkeypatch):
+    read = []
+    seen = []
+
+    def source():
+        for line in ("1.1.1.1:80", "2.2.2.2:80", "1.1.1.1:80"):
+            read.append(line)
+            assert len(read) == len(seen) + 1
+            yield line
+
+    monkeypatch.setattr(tool, "load_config", lambda: {"enable_check_journal": True})
+    monkeypatch.setattr(tool, "check_proxies", fake_check(seen))
+    journal = tool.CheckJournal()
+    monkeypatch.setattr(tool, "claim_check_journal", lambda: journal)
+    monkeypatch.setattr(journal, "close", lambda finished=False: None)
+
+    tool.run_proxy_check_from_memory(source(), SETTINGS)
+    journal.snapshot_writer.close()
+    journal.writer.close()
+
+    assert seen == ["1.1.1.1:80", "2.2.2.2:80"]
+    assert (workdir / "check_journal.jsonl.proxies").read_text().splitlines() == seen
+    assert tool.CheckJournal().load()["source"] == journal.snapshot_path
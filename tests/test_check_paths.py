@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.fixture
+def check_config(tool, monkeypatch, workdir):
+    config = {
+        "ip_echo_urls": ["http://echo.invalid/json"],
+        "rate_limit_requests_per_second": 0,
+        "quiet_mode": True,
+        "enable_smart_threading": False,
+        "auto_export_reports": False,
+        "auto_bookmark_quality": False,
+        "history_file": "",
+        "enable_geolocation": False,
+        "tcp_prescreen_timeout": 1,
+    }
+    monkeypatch.setattr(tool, "load_config", lambda: dict(config))
+    return config
+
+
+def proxies(echo_server, closed_port):
+    yield f"127.0.0.1:{echo_server}"
+    yield f"127.0.0.1:{closed_port}"
+
+
+def test_basic_check_accepts_a_generator(tool, echo_server, closed_port, check_config, workdir):
+    results = tool.check_proxies(proxies(echo_server, closed_port), False, "n", str(workdir / "live.txt"), 4)
+
+    assert [result[0] for result in results] == [f"127.0.0.1:{echo_server}"]
+    assert (workdir / "live.txt").read_text().startswith(f"127.0.0.1:{echo_server} |")
+
+
+def test_rich_check_accepts_a_generator(tool, echo_server, closed_port, check_config, workdir):
+    results = tool.check_proxies_rich(proxies(echo_server, closed_port), False, "n", str(workdir / "live.txt"), 4)
+
+    assert [result.proxy for result in results] == [f"127.0.0.1:{echo_server}"]
+
+
+def test_renderer_accepts_an_unknown_total(tool):
+    renderer = tool.create_renderer({"quiet_mode": True}, None)
+    with renderer:
+        renderer.live()
+        renderer.dead()
+    assert (renderer.live_count, renderer.dead_count) == (1, 1)
+    assert tool.known_length(iter([])) is None and tool.known_length([1, 2]) == 2
+
+
+def test_rich_check_streams_only_filtered_results(tool, echo_server, closed_port, check_config, workdir):
+    check_config["min_health_score"] = 101
+    stats = {}
+
+    results = tool.check_proxies_rich(proxies(echo_server, closed_port), False, "n", str(workdir / "live.txt"), 4, stats=stats)
+
+    assert results == []
+    assert stats == {"live": 1, "passed": 0}
+    assert not (workdir / "live.txt").exists()
+
+
+def test_rich_check_keeps_streamed_output(tool, echo_server, closed_port, check_config, workdir):
+    stats = {}
+
+    tool.check_proxies_rich(proxies(echo_server, closed_port), False, "n", str(workdir / "live.txt"), 4, stats=stats)
+
+    assert stats == {"live": 1, "passed": 1}
+    assert [line.split(" | ")[0] for line in (workdir / "live.txt").read_text().splitlines()] == [f"127.0.0.1:{echo_server}"]
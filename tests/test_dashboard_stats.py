@@ -0,0 +1,56 @@
+import json
+import random
+import statistics
+
+
+def test_running_stats_match_statistics_module(tool):
+    rng = random.Random(3)
+    values = [rng.uniform(10, 3000) for _ in range(500)]
+    stats = tool.RunningStats()
+    for value in values:
+        stats.push(value)
+
+    assert stats.count == len(values)
+    assert abs(stats.mean - statistics.mean(values)) < 1e-6
+    assert abs(stats.stddev - statistics.stdev(values)) < 1e-6
+    assert (stats.minimum, stats.maximum) == (min(values), max(values))
+
+
+def test_histogram_percentiles_are_close_to_exact(tool):
+    rng = random.Random(11)
+    values = [rng.lognormvariate(5.5, 0.6) for _ in range(5000)]
+    histogram = tool.FixedHistogram(tool.LATENCY_BUCKETS)
+    for value in values:
+        histogram.push(value)
+
+    ordered = sorted(values)
+    for p in (50, 95, 99):
+        exact = ordered[int(len(ordered) * p / 100) - 1]
+        bucket = tool.bisect.bisect_right(tool.LATENCY_BUCKETS, exact)
+        low = tool.LATENCY_BUCKETS[bucket - 1] if bucket else 0
+        high = tool.LATENCY_BUCKETS[bucket] if bucket < len(tool.LATENCY_BUCKETS) else exact
+        assert low <= histogram.percentile(p) <= high
+    assert sum(histogram.buckets().values()) == len(values)
+
+
+def test_topk_counter_keeps_heavy_hitters(tool):
+    counter = tool.TopKCounter(capacity=3)
+    for country in ["US"] * 50 + ["DE"] * 30 + ["VN"] * 20 + ["a", "b", "c", "d"]:
+        counter.add(country)
+
+    assert len(counter.counts) == 3
+    assert [country for country, _ in counter.most_common(2)] == ["US", "DE"]
+
+
+def test_dashboard_summary_is_bounded_and_serialisable(tool):
+    dashboard = tool.ProxyAnalyticsDashboard(top_countries=4)
+    for i in range(1000):
+        dashboard.update_stats(f"p{i}", "1.1.1.1", f"C{i % 10}", 100 + i % 50, {"anonymity": "Elite"}, 80)
+    dashboard.update_stats("dead", None, None, 0)
+
+    summary = json.loads(json.dumps(dashboard.summary()))
+    assert (summary["live_proxies"], summary["dead_proxies"]) == (1000, 1)
+    assert len(summary["countries"]) == 4
+    assert 100 <= summary["response_time"]["p50"] <= summary["response_time"]["p99"] <= 149
+    assert summary["anonymity_levels"] == {"Elite": 1000}
+    assert summary["health_score"]["mean"] == 80
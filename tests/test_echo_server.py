@@ -0,0 +1,19 @@
+import httpx
+
+
+def test_echo_server_reports_caller_ip_on_every_path(tool, echo_server):
+    for path in ("/", "/json", "/ip", "/headers"):
+        response = httpx.get(f"http://127.0.0.1:{echo_server}{path}", headers={"X-Probe": "1"})
+        data = response.json()
+        assert response.status_code == 200
+        assert data["ip"] == data["origin"] == "127.0.0.1"
+        assert data["headers"]["X-Probe"] == "1"
+
+
+def test_custom_echo_urls_parse_the_ip_key(tool):
+    test_urls = tool.get_ip_test_urls(["http://127.0.0.1:8899/json"])
+    parsed = tool.parse_ip_test_response(test_urls[0], {"ip": "5.6.7.8"}, 12)
+
+    assert test_urls[0]["ip_key"] == "ip"
+    assert parsed["ip"] == "5.6.7.8"
+    assert parsed["response_time"] == 12
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import httpx
+
+
+def make_batcher(tool, **kwargs):
+    settings = dict(batch_size=2, window=0.01, requests_per_minute=6000, fallback_concurrency=2, max_retries=2)
+    settings.update(kwargs)
+    return tool.GeolocationBatcher(**settings)
+
+
+def resolve(batcher, ips):
+    async def run():
+        return await asyncio.gather(*(batcher.fetch(ip) for ip in ips))
+    return asyncio.run(run())
+
+
+def test_rate_limited_batch_is_retried_not_fanned_out(tool, monkeypatch):
+    responses = [(None, 0.05), ({"1.1.1.1": {"country_code": "AU"}, "2.2.2.2": {"country_code": "US"}}, 0)]
+    sent = []
+    fallbacks = []
+
+    async def fake_batch(ips):
+        sent.append((time.monotonic(), list(ips)))
+        return responses.pop(0)
+
+    async def fake_single(ip):
+        fallbacks.append(ip)
+        return {"country_code": "??"}
+
+    monkeypatch.setattr(tool, "fetch_geolocation_batch", fake_batch)
+    monkeypatch.setattr(tool, "fetch_detailed_geolocation", fake_single)
+
+    assert resolve(make_batcher(tool), ["1.1.1.1", "2.2.2.2"]) == [{"country_code": "AU"}, {"country_code": "US"}]
+    assert len(sent) == 2 and sent[1][0] - sent[0][0] >= 0.05
+    assert fallbacks == []
+
+
+def test_exhausted_rate_limit_gives_up_without_fallback(tool, monkeypatch):
+    fallbacks = []
+
+    async def fake_batch(ips):
+        return None, 0.01
+
+    async def fake_single(ip):
+        fallbacks.append(ip)
+
+    monkeypatch.setattr(tool, "fetch_geolocation_batch", fake_batch)
+    monkeypatch.setattr(tool, "fetch_detailed_geolocation", fake_single)
+
+    assert resolve(make_batcher(tool, max_retries=1), ["1.1.1.1", "2.2.2.2"]) == [None, None]
+    assert fallbacks == []
+
+
+def test_fallback_concurrency_is_capped(tool, monkeypatch):
+    active = []
+    peak = []
+
+    async def fake_batch(ips):
+        return {}, 0
+
+    async def fake_single(ip):
+        active.append(ip)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.remove(ip)
+        return {"country_code": "NL"}
+
+    monkeypatch.setattr(tool, "fetch_geolocation_batch", fake_batch)
+    monkeypatch.setattr(tool, "fetch_detailed_geolocation", fake_single)
+
+    ips = [f"10.0.0.{i}" for i in range(8)]
+    assert resolve(make_batcher(tool, batch_size=8, fallback_concurrency=2), ips) == [{"country_code": "NL"}] * 8
+    assert max(peak) == 2
+
+
+def test_batches_are_paced(tool, monkeypatch):
+    sent = []
+
+    async def fake_batch(ips):
+        sent.append(time.monotonic())
+        return {ip: {"country_code": "US"} for ip in ips}, 0
+
+    monkeypatch.setattr(tool, "fetch_geolocation_batch", fake_batch)
+
+    resolve(make_batcher(tool, batch_size=1, requests_per_minute=600), ["1.1.1.1", "2.2.2.2", "3.3.3.3"])
+    assert len(sent) == 3
+    assert sent[-1] - sent[0] >= 0.18
+
+
+def test_batch_hold_reads_ip_api_headers(tool):
+    request = httpx.Request("POST", tool.GEOLOCATION_BATCH_URL)
+    assert tool.geolocation_batch_hold(httpx.Response(429, headers={"X-Ttl": "30"}, request=request)) == 30
+    assert tool.geolocation_batch_hold(httpx.Response(429, request=request)) == 60
+    assert tool.geolocation_batch_hold(httpx.Response(200, headers={"X-Rl": "0", "X-Ttl": "12"}, request=request)) == 12
+    assert tool.geolocation_batch_hold(httpx.Response(200, headers={"X-Rl": "14", "X-Ttl": "12"}, request=request)) == 0
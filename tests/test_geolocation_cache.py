@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+
+def test_cache_expires_and_evicts_oldest(tool):
+    cache = tool.GeolocationCache(ttl=60, max_entries=2)
+    cache.loaded = True
+    cache.put("1.1.1.1", {"country_code": "AU"})
+    cache.put("2.2.2.2", {"country_code": "US"})
+    assert cache.get("1.1.1.1") == {"country_code": "AU"}
+    cache.put("3.3.3.3", {"country_code": "DE"})
+
+    assert cache.get("2.2.2.2") is None
+    assert cache.get("1.1.1.1") is not None
+
+    cache.entries["1.1.1.1"] = (time.time() - 1, {"country_code": "AU"})
+    assert cache.get("1.1.1.1") is None
+
+
+def test_cache_shares_subnet_entries(tool):
+    cache = tool.GeolocationCache(by_subnet=True)
+    cache.loaded = True
+    cache.put("10.1.2.3", {"country_code": "NL"})
+    assert cache.get("10.1.2.200") == {"country_code": "NL"}
+    assert cache.get("10.1.3.1") is None
+
+
+def test_lookup_coalesces_concurrent_fetches(tool):
+    cache = tool.GeolocationCache()
+    cache.loaded = True
+    calls = []
+
+    async def fetch(ip):
+        calls.append(ip)
+        await asyncio.sleep(0.05)
+        return {"country_code": "FR"}
+
+    async def run():
+        return await asyncio.gather(*(cache.lookup("8.8.8.8", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"country_code": "FR"}] * 5
+    assert calls == ["8.8.8.8"]
+    assert asyncio.run(cache.lookup("8.8.8.8", fetch)) == {"country_code": "FR"}
+    assert calls == ["8.8.8.8"]
+
+
+def test_failed_lookups_are_not_cached(tool):
+    cache = tool.GeolocationCache()
+    cache.loaded = True
+
+    async def unknown(ip):
+        return {"country_code": "??"}
+
+    asyncio.run(cache.lookup("9.9.9.9", unknown))
+    assert cache.get("9.9.9.9") is None
+
+
+def test_cache_round_trips_through_file(tool, workdir):
+    path = str(workdir / "geo.json")
+    cache = tool.GeolocationCache(path=path)
+    cache.put("1.1.1.1", {"country_code": "AU"})
+    cache.save()
+
+    reloaded = tool.GeolocationCache(path=path)
+    reloaded.load()
+    assert reloaded.get("1.1.1.1") == {"country_code": "AU"}
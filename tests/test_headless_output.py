@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import MODULE_PATH
+
+
+def headless_config(**overrides):
+    config = {
+        "ip_echo_urls": ["http://echo.invalid/json"],
+        "rate_limit_requests_per_second": 0,
+        "quiet_mode": True,
+        "enable_smart_threading": False,
+        "auto_export_reports": False,
+        "auto_bookmark_quality": False,
+        "history_file": "",
+        "enable_geolocation": False,
+        "enable_tcp_prescreen": True,
+        "tcp_prescreen_timeout": 1,
+    }
+    config.update(overrides)
+    return config
+
+
+def ndjson_records(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_include_dead_streams_prescreen_failures(tool, echo_server, closed_port, workdir, monkeypatch, capsys):
+    config = headless_config()
+    monkeypatch.setattr(tool, "load_config", lambda: dict(config))
+    monkeypatch.setattr(tool.console, "_file", tool.console._file)
+    live, dead = f"127.0.0.1:{echo_server}", f"127.0.0.1:{closed_port}"
+    (workdir / "proxies.txt").write_text(f"{live}\n{dead}\n")
+
+    args = tool.build_arg_parser().parse_args(["-i", "proxies.txt", "-o", "live.txt", "-q", "--include-dead"])
+    assert tool.run_headless(args) == 0
+
+    records = {record["proxy"]: record["status"] for record in ndjson_records(capsys.readouterr().out)}
+    assert records == {live: "live", dead: "dead"}
+
+
+def test_dead_proxies_stay_off_stdout_by_default(tool, closed_port, workdir, monkeypatch, capsys):
+    config = headless_config()
+    monkeypatch.setattr(tool, "load_config", lambda: dict(config))
+    monkeypatch.setattr(tool.console, "_file", tool.console._file)
+    (workdir / "proxies.txt").write_text(f"127.0.0.1:{closed_port}\n")
+
+    args = tool.build_arg_parser().parse_args(["-i", "proxies.txt", "-o", "live.txt", "-q"])
+    assert tool.run_headless(args) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_headless_flags_are_detected(tool):
+    assert tool.is_headless_invocation(["-i", "proxies.txt"])
+    assert tool.is_headless_invocation(["-iproxies.txt", "-q"])
+    assert tool.is_headless_invocation(["--source=http"])
+    assert tool.is_headless_invocation(["--refilter"])
+    assert not tool.is_headless_invocation([])
+    assert not tool.is_headless_invocation(["--echo-server", "9000"])
+    assert not tool.is_headless_invocation(["--", "-i"])
+
+
+def test_script_stdout_is_ndjson_only(closed_port, tmp_path):
+    script = tmp_path / "tool check proxy.py"
+    shutil.copy(MODULE_PATH, script)
+    (tmp_path / ".deps_checked").write_text("")
+    (tmp_path / "config.json").write_text(json.dumps(headless_config()))
+    dead = f"127.0.0.1:{closed_port}"
+    (tmp_path / "proxies.txt").write_text(f"{dead}\n")
+
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    completed = subprocess.run(
+        [sys.executable, str(script), "-i", "proxies.txt", "-o", "live.txt", "--include-dead"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, encoding="utf-8", timeout=120,
+    )
+
+    assert ndjson_records(completed.stdout) == [{"proxy": dead, "status": "dead"}]
+    assert "Checking dependencies" in completed.stderr
+
+
+def test_resume_streams_remaining_results_as_ndjson(tool, echo_server, closed_port, workdir, monkeypatch, capsys):
+    config = headless_config(enable_check_journal=True)
+    monkeypatch.setattr(tool, "load_config", lambda: dict(config))
+    monkeypatch.setattr(tool.console, "_file", tool.console._file)
+    done, live, dead = "10.0.0.1:80", f"127.0.0.1:{echo_server}", f"127.0.0.1:{closed_port}"
+    (workdir / "proxies.txt").write_text(f"{done}\n{live}\n{dead}\n")
+    settings = {"output_file": "live.txt", "classify": False, "classify_option": "n", "max_threads": 4, "check_level": "basic"}
+    journal = tool.CheckJournal()
+    journal.start({"source": str(workdir / "proxies.txt"), "settings": settings})
+    journal.record(done)
+    journal.close(finished=False)
+
+    args = tool.build_arg_parser().parse_args(["--resume", "-q", "--include-dead"])
+    assert tool.run_headless(args) == 0
+
+    records = {record["proxy"]: record["status"] for record in ndjson_records(capsys.readouterr().out)}
+    assert records == {live: "live", dead: "dead"}
+    assert not (workdir / "check_journal.jsonl").exists()
+
+
+def test_resume_without_journal_fails(tool, workdir, monkeypatch, capsys):
+    monkeypatch.setattr(tool, "load_config", lambda: headless_config())
+    monkeypatch.setattr(tool.console, "_file", tool.console._file)
+
+    assert tool.run_headless(tool.build_arg_parser().parse_args(["--resume"])) == 2
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,61 @@
+URL = "http://echo.example/json"
+OTHER = {"url": "http://other.example/json"}
+ECHO = {"url": URL}
+
+
+def test_bare_429_and_403_only_back_off_that_proxy(tool):
+    limiter = tool.HostRateLimiter()
+    limiter.record_response(URL, 429, {"Content-Type": "text/html"}, "1.1.1.1:80")
+    limiter.record_response(URL, 403, {}, "2.2.2.2:80")
+
+    assert not limiter.is_blocked("echo.example")
+    assert limiter.is_blocked("echo.example", proxy="1.1.1.1:80")
+    assert limiter.is_blocked("echo.example", proxy="2.2.2.2:80")
+    assert not limiter.is_blocked("echo.example", proxy="3.3.3.3:80")
+    assert limiter.prioritize([ECHO, OTHER], "1.1.1.1:80") == [OTHER]
+    assert limiter.prioritize([ECHO, OTHER], "3.3.3.3:80") == [ECHO, OTHER]
+
+
+def test_origin_rate_limit_blocks_the_host(tool):
+    limiter = tool.HostRateLimiter()
+    limiter.record_response(URL, 429, {"Retry-After": "5"}, "1.1.1.1:80")
+
+    assert limiter.is_blocked("echo.example")
+    assert limiter.is_blocked("echo.example", proxy="9.9.9.9:80")
+    assert 4 < limiter.backoff["echo.example"] <= 5
+
+    limiter.record_response(URL, 200, {}, "9.9.9.9:80")
+    assert not limiter.is_blocked("echo.example")
+
+
+def test_rate_limit_headers_are_recognised(tool):
+    assert tool.is_origin_rate_limit(429, {"X-RateLimit-Remaining": "0"})
+    assert tool.is_origin_rate_limit(429, {"x-ttl": "30"})
+    assert not tool.is_origin_rate_limit(429, {"Server": "squid"})
+    assert not tool.is_origin_rate_limit(403, {"Retry-After": "5"})
+
+
+def test_proxy_backoff_grows_and_is_bounded(tool):
+    limiter = tool.HostRateLimiter(max_proxy_entries=3)
+    limiter.record_response(URL, 429, {}, "1.1.1.1:80")
+    limiter.record_response(URL, 429, {}, "1.1.1.1:80")
+    assert limiter.proxy_backoff[("1.1.1.1:80", "echo.example")][0] == 2.0
+
+    limiter.record_response(URL, 200, {}, "1.1.1.1:80")
+    assert ("1.1.1.1:80", "echo.example") not in limiter.proxy_backoff
+
+    for i in range(5):
+        limiter.record_response(URL, 429, {}, f"10.0.0.{i}:80")
+    assert len(limiter.proxy_backoff) == 3
+
+
+def test_configure_gives_every_endpoint_its_own_budget(tool):
+    limiter = tool.HostRateLimiter()
+    limiter.configure({"host_rate_limits": {"other.example": 8}}, shares=2)
+
+    assert limiter.get_limiter("echo.example").max_requests == 5
+    assert limiter.get_limiter("other.example").max_requests == 4
+
+    for _ in range(10):
+        limiter.wait(URL)
+    assert limiter.prioritize([ECHO, OTHER]) == [OTHER, ECHO]
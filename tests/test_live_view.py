@@ -0,0 +1,29 @@
+from rich.console import Console
+
+
+def render_text(renderable):
+    console = Console(width=120, record=True, file=open("/dev/null", "w"))
+    console.print(renderable)
+    return console.export_text()
+
+
+def test_live_view_shows_current_top_proxies(tool):
+    ranker = tool.TopKRanker(10)
+    renderer = tool.create_renderer({"quiet_mode": True, "render_top_size": 2}, 3, ranker=ranker)
+    assert "Top" not in render_text(renderer.render())
+
+    for proxy, response_time, health in [("1.1.1.1:80", 300, 60), ("2.2.2.2:80", 50, 95), ("3.3.3.3:80", 90, 80)]:
+        ranker.push(tool.ProxyResult(proxy, proxy.split(":")[0], "US", response_time, None, health))
+        renderer.live()
+
+    text = render_text(renderer.render())
+    assert "Top 2" in text
+    assert text.index("2.2.2.2:80") < text.index("3.3.3.3:80")
+    assert "1.1.1.1:80" not in text
+
+
+def test_ranker_keeps_best_by_health_then_speed(tool):
+    ranker = tool.TopKRanker(2)
+    for proxy, response_time, health in [("a", 100, 70), ("b", 50, 70), ("c", 10, 40), ("d", 500, 90)]:
+        ranker.push(tool.ProxyResult(proxy, "1.1.1.1", "US", response_time, None, health))
+    assert [result.proxy for result in ranker.best()] == ["d", "b"]
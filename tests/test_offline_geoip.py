@@ -0,0 +1,53 @@
+from array import array
+
+
+def load(tool, workdir, name, text):
+    path = workdir / name
+    path.write_text(text)
+    geoip = tool.OfflineGeoIP()
+    geoip.load(str(path))
+    return geoip
+
+
+def test_dbip_city_lite_uses_the_country_column(tool, workdir):
+    geoip = load(tool, workdir, "dbip-city-lite.csv", (
+        "1.0.0.0,1.0.0.255,OC,AU,Queensland,South Brisbane,-27.4767,153.017\n"
+        "5.0.0.0,5.0.0.255,EU,DE,Hesse,Frankfurt,50.11,8.68\n"
+        "2001:db8::,2001:db8::ffff,AS,JP,Tokyo,Tokyo,35.68,139.69\n"
+    ))
+
+    assert geoip.lookup("1.0.0.7")["country_code"] == "AU"
+    assert geoip.lookup("1.0.0.7")["city"] == "South Brisbane"
+    assert geoip.lookup("5.0.0.1")["country_code"] == "DE"
+    assert geoip.lookup("2001:db8::1")["country_code"] == "JP"
+    assert geoip.lookup("2.0.0.1") is None
+
+
+def test_ip2asn_rows_and_unsorted_input(tool, workdir):
+    geoip = load(tool, workdir, "ip2asn.tsv", (
+        "8.8.8.0\t8.8.8.255\t15169\tUS\tGOOGLE\n"
+        "1.1.1.0\t1.1.1.255\t13335\tUS\tCLOUDFLARENET\n"
+        "9.9.9.0\t9.9.9.255\t0\tNone\tNot routed\n"
+    ))
+
+    google = geoip.lookup("8.8.8.8")
+    assert (google["country_code"], google["asn"], google["org"], google["is_hosting"]) == ("US", 15169, "GOOGLE", True)
+    assert geoip.lookup("1.1.1.1")["asn"] == 13335
+    assert geoip.lookup("9.9.9.9")["country_code"] == "??"
+
+
+def test_header_selects_columns_by_name(tool, workdir):
+    geoip = load(tool, workdir, "ranges.csv", (
+        "start,end,continent,org,country_code\n"
+        "10.0.0.0,10.0.0.255,EU,Example Hosting,NL\n"
+    ))
+
+    record = geoip.lookup("10.0.0.9")
+    assert (record["country_code"], record["org"], record["asn"]) == ("NL", "Example Hosting", None)
+
+
+def test_offline_records_leave_anonymity_unknown_and_use_arrays(tool, workdir):
+    geoip = load(tool, workdir, "country.csv", "1.0.0.0,1.0.0.255,AU\n")
+
+    assert geoip.lookup("1.0.0.1")["anonymity"] == "Unknown"
+    assert all(isinstance(column, array) for column in geoip.tables[4])
@@ -0,0 +1,33 @@
+import asyncio
+import json
+import os
+
+from conftest import ROOT
+
+
+def test_default_probe_mode_is_sequential_first_success(tool, workdir):
+    assert tool.load_config()["ip_probe_mode"] == "first"
+    with open(os.path.join(ROOT, "config.json"), encoding="utf-8") as f:
+        assert json.load(f)["ip_probe_mode"] == "first"
+
+
+def test_first_mode_stops_after_first_successful_endpoint(tool, monkeypatch):
+    calls = []
+
+    async def fake_probe(proxy_url, client, test_config, attempt, is_last_attempt, rate_limiter=None):
+        calls.append(test_config["url"])
+        if test_config["url"].endswith("/2"):
+            return {"ip": "9.9.9.9", "country": "US", "response_time": 10, "weight": 1}
+        return None
+
+    monkeypatch.setattr(tool, "probe_ip_endpoint_async", fake_probe)
+    monkeypatch.setattr(tool.random, "uniform", lambda a, b: 1.0)
+    test_urls = [
+        {"url": f"http://echo.invalid/{index}", "ip_key": "ip", "country_key": None, "timeout": 1, "weight": 10 - index}
+        for index in range(5)
+    ]
+
+    result = asyncio.run(tool.test_proxy_enhanced_async("1.2.3.4:80", max_retries=0, probe_mode="first", test_urls=test_urls))
+
+    assert result == ("9.9.9.9", "US", 10)
+    assert calls == [f"http://echo.invalid/{index}" for index in range(3)]
@@ -0,0 +1,58 @@
+import asyncio
+
+
+def serve(reply, check):
+    async def handle(reader, writer):
+        try:
+            await reader.read(1024)
+            writer.write(reply)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await check(port)
+
+    return asyncio.run(run())
+
+
+def test_detects_socks5(tool):
+    assert serve(b"\x05\x00", lambda port: tool.detect_proxy_protocols(f"127.0.0.1:{port}", 1)) == ["socks5"]
+
+
+def test_detects_socks4(tool):
+    reply = b"\x00\x5a" + bytes(6)
+    assert serve(reply, lambda port: tool.detect_proxy_protocols(f"127.0.0.1:{port}", 1)) == ["socks4"]
+
+
+def test_detects_http_connect(tool):
+    reply = b"HTTP/1.1 200 Connection established\r\n\r\n"
+    assert serve(reply, lambda port: tool.detect_proxy_protocols(f"127.0.0.1:{port}", 1)) == ["http", "https"]
+
+
+def test_explicit_scheme_only_runs_that_probe(tool):
+    reply = b"HTTP/1.1 200 Connection established\r\n\r\n"
+    assert serve(reply, lambda port: tool.detect_proxy_protocols(f"socks5://127.0.0.1:{port}", 1)) == []
+
+
+def test_invalid_or_closed_proxies_have_no_protocols(tool):
+    assert asyncio.run(tool.detect_proxy_protocols("not a proxy", 1)) == []
+    assert asyncio.run(tool.detect_proxy_protocols("127.0.0.1:1", 1)) == []
+
+
+def fingerprint(tool, reply):
+    return serve(reply, lambda port: tool.fingerprint_http_connect("127.0.0.1", port, 1))
+
+
+def test_plain_web_server_is_not_an_http_proxy(tool):
+    assert fingerprint(tool, b"HTTP/1.1 400 Bad Request\r\nServer: nginx\r\nContent-Length: 0\r\n\r\n") == []
+    assert fingerprint(tool, b"HTTP/1.1 405 Method Not Allowed\r\n\r\n") == []
+
+
+def test_proxy_refusals_still_count_as_http(tool):
+    assert fingerprint(tool, b"HTTP/1.1 407 Proxy Authentication Required\r\n\r\n") == ["http"]
+    assert fingerprint(tool, b"HTTP/1.1 403 Forbidden\r\nProxy-Agent: squid\r\n\r\n") == ["http"]
+    assert fingerprint(tool, b"HTTP/1.0 502 Bad Gateway\r\nVia: 1.1 proxy\r\n\r\n") == ["http"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+
+
+def test_build_proxy_config_uses_url_form_mount_keys(tool):
+    assert tool.build_proxy_config("1.2.3.4:8080") == {
+        "http://": "http://1.2.3.4:8080",
+        "https://": "http://1.2.3.4:8080",
+    }
+    assert tool.build_proxy_config("socks5://user:pw@1.2.3.4:1080") == {
+        "http://": "socks5://user:pw@1.2.3.4:1080",
+        "https://": "socks5://user:pw@1.2.3.4:1080",
+    }
+
+
+def test_proxy_client_shares_one_transport_for_both_schemes(tool):
+    mounts = tool.build_proxy_mounts(tool.build_proxy_config("1.2.3.4:8080"))
+    assert mounts["http://"] is mounts["https://"]
+    assert isinstance(mounts["http://"], httpx.HTTPTransport)
+    with tool.proxy_client(tool.build_proxy_config("1.2.3.4:8080")) as client:
+        assert isinstance(client, httpx.Client)
+
+
+def test_sync_probe_goes_through_the_proxy(tool, echo_server, monkeypatch):
+    monkeypatch.setattr(tool, "get_country_from_ip", lambda ip: "ZZ")
+    test_urls = tool.get_ip_test_urls(["http://echo.invalid/json"])
+
+    ip, country, response_time = tool.test_proxy_enhanced(
+        f"127.0.0.1:{echo_server}", max_retries=0, probe_mode="first", test_urls=test_urls
+    )
+
+    assert (ip, country) == ("127.0.0.1", "ZZ")
+    assert response_time >= 0
+
+
+def test_async_probe_goes_through_the_proxy(tool, echo_server, monkeypatch):
+    monkeypatch.setattr(tool, "get_country_from_ip", lambda ip: "ZZ")
+    test_urls = tool.get_ip_test_urls(["http://echo.invalid/json"])
+
+    ip, country, _ = asyncio.run(tool.test_proxy_enhanced_async(
+        f"127.0.0.1:{echo_server}", max_retries=0, probe_mode="first", test_urls=test_urls
+    ))
+
+    assert (ip, country) == ("127.0.0.1", "ZZ")
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {"content-length": "125000"}
+    content = b""
+
+
+class FakeClient:
+    def __init__(self, created, verify):
+        self.verify = verify
+        self.requests = 0
+        self.closed = False
+        created.append(self)
+
+    async def head(self, url, timeout=None):
+        self.requests += 1
+        return FakeResponse()
+
+    async def get(self, url, timeout=None):
+        self.requests += 1
+        return FakeResponse()
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_speed_test_builds_one_client_per_verify_value(tool, monkeypatch):
+    created = []
+    monkeypatch.setattr(tool, "async_proxy_client", lambda proxy_config, verify=True, http2=True: FakeClient(created, verify))
+
+    speed, latency = asyncio.run(tool.test_proxy_speed("1.2.3.4:8080"))
+
+    assert speed > 0 and latency >= 0
+    assert sorted(client.verify for client in created) == [False, True]
+    assert sum(client.requests for client in created) == 4
+    assert all(client.closed for client in created)
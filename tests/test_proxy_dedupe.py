@@ -0,0 +1,36 @@
+def test_equivalent_spellings_share_a_key(tool):
+    key = tool.canonical_proxy_key
+    assert key("1.2.3.4:8080") == key("http://1.2.3.4:8080") == key("HTTP://1.2.3.4:8080/")
+    assert key("user:pass@1.2.3.4:8080") == key("1.2.3.4:8080")
+    assert key("[2001:DB8::1]:80") == key("[2001:db8::1]:80")
+    assert key("Proxy.Example.com:3128") == key("proxy.example.com:3128")
+
+
+def test_scheme_port_and_family_keep_keys_apart(tool):
+    key = tool.canonical_proxy_key
+    assert key("1.2.3.4:8080") != key("socks5://1.2.3.4:8080")
+    assert key("1.2.3.4:8080") != key("1.2.3.4:8081")
+    assert key("[::102:304]:8080") != key("1.2.3.4:8080")
+    assert isinstance(key("1.2.3.4:8080"), int)
+    assert key("garbage") == "garbage"
+
+
+def test_iter_proxy_lines_skips_duplicates_and_counts_them(tool):
+    index = tool.ProxyDedupeIndex()
+    stats = {}
+    lines = ["1.2.3.4:80 | 12ms\n", "# comment\n", "\n", "http://1.2.3.4:80\n", "5.6.7.8:80\n"]
+
+    assert list(tool.iter_proxy_lines(lines, stats, index)) == ["1.2.3.4:80", "5.6.7.8:80"]
+    assert stats == {"total": 3, "unique": 2, "duplicates": 1}
+    assert "http://5.6.7.8:80" in index and len(index) == 2
+    assert list(index.filter(["5.6.7.8:80", "9.9.9.9:80"])) == ["9.9.9.9:80"]
+
+
+def test_leading_zero_octets_are_rejected(tool):
+    assert tool.parse_proxy_record("010.0.0.1:8080") is None
+    assert tool.parse_proxy_record("1.2.3.04:80") is None
+    assert tool.parse_proxy_record("10.0.0.1:8080").ip == 0x0A000001
+    assert tool.parse_proxy_record("0.0.0.0:80") is not None
+    assert tool.canonical_proxy_key("010.0.0.1:8080") != tool.canonical_proxy_key("8.0.0.1:8080")
+    assert not tool.validate_ip("010.0.0.1")
+    assert tool.validate_ip("10.0.0.1")
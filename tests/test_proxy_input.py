@@ -0,0 +1,38 @@
+import pytest
+
+
+def test_validate_counts_parsed_entries_not_lines(tool, workdir):
+    path = workdir / "proxies.txt"
+    path.write_text("# comment\n\n1.2.3.4:8080\n1.2.3.4:8080\nhttp://5.6.7.8:3128 | note\nnot a proxy line at all\n")
+    printed = []
+    original = tool.console.print
+    tool.console.print = lambda message, *args, **kwargs: printed.append(str(message))
+    try:
+        assert tool.validate_proxy_file(str(path)) is True
+    finally:
+        tool.console.print = original
+
+    assert any("2 proxy hợp lệ" in message for message in printed)
+    assert any("1 proxy trùng lặp" in message for message in printed)
+    assert any("1 dòng không đúng" in message for message in printed)
+
+
+def test_validate_rejects_file_without_proxies(tool, workdir):
+    path = workdir / "empty.txt"
+    path.write_text("# only comments\n\n")
+    assert tool.validate_proxy_file(str(path)) is False
+
+
+def test_lines_are_parsed_once_at_ingest(tool, monkeypatch):
+    import pickle
+
+    proxies = list(tool.iter_proxy_lines(["socks5://u:p@1.2.3.4:1080", "not-a-proxy", "[::1]:8080"]))
+    assert [proxy.record is not None for proxy in proxies] == [True, False, True]
+    assert not hasattr(tool.parse_proxy_record, "cache_info")
+
+    monkeypatch.setattr(tool, "parse_proxy_record", lambda proxy: pytest.fail(f"re-parsed {proxy}"))
+    assert tool.parse_proxy_auth(proxies[0])["auth"] == ("u", "p")
+    assert tool.parse_proxy_auth(proxies[1])["error"]
+    assert tool.build_proxy_config(proxies[2])["http://"] == "http://[::1]:8080"
+    assert tool.canonical_proxy_key(proxies[0]) == tool.canonical_proxy_key(pickle.loads(pickle.dumps(proxies[0])))
+    assert pickle.loads(pickle.dumps(proxies[0])).record == proxies[0].record
@@ -0,0 +1,33 @@
+import json
+import pickle
+
+
+def make_result(tool):
+    geo = {"country": "Germany", "country_code": "DE", "city": "Berlin", "anonymity": "Elite", "asn": 3320}
+    return tool.ProxyResult("1.2.3.4:80", "1.2.3.4", "DE", 120, geo, 88)
+
+
+def test_result_unpacks_like_the_old_tuple(tool):
+    result = make_result(tool)
+    proxy, ip, country, response_time, geo, health_score = result
+
+    assert (proxy, ip, country, response_time, health_score) == ("1.2.3.4:80", "1.2.3.4", "DE", 120, 88)
+    assert len(result) == 6 and result[3] == 120 and result[1:3] == ("1.2.3.4", "DE")
+    assert geo.get("city") == "Berlin" and geo["anonymity"] == "Elite"
+    assert "region" not in geo and geo.get("region", "Unknown") == "Unknown"
+
+
+def test_result_survives_pickle_and_json(tool):
+    result = make_result(tool)
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert tuple(restored)[:4] == tuple(result)[:4]
+    assert restored.geo_data.to_dict() == result.geo_data.to_dict()
+    assert json.loads(json.dumps(result.geo_data, default=tool.geo_to_dict))["asn"] == 3320
+
+
+def test_repeated_strings_are_interned(tool):
+    first = tool.ProxyResult("1.1.1.1:80", "1.1.1.1", "".join(["U", "S"]), 10)
+    second = tool.ProxyResult("2.2.2.2:80", "2.2.2.2", "".join(["U", "S"]), 10)
+    assert first.country is second.country
+    assert not hasattr(first, "__dict__")
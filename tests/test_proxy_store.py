@@ -0,0 +1,45 @@
+import json
+
+
+def test_proxy_store_behaves_like_a_dict(tool, workdir):
+    store = tool.ProxyStore(str(workdir / "proxies.sqlite3"), batch_size=2, commit_interval=3600)
+    ok = {"last_check": "2026-01-02T00:00:00", "checks": [{"result": {"status": "working"}}]}
+    old = {"last_check": "2025-01-01T00:00:00", "checks": []}
+    store["1.2.3.4:80"] = ok
+    store.put("5.6.7.8:80", old)
+
+    assert "1.2.3.4:80" in store and len(store) == 2
+    assert store["1.2.3.4:80"] == ok
+    assert store.get("9.9.9.9:80", {}) == {}
+    assert sorted(store) == ["1.2.3.4:80", "5.6.7.8:80"]
+    assert store.find_urls(status="working") == ["1.2.3.4:80"]
+    assert store.find_urls(checked_after="2025-06-01") == ["1.2.3.4:80"]
+
+    store.delete_checked_before("2025-06-01")
+    assert store.keys() == ["1.2.3.4:80"]
+    del store["1.2.3.4:80"]
+    assert len(store) == 0
+    store.close()
+
+
+def test_proxy_store_persists_batched_writes(tool, workdir):
+    path = str(workdir / "proxies.sqlite3")
+    store = tool.ProxyStore(path, batch_size=1000, commit_interval=3600)
+    store.update({f"10.0.0.{i}:80": {"last_check": None, "checks": []} for i in range(5)})
+    store.put("10.0.0.9:80", {"last_check": None, "checks": []})
+    store.close()
+
+    reopened = tool.ProxyStore(path)
+    assert len(reopened) == 6
+    reopened.close()
+
+
+def test_proxy_manager_migrates_json_database(tool, workdir):
+    (workdir / "proxy_db.json").write_text(json.dumps({"1.2.3.4:80": {"added": "x", "last_check": None, "checks": []}}))
+
+    manager = tool.ProxyManager()
+    manager.update_proxy_check("1.2.3.4:80", {"status": "working"})
+
+    assert manager.get_proxy_info("1.2.3.4:80")["checks"][0]["result"] == {"status": "working"}
+    assert (workdir / "proxy_db.json.migrated").exists()
+    manager.proxies_db.close()
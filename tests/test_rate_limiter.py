@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+
+def test_reserve_allows_burst_then_spaces_requests(tool):
+    limiter = tool.RateLimiter(max_requests_per_second=10, burst_size=2)
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    delay = limiter.reserve()
+    assert 0.08 <= delay <= 0.11
+    assert limiter.reserve() > delay
+    assert limiter.total_requests == 4
+
+
+def test_zero_rate_disables_throttling(tool):
+    limiter = tool.RateLimiter(max_requests_per_second=5)
+    limiter.set_rate(0)
+    assert all(limiter.reserve() == 0.0 for _ in range(100))
+
+
+def test_async_waits_share_one_bucket(tool):
+    limiter = tool.RateLimiter(max_requests_per_second=50, burst_size=1)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.wait_if_needed_async() for _ in range(6)))
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
+
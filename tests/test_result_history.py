@@ -0,0 +1,42 @@
+import json
+
+
+def write_history(workdir, tool, rows):
+    writer = tool.open_history_writer({"history_file": str(workdir / "history.jsonl")})
+    for result in rows:
+        writer.write(result.proxy, result)
+    writer.close()
+    return workdir / "history.jsonl"
+
+
+def test_history_is_rescored_and_refiltered(tool, workdir):
+    path = write_history(workdir, tool, [
+        tool.ProxyResult("1.1.1.1:80", "1.1.1.1", "US", 40, {"anonymity": "Elite"}, 0),
+        tool.ProxyResult("2.2.2.2:80", "2.2.2.2", "DE", 800, {"anonymity": "Transparent", "is_hosting": True}, 0),
+        tool.ProxyResult("1.1.1.1:80", "1.1.1.1", "US", 90, {"anonymity": "Elite"}, 0),
+    ])
+
+    columns = tool.load_result_history(str(path))
+    assert len(columns) == 2
+    assert columns.health_scores == [
+        tool.calculate_proxy_health_score(90, 0, "Elite", False),
+        tool.calculate_proxy_health_score(800, 0, "Transparent", True),
+    ]
+
+    assert [result.proxy for result in tool.refilter_history(columns, {"min_health_score": 0, "max_response_time": 5000})] == ["1.1.1.1:80", "2.2.2.2:80"]
+    assert [result.proxy for result in tool.refilter_history(columns, {"min_health_score": 70})] == ["1.1.1.1:80"]
+
+
+def test_refilter_entry_point_writes_output_and_sink(tool, workdir):
+    path = write_history(workdir, tool, [tool.ProxyResult("1.1.1.1:80", "1.1.1.1", "US", 40, {"anonymity": "Elite"}, 0)])
+    sink = []
+
+    class Sink:
+        def write(self, proxy, result=None):
+            sink.append(proxy)
+
+    results = tool.run_history_refilter(str(path), {"output_file": "refiltered.txt"}, result_sink=Sink())
+
+    assert [result.proxy for result in results] == sink == ["1.1.1.1:80"]
+    assert (workdir / "refiltered.txt").read_text().startswith("1.1.1.1:80")
+    assert json.loads(path.read_text().splitlines()[0])["status"] == "live"
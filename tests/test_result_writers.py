@@ -0,0 +1,52 @@
+import io
+import json
+import time
+
+
+def test_streaming_writer_flushes_without_further_writes(tool, workdir):
+    path = workdir / "live.txt"
+    writer = tool.StreamingResultWriter(str(path), mode="w", flush_every=1000, flush_interval=0.2)
+    try:
+        writer.write_line("1.2.3.4:80 | 10ms")
+        deadline = time.time() + 3
+        while time.time() < deadline and not (path.exists() and path.read_text()):
+            time.sleep(0.05)
+        assert path.read_text() == "1.2.3.4:80 | 10ms\n"
+    finally:
+        writer.close()
+    assert writer not in tool.result_flusher.writers
+
+
+def test_ndjson_writer_flushes_on_interval_and_close(tool):
+    stream = io.StringIO()
+    writer = tool.NdjsonResultWriter(stream, include_dead=True, flush_every=1000, flush_interval=0.2)
+    writer.write("1.2.3.4:80", tool.ProxyResult("1.2.3.4:80", "1.2.3.4", "US", 10, None, 90))
+    deadline = time.time() + 3
+    while time.time() < deadline and not stream.getvalue():
+        time.sleep(0.05)
+    assert json.loads(stream.getvalue())["status"] == "live"
+
+    writer.write("5.6.7.8:80")
+    writer.close()
+    assert [json.loads(line)["status"] for line in stream.getvalue().splitlines()] == ["live", "dead"]
+
+
+def test_report_writer_streams_valid_json_and_csv(tool, workdir):
+    writer = tool.StreamingReportWriter(str(workdir / "out.txt"))
+    writer.write(tool.ProxyResult("socks5://1.2.3.4:1080", "1.2.3.4", "US", 120, None, 80))
+    writer.write(tool.ProxyResult("5.6.7.8:80", "5.6.7.8", "DE", 95, None, 70))
+    json_path, csv_path = writer.close({"total_checked": 2})
+
+    report = json.loads(open(json_path, encoding="utf-8").read())
+    assert [entry["proxy"] for entry in report["proxies"]] == ["socks5://1.2.3.4:1080", "5.6.7.8:80"]
+    assert report["summary"] == {"total_checked": 2}
+    assert report["performance_metrics"]["response_times"] == [120, 95]
+    assert report["performance_metrics"]["proxy_types"]["socks5"] == 1
+    lines = open(csv_path, encoding="utf-8").read().splitlines()
+    assert lines[0].startswith("Proxy,IP,Country")
+    assert lines[2] == "5.6.7.8:80,5.6.7.8,DE,Unknown,95,70,Unknown,Unknown"
+
+
+def test_empty_report_leaves_no_files(tool, workdir):
+    assert tool.StreamingReportWriter(str(workdir / "out.txt")).close({}) is None
+    assert not list(workdir.glob("out_report_*"))
@@ -0,0 +1,43 @@
+def test_process_shard_count(tool):
+    assert tool.get_process_shard_count({}) == 1
+    assert tool.get_process_shard_count({"process_shards": 3}) == 3
+    assert tool.get_process_shard_count({"process_shards": "bad"}) == 1
+    assert tool.get_process_shard_count({"process_shards": 0}) >= 1
+
+
+def test_sharded_results_cover_every_proxy(tool, echo_server, closed_port, workdir):
+    live = [f"127.0.0.1:{echo_server}", f"http://127.0.0.1:{echo_server}"]
+    dead = [f"127.0.0.1:{closed_port}"]
+    worker_settings = {
+        "mode": "basic",
+        "config": {"rate_limit_requests_per_second": 0},
+        "probe_mode": "first",
+        "test_urls": tool.get_ip_test_urls(["http://echo.invalid/json"]),
+        "max_concurrency": 4,
+        "shards": 2,
+    }
+
+    results = list(tool.iter_sharded_results(live + dead, 2, worker_settings))
+
+    by_proxy = {proxy: ip for proxy, ip, country, response_time in results}
+    assert sorted(by_proxy) == sorted(live + dead)
+    assert all(by_proxy[proxy] == "127.0.0.1" for proxy in live)
+    assert by_proxy[dead[0]] is None
+
+
+def test_sharded_results_accept_a_generator_and_prescreen(tool, echo_server, closed_port, workdir):
+    proxies = [f"127.0.0.1:{echo_server}", f"127.0.0.1:{closed_port}"] * 3
+    worker_settings = {
+        "mode": "rich",
+        "config": {"rate_limit_requests_per_second": 0, "enable_geolocation": False},
+        "probe_mode": "first",
+        "test_urls": tool.get_ip_test_urls(["http://echo.invalid/json"]),
+        "max_concurrency": 2,
+        "shards": 2,
+        "prescreen": {"timeout": 1, "concurrency": 4},
+    }
+
+    results = list(tool.iter_sharded_results((proxy for proxy in proxies), 2, worker_settings))
+
+    assert sorted(result.proxy for result in results) == sorted(proxies)
+    assert all(result.ip is None for result in results if result.proxy.endswith(f":{closed_port}"))
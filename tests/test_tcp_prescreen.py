@@ -0,0 +1,64 @@
+import asyncio
+
+
+def test_tcp_connect_check_detects_open_and_closed_ports(tool, echo_server, closed_port):
+    assert asyncio.run(tool.tcp_connect_check("127.0.0.1", echo_server, 1)) is True
+    assert asyncio.run(tool.tcp_connect_check("127.0.0.1", closed_port, 1)) is False
+
+
+def test_prescreen_splits_reachable_and_unreachable(tool, echo_server, closed_port):
+    dead = f"127.0.0.1:{closed_port}"
+    live = f"127.0.0.1:{echo_server}"
+    unreachable = []
+
+    async def collect():
+        return [proxy async for proxy in tool.iter_tcp_prescreen([live, dead, "not a proxy"], 1, on_unreachable=unreachable.append)]
+
+    reachable = asyncio.run(collect())
+
+    assert reachable == [live]
+    assert sorted(unreachable) == sorted([dead, "not a proxy"])
+
+
+def test_sync_prescreen_streams_from_a_generator(tool, echo_server, closed_port):
+    dead = f"127.0.0.1:{closed_port}"
+    live = f"127.0.0.1:{echo_server}"
+    unreachable = []
+    pulled = []
+
+    def source():
+        for proxy in [live, dead] * 50:
+            pulled.append(proxy)
+            yield proxy
+
+    reachable = tool.iter_tcp_prescreen_sync(source(), 1, 4, on_unreachable=unreachable.append, buffer_size=2)
+    first = next(reachable)
+    assert first == live
+    assert len(pulled) < 100
+    reachable.close()
+
+    assert list(tool.iter_tcp_prescreen_sync(source(), 1, 4, on_unreachable=unreachable.append)) == [live] * 50
+    assert unreachable.count(dead) >= 50
+
+
+def test_bounded_checks_pull_items_lazily(tool):
+    pulled = []
+
+    def source():
+        for item in range(1000):
+            pulled.append(item)
+            yield item
+
+    async def double(item):
+        await asyncio.sleep(0)
+        return item * 2
+
+    async def first_result():
+        checks = tool.iter_bounded_checks(source(), double, 8)
+        result = await checks.__anext__()
+        await checks.aclose()
+        return result
+
+    assert asyncio.run(first_result()) in range(0, 16, 2)
+    assert len(pulled) <= 9
+    assert sorted(asyncio.run(tool.run_bounded_checks(range(20), double, 3))) == list(range(0, 40, 2))
@@ -8,7 +8,8 @@ def check_and_install_dependencies():
         'colorama': 'colorama',
         'aiohttp': 'aiohttp',
         'rich': 'rich',
-        'psutil': 'psutil'
+        'psutil': 'psutil',
+        'socksio': 'socksio'
     }
     
     installed_packages = {pkg.key for pkg in pkg_resources.working_set}
@@ -19,37 +20,67 @@ def check_and_install_dependencies():
         console.print("[yellow]Installing missing dependencies...[/yellow]")
         for package in missing_packages:
             try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+                subprocess.check_call([sys.executable, "-m", "pip", "install", package], stdout=sys.stderr)
                 console.print(f"[green]Successfully installed {package}[/green]")
             except:
                 console.print(f"[red]Failed to install {package}[/red]")
                 sys.exit(1)
 
+HEADLESS_FLAGS = ("-i", "--input", "-s", "--source", "--resume", "--refilter")
+
+def is_headless_invocation(argv):
+    for arg in argv:
+        if arg == "--":
+            break
+        if arg.split("=", 1)[0] in HEADLESS_FLAGS:
+            return True
+        if not arg.startswith("--") and arg[:2] in ("-i", "-s"):
+            return True
+    return False
+
 # Check and install dependencies first
-console = Console()
+# Chế độ dòng lệnh dành stdout cho NDJSON, mọi thông báo phải sang stderr ngay từ đầu
+from rich.console import Console
+console = Console(stderr=__name__ == "__main__" and is_headless_invocation(sys.argv[1:]))
 console.print("[cyan]Checking dependencies...[/cyan]")
 check_and_install_dependencies()
 
 # Now import all required packages
 from concurrent.futures import ThreadPoolExecutor
+import argparse
 import asyncio
 import aiohttp
+import base64
+import bisect
 import colorama
+import csv
 import hashlib
+import heapq
 import httpx
+import io
+import ipaddress
 import json
 import math
+import multiprocessing
 import os
 import platform
 import psutil
+import queue
 import random
 import re
+import socket
+import sqlite3
 import threading
 import time
+from aiohttp import web
+from array import array
+from collections import OrderedDict, deque, namedtuple
 from colorama import Fore, Style
 from datetime import datetime, timedelta
 from rich.align import Align
 from rich.box import ROUNDED
+from rich.console import Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.progress import (
     Progress, 
@@ -63,6 +94,17 @@ from rich.table import Table
 from rich.text import Text
 from tkinter import Tk, filedialog
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 colorama.init(autoreset=True)
 
 def create_rainbow_text_animated(text, time_offset=0):
@@ -85,56 +127,171 @@ def create_gradient_border():
 def clear_screen():
     os.system('cls' if platform.system() == 'Windows' else 'clear')
 
+class ProxyStore:
+    def __init__(self, path, batch_size=500, commit_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.pending_writes = 0
+        self.last_commit = time.time()
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS proxies ("
+            "url TEXT PRIMARY KEY, last_check TEXT, status TEXT, data TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_proxies_last_check ON proxies(last_check)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_proxies_status ON proxies(status, last_check)")
+        self.conn.commit()
+
+    def row_values(self, record):
+        checks = record.get('checks') or []
+        status = checks[-1].get('result', {}).get('status') if checks else None
+        return record.get('last_check'), status, json.dumps(record, ensure_ascii=False)
+
+    def put(self, url, record):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO proxies (url, last_check, status, data) VALUES (?, ?, ?, ?)",
+                (url, *self.row_values(record))
+            )
+            self.mark_dirty()
+
+    def mark_dirty(self):
+        self.pending_writes += 1
+        if self.pending_writes >= self.batch_size or time.time() - self.last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+            self.last_commit = time.time()
+
+    def get(self, url, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM proxies WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __getitem__(self, url):
+        record = self.get(url)
+        if record is None:
+            raise KeyError(url)
+        return record
+
+    def __setitem__(self, url, record):
+        self.put(url, record)
+
+    def __delitem__(self, url):
+        with self.lock:
+            self.conn.execute("DELETE FROM proxies WHERE url = ?", (url,))
+            self.mark_dirty()
+
+    def __contains__(self, url):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM proxies WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM proxies").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT url FROM proxies")]
+
+    def items(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT url, data FROM proxies").fetchall()
+        return [(url, json.loads(data)) for url, data in rows]
+
+    def update(self, records):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO proxies (url, last_check, status, data) VALUES (?, ?, ?, ?)",
+                ((url, *self.row_values(record)) for url, record in records.items())
+            )
+            self.commit()
+
+    def find_urls(self, status=None, checked_after=None):
+        query = "SELECT url FROM proxies WHERE 1 = 1"
+        params = []
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if checked_after is not None:
+            query += " AND last_check > ?"
+            params.append(checked_after)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def delete_checked_before(self, cutoff):
+        with self.lock:
+            self.conn.execute("DELETE FROM proxies WHERE last_check IS NOT NULL AND last_check < ?", (cutoff,))
+            self.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
 class ProxyManager:
     def __init__(self):
         self.config = load_config()
-        self.proxies_db = {}
+        self.proxies_db = None
         self.load_database()
     
     def load_database(self):
-        db_path = os.path.join(get_current_directory(), 'proxy_db.json')
-        if os.path.exists(db_path):
+        db_path = os.path.join(get_current_directory(), 'proxy_db.sqlite3')
+        json_path = os.path.join(get_current_directory(), 'proxy_db.json')
+        self.proxies_db = ProxyStore(db_path)
+        if os.path.exists(json_path):
             try:
-                with open(db_path, 'r', encoding='utf-8') as f:
-                    self.proxies_db = json.load(f)
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    self.proxies_db.update(json.load(f))
+                os.replace(json_path, f"{json_path}.migrated")
             except:
-                self.proxies_db = {}
+                pass
     
     def save_database(self):
-        db_path = os.path.join(get_current_directory(), 'proxy_db.json')
         try:
-            with open(db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.proxies_db, f, indent=4)
+            self.proxies_db.commit()
             return True
         except:
             return False
     
     def add_proxy(self, proxy_url, info):
-        if proxy_url not in self.proxies_db:
-            self.proxies_db[proxy_url] = {
+        record = self.proxies_db.get(proxy_url)
+        if record is None:
+            record = {
                 'added': datetime.now().isoformat(),
                 'last_check': None,
                 'checks': []
             }
-        self.proxies_db[proxy_url].update(info)
-        self.save_database()
+        record.update(info)
+        self.proxies_db.put(proxy_url, record)
     
     def get_proxy_info(self, proxy_url):
         return self.proxies_db.get(proxy_url, {})
     
     def update_proxy_check(self, proxy_url, check_result):
-        if proxy_url in self.proxies_db:
-            self.proxies_db[proxy_url]['last_check'] = datetime.now().isoformat()
-            self.proxies_db[proxy_url]['checks'].append({
+        record = self.proxies_db.get(proxy_url)
+        if record is not None:
+            record['last_check'] = datetime.now().isoformat()
+            record['checks'].append({
                 'time': datetime.now().isoformat(),
                 'result': check_result
             })
-            if len(self.proxies_db[proxy_url]['checks']) > 10:
-                self.proxies_db[proxy_url]['checks'] = self.proxies_db[proxy_url]['checks'][-10:]
-            self.save_database()
+            if len(record['checks']) > 10:
+                record['checks'] = record['checks'][-10:]
+            self.proxies_db.put(proxy_url, record)
 
     def get_favorites(self):
-        return [p for p in self.proxies_db if p in self.config['favorite_proxies']]
+        return [p for p in self.config['favorite_proxies'] if p in self.proxies_db]
     
     def add_to_favorites(self, proxy_url):
         if proxy_url not in self.config['favorite_proxies']:
@@ -158,13 +315,7 @@ class ProxyManager:
 
     def cleanup_old_records(self, days=30):
         cutoff = datetime.now() - timedelta(days=days)
-        for proxy in list(self.proxies_db.keys()):
-            last_check = self.proxies_db[proxy].get('last_check')
-            if last_check:
-                last_check = datetime.fromisoformat(last_check)
-                if last_check < cutoff:
-                    del self.proxies_db[proxy]
-        self.save_database()
+        self.proxies_db.delete_checked_before(cutoff.isoformat())
 
 def center_text(text, width=80):
     return text.center(width)
@@ -265,10 +416,11 @@ class ProxyCollector:
             tasks.append(self.collect_from_source(source_name, url))
         
         results = await asyncio.gather(*tasks)
-        all_proxies = set()
+        index = ProxyDedupeIndex()
+        all_proxies = []
         for proxy_set in results:
-            all_proxies.update(proxy_set)
-        return list(all_proxies)
+            all_proxies.extend(index.filter(proxy_set or ()))
+        return all_proxies
 
 class ProxyChecker:
     def __init__(self, proxy_manager):
@@ -296,16 +448,7 @@ class ProxyChecker:
                 return {'url': proxy_url, 'status': 'failed', 'error': 'ping_failed'}
             
             result['latency'] = ping_result
-            protocols = []
-            
-            for protocol in ['http', 'https', 'socks4', 'socks5']:
-                try:
-                    proxy_config = {protocol: f'{protocol}://{proxy_url}'}
-                    async with httpx.AsyncClient(proxies=proxy_config, timeout=5) as client:
-                        await client.head('http://www.google.com')
-                        protocols.append(protocol)
-                except:
-                    continue
+            protocols = await detect_proxy_protocols(proxy_url, timeout=5)
             
             result['protocols'] = protocols
             if not protocols:
@@ -315,29 +458,19 @@ class ProxyChecker:
             test_urls = self.proxy_manager.config['test_urls'][:level_config['max_tests']]
             speeds = []
             
-            for test_url in test_urls:
-                try:
-                    proxy_config = {
-                        'http': f'http://{proxy_url}',
-                        'https': f'http://{proxy_url}'
-                    }
-                    
-                    start_time = time.time()
-                    async with httpx.AsyncClient(
-                        proxies=proxy_config,
-                        timeout=test_url['timeout'],
-                        verify=test_url['ssl'],
-                        http2=True,
-                        limits=httpx.Limits(max_connections=5)
-                    ) as client:
-                        response = await client.get(test_url['url'])
+            async with AsyncProxyClients(build_proxy_config(proxy_url)) as clients:
+                for test_url in test_urls:
+                    try:
+                        client = clients.get(test_url['ssl'])
+                        start_time = time.time()
+                        response = await client.get(test_url['url'], timeout=test_url['timeout'])
                         if response.status_code == 200:
                             download_time = time.time() - start_time
                             content_length = int(response.headers.get('content-length', len(response.content)))
                             speed_mbps = (content_length * 8 / 1_000_000) / download_time
                             speeds.append({'speed': speed_mbps, 'weight': test_url['weight']})
-                except:
-                    continue
+                    except:
+                        continue
             
             if speeds:
                 total_weight = sum(s['weight'] for s in speeds)
@@ -355,30 +488,30 @@ class ProxyChecker:
         self.proxy_manager.update_proxy_check(proxy_url, result)
         return result
     
-    async def check_proxies(self, proxy_list, level='normal'):
-        semaphore = asyncio.Semaphore(self.proxy_manager.config['max_threads'])
-        tasks = []
-        
-        async def bounded_check(proxy):
-            async with semaphore:
-                return await self.check_proxy(proxy, level)
-        
-        for proxy in proxy_list:
-            tasks.append(bounded_check(proxy))
+    async def check_proxies(self, proxy_list, level='normal', total=None):
+        max_threads = self.proxy_manager.config['max_threads']
+        if total is None:
+            total = len(proxy_list)
         
         results = []
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            TimeElapsedColumn()
-        ) as progress:
-            task = progress.add_task("[cyan]Đang kiểm tra proxy...", total=len(tasks))
-            for coro in asyncio.as_completed(tasks):
-                result = await coro
-                results.append(result)
-                progress.advance(task)
+        try:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                TimeElapsedColumn()
+            ) as progress:
+                task = progress.add_task("[cyan]Đang kiểm tra proxy...", total=total)
+
+                async def check_and_advance(proxy):
+                    result = await self.check_proxy(proxy, level)
+                    progress.advance(task)
+                    return result
+
+                results = await run_bounded_checks(proxy_list, check_and_advance, max_threads)
+        finally:
+            self.proxy_manager.save_database()
         
         return results
 
@@ -390,12 +523,10 @@ class ProxyRotator:
         self.update_working_proxies()
     
     def update_working_proxies(self):
-        self.working_proxies = [
-            proxy for proxy, info in self.proxy_manager.proxies_db.items()
-            if info.get('last_check') and 
-            datetime.fromisoformat(info['last_check']) > datetime.now() - timedelta(hours=1) and
-            info['checks'][-1]['result']['status'] == 'working'
-        ]
+        self.working_proxies = self.proxy_manager.proxies_db.find_urls(
+            status='working',
+            checked_after=(datetime.now() - timedelta(hours=1)).isoformat()
+        )
         random.shuffle(self.working_proxies)
     
     def get_next_proxy(self):
@@ -418,20 +549,7 @@ async def ping_host(host):
         return None
 
 async def check_proxy_protocols(proxy_url):
-    protocols = []
-    for protocol in ['http', 'https', 'socks4', 'socks5']:
-        try:
-            proxy_config = {
-                'http://': f'{protocol}://{proxy_url}',
-                'https://': f'{protocol}://{proxy_url}'
-            }
-            async with httpx.AsyncClient(proxies=proxy_config, timeout=5) as client:
-                response = await client.head('https://www.google.com')
-                if response.status_code == 200:
-                    protocols.append(protocol)
-        except:
-            continue
-    return protocols
+    return await detect_proxy_protocols(proxy_url, timeout=5)
 
 async def is_private_proxy(proxy_url):
     try:
@@ -529,12 +647,109 @@ def select_proxy_file():
     root.destroy()
     return file_path
 
+PROXY_SCHEME_CODES = {'http': 0, 'https': 1, 'socks4': 2, 'socks5': 3}
+
+def canonical_proxy_key(proxy):
+    record = get_proxy_record(proxy)
+    if record is None:
+        return proxy
+    scheme = PROXY_SCHEME_CODES[record.scheme]
+    if record.ip is None:
+        return (record.host, record.port, scheme)
+    ip_value = record.ip | (1 << 128) if record.host.startswith('[') else record.ip
+    return (ip_value << 24) | (record.port << 8) | scheme
+
+class ProxyDedupeIndex:
+    def __init__(self):
+        self.keys = set()
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def add(self, proxy):
+        key = canonical_proxy_key(proxy)
+        with self.lock:
+            if key in self.keys:
+                self.duplicates += 1
+                return False
+            self.keys.add(key)
+            return True
+
+    def __contains__(self, proxy):
+        return canonical_proxy_key(proxy) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def filter(self, proxies):
+        return (proxy for proxy in proxies if self.add(proxy))
+
+def normalize_proxy_line(line):
+    proxy = line.strip()
+    if not proxy or proxy.startswith('#'):
+        return None
+    proxy = proxy.split('|', 1)[0].strip()
+    if not proxy:
+        return None
+    proxy = proxy.split()[0]
+    if '://' in proxy:
+        scheme, rest = proxy.split('://', 1)
+        proxy = f"{scheme.lower()}://{rest}"
+    return proxy
+
+def iter_proxy_lines(lines, stats=None, index=None):
+    if index is None:
+        index = ProxyDedupeIndex()
+    if stats is not None:
+        stats.setdefault('total', 0)
+        stats.setdefault('unique', 0)
+        stats.setdefault('duplicates', 0)
+
+    for line in lines:
+        proxy = normalize_proxy_line(line)
+        if not proxy:
+            continue
+        proxy = ProxyLine(proxy, parse_proxy_record(proxy))
+        if stats is not None:
+            stats['total'] += 1
+        if not index.add(proxy):
+            if stats is not None:
+                stats['duplicates'] += 1
+            continue
+        if stats is not None:
+            stats['unique'] += 1
+        yield proxy
+
+def iter_proxy_file(filename, stats=None, index=None):
+    with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
+        yield from iter_proxy_lines(f, stats, index)
+
+def count_file_lines(filename, chunk_size=1 << 20):
+    count = 0
+    last_byte = b''
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    if last_byte and last_byte != b'\n':
+        count += 1
+    return count
+
 def validate_proxy_file(filename):
     try:
-        with open(filename, 'r') as f:
-            proxies = [line.strip() for line in f if line.strip()]
-        if proxies:
-            console.print(f"\n[green]✓ File hợp lệ! Tìm thấy {len(proxies)} proxy.[/green]")
+        stats = {}
+        valid = 0
+        for proxy in iter_proxy_file(filename, stats):
+            if proxy.record:
+                valid += 1
+        if valid:
+            console.print(f"\n[green]✓ File hợp lệ! Tìm thấy {valid:,} proxy hợp lệ.[/green]")
+            if stats['duplicates']:
+                console.print(f"[yellow]Bỏ qua {stats['duplicates']:,} proxy trùng lặp.[/yellow]")
+            if stats['unique'] > valid:
+                console.print(f"[yellow]Bỏ qua {stats['unique'] - valid:,} dòng không đúng định dạng proxy.[/yellow]")
             return True
         console.print(f"\n[red]✗ File không chứa proxy hợp lệ![/red]")
         return False
@@ -542,92 +757,86 @@ def validate_proxy_file(filename):
         console.print(f"\n[red]✗ Không thể đọc file![/red]")
         return False
 
-def validate_proxy_format(proxy):
-    auth_pattern = r'^([^:]+):([^@]+)@(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
-    basic_pattern = r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
+ProxyRecord = namedtuple('ProxyRecord', ['scheme', 'host', 'ip', 'port', 'auth'])
+
+IPV4_OCTET_PATTERN = r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+PROXY_LINE_PATTERN = re.compile(
+    r'(?:(https?|socks[45])://)?'
+    r'(?:([^:@/\s]+):([^@\s]+)@)?'
+    rf'(?:({IPV4_OCTET_PATTERN}(?:\.{IPV4_OCTET_PATTERN}){{3}})|\[([0-9A-Fa-f:.]+)\]|([A-Za-z0-9.-]+)):'
+    r'(\d{1,5})/?$',
+    re.IGNORECASE
+)
+HOSTNAME_LABEL_PATTERN = re.compile(r'[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?$')
+
+def parse_proxy_record(proxy_url):
+    match = PROXY_LINE_PATTERN.match(proxy_url.strip())
+    if match is None:
+        return None
+
+    scheme, user, password, ipv4, ipv6, host, port = match.groups()
+    port = int(port)
+    if port == 0 or port > 65535:
+        return None
 
-    auth_match = re.match(auth_pattern, proxy)
-    if auth_match:
-        ip_parts = auth_match.group(3).split('.')
-        port = int(auth_match.group(4))
+    if ipv4:
+        a, b, c, d = map(int, ipv4.split('.'))
+        ip = (a << 24) | (b << 16) | (c << 8) | d
+        host = ipv4
+    elif ipv6:
+        try:
+            ip = int(ipaddress.IPv6Address(ipv6))
+        except ValueError:
+            return None
+        host = f"[{ipv6.lower()}]"
     else:
-        basic_match = re.match(basic_pattern, proxy)
-        if not basic_match:
-            return False
-        ip_parts = basic_match.group(1).split('.')
-        port = int(basic_match.group(2))
+        if host.replace('.', '').isdigit() or len(host) > 253:
+            return None
+        if not all(HOSTNAME_LABEL_PATTERN.match(label) for label in host.split('.')):
+            return None
+        ip = None
+        host = host.lower()
 
-    for part in ip_parts:
-        if int(part) > 255:
-            return False
+    auth = (user, password) if user else None
+    return ProxyRecord(scheme.lower() if scheme else 'http', host, ip, port, auth)
 
-    if port > 65535:
-        return False
+class ProxyLine(str):
+    __slots__ = ('record',)
 
-    return True
+    def __new__(cls, proxy, record):
+        line = super().__new__(cls, proxy)
+        line.record = record
+        return line
+
+    def __reduce__(self):
+        return ProxyLine, (str(self), self.record)
+
+def get_proxy_record(proxy):
+    if isinstance(proxy, ProxyLine):
+        return proxy.record
+    return parse_proxy_record(proxy)
+
+def validate_proxy_format(proxy):
+    return get_proxy_record(proxy) is not None
 
 def parse_proxy_auth(proxy_url):
     if not proxy_url or not isinstance(proxy_url, str):
         return {'proxy': '', 'auth': None, 'has_auth': False, 'error': 'Invalid input'}
-        
-    try:
-        clean_url = proxy_url
-        original_protocol = None
-        for protocol in ['http://', 'https://', 'socks4://', 'socks5://']:
-            if clean_url.lower().startswith(protocol):
-                original_protocol = protocol
-                clean_url = clean_url[len(protocol):]
-                break
-        
-        auth_pattern = r'^([^:]+):([^@]+)@(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
-        auth_match = re.match(auth_pattern, clean_url)
-
-        if auth_match:
-            username = auth_match.group(1)
-            password = auth_match.group(2)
-            ip = auth_match.group(3)
-            port = auth_match.group(4)
-            
-            if not validate_ip(ip):
-                return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid IP address'}
-            if not validate_port(port):
-                return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid port'}
-                
-            return {
-                'proxy': f"{ip}:{port}",
-                'auth': (username, password),
-                'has_auth': True,
-                'ip': ip,
-                'port': port,
-                'protocol': original_protocol or 'http://',
-                'error': None
-            }
-            
-        basic_pattern = r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}):(\d{1,5})$'
-        basic_match = re.match(basic_pattern, clean_url)
-        if basic_match:
-            ip = basic_match.group(1)
-            port = basic_match.group(2)
-            
-            if not validate_ip(ip):
-                return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid IP address'}
-            if not validate_port(port):
-                return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid port'}
-                
-            return {
-                'proxy': f"{ip}:{port}",
-                'auth': None,
-                'has_auth': False,
-                'ip': ip,
-                'port': port,
-                'protocol': original_protocol or 'http://',
-                'error': None
-            }
-            
-    except (re.error, AttributeError) as e:
-        return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': f'Parsing error: {str(e)}'}
-        
-    return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid proxy format'}
+
+    record = get_proxy_record(proxy_url)
+    if record is None:
+        return {'proxy': proxy_url, 'auth': None, 'has_auth': False, 'error': 'Invalid proxy format'}
+
+    return {
+        'proxy': f"{record.host}:{record.port}",
+        'auth': record.auth,
+        'has_auth': record.auth is not None,
+        'ip': record.host.strip('[]'),
+        'port': str(record.port),
+        'protocol': f"{record.scheme}://",
+        'record': record,
+        'error': None
+    }
 
 def validate_ip(ip):
     try:
@@ -636,7 +845,7 @@ def validate_ip(ip):
         parts = ip.split('.')
         if len(parts) != 4:
             return False
-        return all(part.isdigit() and 0 <= int(part) <= 255 for part in parts)
+        return all(part.isdigit() and 0 <= int(part) <= 255 and (part == '0' or not part.startswith('0')) for part in parts)
     except (ValueError, AttributeError, TypeError):
         return False
 
@@ -716,35 +925,26 @@ async def test_proxy_security(proxy_url):
             'encryption': None
         }
         
-        if proxy_type == "https":
-            ssl_test_urls = [
-                "https://www.ssllabs.com/",
-                "https://www.cloudflare.com/ssl/",
-                "https://www.digicert.com/"
-            ]
-            
-            for url in ssl_test_urls:
-                try:
-                    async with httpx.AsyncClient(
-                        proxies={"https": proxy_url},
-                        timeout=10,
-                        verify=True,
-                        http2=True
-                    ) as client:
-                        response = await client.get(url)
+        async with async_proxy_client(build_proxy_config(proxy_url, proxy_info)) as client:
+            if proxy_type == "https":
+                ssl_test_urls = [
+                    "https://www.ssllabs.com/",
+                    "https://www.cloudflare.com/ssl/",
+                    "https://www.digicert.com/"
+                ]
+                
+                for url in ssl_test_urls:
+                    try:
+                        response = await client.get(url, timeout=10)
                         if response.status_code == 200:
                             security_results['ssl_verified'] = True
                             break
-                except:
-                    continue
-        
-        try:
-            headers_test_url = "https://httpbin.org/headers"
-            async with httpx.AsyncClient(
-                proxies={"http": proxy_url, "https": proxy_url},
-                timeout=10
-            ) as client:
-                response = await client.get(headers_test_url)
+                    except:
+                        continue
+            
+            try:
+                headers_test_url = "https://httpbin.org/headers"
+                response = await client.get(headers_test_url, timeout=10)
                 if response.status_code == 200:
                     headers = response.json().get('headers', {})
                     security_results['anonymous'] = not any(
@@ -755,8 +955,8 @@ async def test_proxy_security(proxy_url):
                             'X-Real-IP'
                         ]
                     )
-        except:
-            pass
+            except:
+                pass
             
         return True, security_results
     except:
@@ -776,15 +976,6 @@ async def test_proxy_speed(proxy_url, test_size_mb=1, timeout=30):
         if not proxy_info['proxy'] or proxy_info.get('error'):
             return 0, 0, {'error': proxy_info.get('error', 'Invalid proxy format')}
             
-        connectivity_url = 'http://www.google.com'
-        try:
-            async with httpx.AsyncClient(proxies={"http://": proxy_url}, timeout=5) as client:
-                response = await client.head(connectivity_url)
-                if response.status_code != 200:
-                    return 0, 0, {'error': 'Proxy không thể kết nối'}
-        except:
-            return 0, 0, {'error': 'Proxy không phản hồi'}
-            
         test_urls = [
             {
                 'url': 'https://speed.cloudflare.com/__down?bytes=1048576',
@@ -812,48 +1003,22 @@ async def test_proxy_speed(proxy_url, test_size_mb=1, timeout=30):
             }
         ]
         
-        proxy_type = detect_proxy_type(proxy_url)
-        proxy_config = {}
-        
-        if proxy_info['has_auth']:
-            auth_str = f"{proxy_info['auth'][0]}:{proxy_info['auth'][1]}@{proxy_info['proxy']}"
-            if proxy_type == "socks4":
-                proxy_config = {"socks4": f"socks4://{auth_str}"}
-            elif proxy_type == "socks5":
-                proxy_config = {"socks5": f"socks5://{auth_str}"}
-            else:
-                proxy_config = {
-                    "http": f"http://{auth_str}",
-                    "https": f"http://{auth_str}"
-                }
-        else:
-            if proxy_type == "socks4":
-                proxy_config = {"socks4": f"socks4://{proxy_info['proxy']}"}
-            elif proxy_type == "socks5":
-                proxy_config = {"socks5": f"socks5://{proxy_info['proxy']}"}
-            else:
-                proxy_config = {
-                    "http": f"http://{proxy_info['proxy']}",
-                    "https": f"http://{proxy_info['proxy']}"
-                }
-        
         test_urls.sort(key=lambda x: x['weight'], reverse=True)
         
-        for test_config in test_urls:
+        async with AsyncProxyClients(build_proxy_config(proxy_url, proxy_info)) as clients:
+            connectivity_url = 'http://www.google.com'
             try:
-                async with httpx.AsyncClient(
-                    proxies=proxy_config,
-                    timeout=test_config['timeout'],
-                    verify=test_config['ssl'],
-                    http2=True,
-                    limits=httpx.Limits(
-                        max_connections=5,
-                        max_keepalive_connections=5,
-                        keepalive_expiry=5.0
-                    )
-                ) as client:
+                response = await clients.get().head(connectivity_url, timeout=5)
+                if response.status_code != 200:
+                    return 0, 0, {'error': 'Proxy không thể kết nối'}
+            except:
+                return 0, 0, {'error': 'Proxy không phản hồi'}
+                
+            for test_config in test_urls:
+                try:
+                    client = clients.get(test_config['ssl'])
                     start_time = time.time()
-                    response = await client.get(test_config['url'])
+                    response = await client.get(test_config['url'], timeout=test_config['timeout'])
                     if response.status_code == 200:
                         download_time = time.time() - start_time
                         content_length = int(response.headers.get('content-length', len(response.content)))
@@ -870,11 +1035,11 @@ async def test_proxy_speed(proxy_url, test_size_mb=1, timeout=30):
                             avg_speed = sum(s['speed'] for s in speeds) / len(speeds)
                             if avg_speed > 10 or len(speeds) >= 5:
                                 break
-            except (httpx.RequestError, httpx.TimeoutException) as e:
-                continue
-            except Exception as e:
-                print(f"Lỗi trong quá trình kiểm tra tốc độ: {str(e)}")
-                continue
+                except (httpx.RequestError, httpx.TimeoutException) as e:
+                    continue
+                except Exception as e:
+                    console.print(f"Lỗi trong quá trình kiểm tra tốc độ: {str(e)}", style="red", markup=False)
+                    continue
                 
         if speeds:
             weighted_speed = sum(s['speed'] * s['weight'] for s in speeds) / total_weight
@@ -887,49 +1052,237 @@ async def test_proxy_speed(proxy_url, test_size_mb=1, timeout=30):
     except Exception as e:
         return 0, 0
 
+PROXY_CLIENT_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
+
+def build_proxy_mounts(proxy_config, verify=True, http2=True, async_mode=False):
+    transport_class = httpx.AsyncHTTPTransport if async_mode else httpx.HTTPTransport
+    transports = {}
+    mounts = {}
+    for pattern, proxy_url in proxy_config.items():
+        if proxy_url not in transports:
+            transports[proxy_url] = transport_class(
+                proxy=proxy_url,
+                verify=verify,
+                http2=http2 and HTTP2_AVAILABLE,
+                limits=PROXY_CLIENT_LIMITS
+            )
+        mounts[pattern] = transports[proxy_url]
+    return mounts
+
+def proxy_client(proxy_config, verify=True, http2=True):
+    return httpx.Client(mounts=build_proxy_mounts(proxy_config, verify, http2))
+
+def async_proxy_client(proxy_config, verify=True, http2=True):
+    return httpx.AsyncClient(mounts=build_proxy_mounts(proxy_config, verify, http2, async_mode=True))
+
+class AsyncProxyClients:
+    def __init__(self, proxy_config, http2=True):
+        self.proxy_config = proxy_config
+        self.http2 = http2
+        self.clients = {}
+
+    def get(self, verify=True):
+        client = self.clients.get(verify)
+        if client is None:
+            client = self.clients[verify] = async_proxy_client(self.proxy_config, verify, self.http2)
+        return client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        clients = list(self.clients.values())
+        self.clients.clear()
+        for client in clients:
+            await client.aclose()
+        return False
+
 class RateLimiter:
     def __init__(self, max_requests_per_second=10, burst_size=None):
         self.max_requests = max_requests_per_second
         self.burst_size = burst_size or max_requests_per_second * 2
-        self.requests = []
+        self.tokens = float(self.burst_size)
+        self.updated = time.monotonic()
         self.lock = threading.Lock()
-        self.last_reset = time.time()
         self.total_requests = 0
-        self.window_start = time.time()
-        
-    def reset_if_needed(self):
-        now = time.time()
-        if now - self.window_start >= 60:
-            self.total_requests = 0
-            self.window_start = now
-            
-    def wait_if_needed(self):
+
+    def set_rate(self, max_requests_per_second, burst_size=None):
         with self.lock:
-            now = time.time()
-            self.reset_if_needed()
-            
-            self.requests = [req_time for req_time in self.requests if now - req_time < 1.0]
-            
-            if len(self.requests) >= self.burst_size:
-                sleep_time = 1.0 - (now - self.requests[0])
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    now = time.time()
-                    self.requests = [req_time for req_time in self.requests if now - req_time < 1.0]
-            
-            if len(self.requests) >= self.max_requests:
-                sleep_time = 1.0 - (now - self.requests[-self.max_requests])
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    now = time.time()
-            
-            self.requests.append(now)
+            self.max_requests = max_requests_per_second
+            self.burst_size = burst_size or max_requests_per_second * 2
+            self.tokens = min(self.tokens, float(self.burst_size))
+            self.updated = time.monotonic()
+
+    def reserve(self, tokens=1):
+        if self.max_requests <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst_size, self.tokens + (now - self.updated) * self.max_requests)
+            self.updated = now
+            self.tokens -= tokens
             self.total_requests += 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.max_requests
+
+    def wait_if_needed(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_if_needed_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
 rate_limiter = RateLimiter(max_requests_per_second=15)
 
-def test_proxy_enhanced(proxy_url, max_retries=3, rate_limiter=None):
-    test_urls = [
+RATE_LIMIT_HEADERS = (
+    "retry-after", "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset",
+    "ratelimit-limit", "ratelimit-remaining", "ratelimit-reset", "x-rl", "x-ttl"
+)
+
+def is_origin_rate_limit(status_code, headers):
+    if status_code != 429 or not headers:
+        return False
+    names = {name.lower() for name in headers.keys()}
+    return any(name in names for name in RATE_LIMIT_HEADERS)
+
+class HostRateLimiter:
+    def __init__(self, requests_per_second=0, host_limits=None, max_backoff=60.0, max_proxy_entries=10000):
+        self.requests_per_second = requests_per_second
+        self.host_limits = host_limits or {}
+        self.max_backoff = max_backoff
+        self.max_proxy_entries = max_proxy_entries
+        self.limiters = {}
+        self.backoff = {}
+        self.blocked_until = {}
+        self.proxy_backoff = OrderedDict()
+        self.lock = threading.Lock()
+
+    def configure(self, config, shares=1):
+        shares = max(1, shares)
+        with self.lock:
+            self.requests_per_second = float(config.get("host_rate_limit_per_second", 10) or 0) / shares
+            self.host_limits = {
+                host: float(rate or 0) / shares
+                for host, rate in (config.get("host_rate_limits", {}) or {}).items()
+            }
+            self.max_backoff = float(config.get("host_max_backoff", 60))
+            self.limiters.clear()
+
+    def host_for(self, url):
+        try:
+            return httpx.URL(url).host
+        except Exception:
+            return url
+
+    def get_limiter(self, host):
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            with self.lock:
+                limiter = self.limiters.get(host)
+                if limiter is None:
+                    rate = float(self.host_limits.get(host, self.requests_per_second) or 0)
+                    limiter = RateLimiter(max_requests_per_second=rate) if rate > 0 else False
+                    self.limiters[host] = limiter
+        return limiter
+
+    def has_budget(self, host):
+        limiter = self.get_limiter(host)
+        if not limiter:
+            return True
+        with limiter.lock:
+            elapsed = time.monotonic() - limiter.updated
+            return limiter.tokens + elapsed * limiter.max_requests >= 1
+
+    def blocked_until_for(self, host, proxy=None):
+        until = self.blocked_until.get(host, 0)
+        if proxy is not None:
+            entry = self.proxy_backoff.get((proxy, host))
+            if entry:
+                until = max(until, entry[1])
+        return until
+
+    def is_blocked(self, host, now=None, proxy=None):
+        return self.blocked_until_for(host, proxy) > (now or time.monotonic())
+
+    def prioritize(self, test_urls, proxy=None):
+        now = time.monotonic()
+        hosts = [self.host_for(test_config["url"]) for test_config in test_urls]
+        available = [
+            (not self.has_budget(host), test_config)
+            for host, test_config in zip(hosts, test_urls)
+            if not self.is_blocked(host, now, proxy)
+        ]
+        if not available:
+            return sorted(test_urls, key=lambda test_config: self.blocked_until_for(self.host_for(test_config["url"]), proxy))
+        available.sort(key=lambda item: item[0])
+        return [test_config for _, test_config in available]
+
+    def wait(self, url):
+        limiter = self.get_limiter(self.host_for(url))
+        if limiter:
+            limiter.wait_if_needed()
+
+    async def wait_async(self, url):
+        limiter = self.get_limiter(self.host_for(url))
+        if limiter:
+            await limiter.wait_if_needed_async()
+
+    def next_delay(self, previous, headers):
+        delay = min(self.max_backoff, max(1.0, previous * 2))
+        if headers:
+            for name in ("Retry-After", "X-Ttl"):
+                try:
+                    return min(self.max_backoff, max(delay, float(headers.get(name))))
+                except (TypeError, ValueError):
+                    continue
+        return delay
+
+    def record_response(self, url, status_code, headers=None, proxy=None):
+        host = self.host_for(url)
+        if status_code in (429, 403):
+            with self.lock:
+                if is_origin_rate_limit(status_code, headers) or proxy is None:
+                    delay = self.next_delay(self.backoff.get(host, 0), headers)
+                    self.backoff[host] = delay
+                    self.blocked_until[host] = time.monotonic() + delay
+                else:
+                    key = (proxy, host)
+                    entry = self.proxy_backoff.pop(key, None)
+                    delay = self.next_delay(entry[0] if entry else 0, headers)
+                    self.proxy_backoff[key] = (delay, time.monotonic() + delay)
+                    while len(self.proxy_backoff) > self.max_proxy_entries:
+                        self.proxy_backoff.popitem(last=False)
+        elif status_code == 200 and (host in self.backoff or self.proxy_backoff):
+            with self.lock:
+                self.backoff.pop(host, None)
+                self.blocked_until.pop(host, None)
+                self.proxy_backoff.pop((proxy, host), None)
+
+host_rate_limiter = HostRateLimiter()
+
+def configure_rate_limits(config, shares=1):
+    rate = float(config.get("rate_limit_requests_per_second", 15) or 0)
+    rate_limiter.set_rate(rate / max(1, shares))
+    host_rate_limiter.configure(config, shares)
+
+def get_ip_test_urls(custom_urls=None):
+    if custom_urls:
+        return [
+            {
+                "url": url,
+                "ip_key": "ip",
+                "country_key": None,
+                "timeout": 5,
+                "weight": 3
+            }
+            for url in custom_urls
+        ]
+
+    return [
         {
             "url": "http://ip-api.com/json",
             "ip_key": "query",
@@ -967,123 +1320,430 @@ def test_proxy_enhanced(proxy_url, max_retries=3, rate_limiter=None):
         }
     ]
 
-    proxy_info = parse_proxy_auth(proxy_url)
+def build_proxy_config(proxy_url, proxy_info=None):
+    if proxy_info is None:
+        proxy_info = parse_proxy_auth(proxy_url)
     proxy = proxy_info['proxy']
     auth = proxy_info['auth']
 
-    if proxy_url.startswith("socks4://"):
-        proxy_config = {"socks4": f"socks4://{proxy}"}
-    elif proxy_url.startswith("socks5://"):
-        proxy_config = {"socks5": f"socks5://{proxy}"}
+    proxy_type = detect_proxy_type(proxy_url)
+    scheme = proxy_type if proxy_type in ("socks4", "socks5") else "http"
+    if auth:
+        proxy = f"{auth[0]}:{auth[1]}@{proxy}"
+    return {"http://": f"{scheme}://{proxy}", "https://": f"{scheme}://{proxy}"}
+
+def parse_ip_test_response(test_config, data, response_time):
+    ip = data.get(test_config["ip_key"], "")
+    if not ip:
+        return None
+
+    country = "?"
+    if test_config["country_key"] and test_config["country_key"] in data:
+        country = data[test_config["country_key"]]
     else:
-        if auth:
-            proxy_with_auth = f"http://{auth[0]}:{auth[1]}@{proxy}"
-            proxy_config = {"http": proxy_with_auth, "https": proxy_with_auth}
-        else:
-            proxy_config = {"http": f"http://{proxy}", "https": f"http://{proxy}"}
+        country = get_country_from_ip(ip)
+
+    return {
+        'ip': ip,
+        'country': country,
+        'response_time': response_time,
+        'weight': test_config['weight']
+    }
+
+def probe_ip_endpoint(proxy_url, client, test_config, attempt, is_last_attempt, rate_limiter=None):
+    try:
+        if rate_limiter:
+            rate_limiter.wait_if_needed()
+        host_rate_limiter.wait(test_config["url"])
+        start_time = time.time()
+
+        base_timeout = test_config["timeout"]
+        timeout = get_dynamic_timeout(proxy_url, base_timeout, attempt)
+
+        response = client.get(test_config["url"], timeout=timeout)
+
+        response_time = int((time.time() - start_time) * 1000)
+        host_rate_limiter.record_response(test_config["url"], response.status_code, response.headers, proxy_url)
+
+        if response.status_code == 200:
+            return parse_ip_test_response(test_config, response.json(), response_time)
+
+    except httpx.RequestError as e:
+        if "timeout" not in str(e).lower() and is_last_attempt:
+            console.print(f"Lỗi kết nối: {e}", style="red", markup=False)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code not in [429, 403] and is_last_attempt:
+            console.print(f"Lỗi HTTP {e.response.status_code}", style="red", markup=False)
+    except Exception as e:
+        if is_last_attempt:
+            console.print(f"Lỗi không xác định: {e}", style="red", markup=False)
+    return None
+
+def test_proxy_enhanced(proxy_url, max_retries=3, rate_limiter=None, probe_mode="best", test_urls=None):
+    test_urls = test_urls or get_ip_test_urls()
+    proxy_config = build_proxy_config(proxy_url)
     results = []
-    for attempt in range(max_retries + 1):
-        weighted_urls = sorted(test_urls, key=lambda x: x["weight"] * random.uniform(0.8, 1.2), reverse=True)
+    with proxy_client(proxy_config) as client:
+        for attempt in range(max_retries + 1):
+            weighted_urls = host_rate_limiter.prioritize(
+                sorted(test_urls, key=lambda x: x["weight"] * random.uniform(0.8, 1.2), reverse=True),
+                proxy_url
+            )
         
-        for test_config in weighted_urls:
-            try:
-                if rate_limiter:
-                    rate_limiter.wait_if_needed()
-                start_time = time.time()
+            for test_config in weighted_urls:
+                parsed = probe_ip_endpoint(proxy_url, client, test_config, attempt, attempt == max_retries, rate_limiter)
+                if parsed:
+                    if probe_mode in ("first", "race"):
+                        return parsed['ip'], parsed['country'], parsed['response_time']
+                    results.append(parsed)
+
+            if results:
+                best_result = max(results, key=lambda x: (x['weight'], -x['response_time']))
+                return best_result['ip'], best_result['country'], best_result['response_time']
+
+            if attempt < max_retries:
+                base_delay = 0.3 * (2 ** attempt)
+                jitter = random.uniform(0, 0.2)
+                time.sleep(base_delay + jitter)
 
-                base_timeout = test_config["timeout"]
-                timeout = get_dynamic_timeout(proxy_url, base_timeout, attempt)
+    return None, None, 0
 
-                limits = httpx.Limits(
-                    max_connections=200,
-                    max_keepalive_connections=50,
-                    keepalive_expiry=30.0)
-                
-                retry_strategy = httpx.RetryTransport(
-                    max_retries=2,
-                    max_backoff=10,
-                    allowed_methods={"GET"}
-                )
+async def probe_ip_endpoint_async(proxy_url, client, test_config, attempt, is_last_attempt, rate_limiter=None):
+    try:
+        if rate_limiter:
+            await rate_limiter.wait_if_needed_async()
+        await host_rate_limiter.wait_async(test_config["url"])
+        start_time = time.time()
 
-                with httpx.Client(
-                    proxies=proxy_config,
-                    timeout=timeout,
-                    limits=limits,
-                    transport=retry_strategy,
-                    http2=True,
-                    verify=True
-                ) as client:
-                    response = client.get(test_config["url"])
+        base_timeout = test_config["timeout"]
+        timeout = get_dynamic_timeout(proxy_url, base_timeout, attempt)
 
-                response_time = int((time.time() - start_time) * 1000)
+        response = await client.get(test_config["url"], timeout=timeout)
 
-                if response.status_code == 200:
-                    data = response.json()
-                    ip = data.get(test_config["ip_key"], "")
-
-                    country = "?"
-                    if test_config["country_key"] and test_config["country_key"] in data:
-                        country = data[test_config["country_key"]]
-                    elif ip:
-                        country = get_country_from_ip(ip)
-
-                    if ip:
-                        results.append({
-                            'ip': ip,
-                            'country': country,
-                            'response_time': response_time,
-                            'weight': test_config['weight']
-                        })
+        response_time = int((time.time() - start_time) * 1000)
+        host_rate_limiter.record_response(test_config["url"], response.status_code, response.headers, proxy_url)
 
-            except httpx.RequestError as e:
-                if "timeout" in str(e).lower():
-                    continue
-                if attempt == max_retries:
-                    print(f"Lỗi kết nối: {e}")
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code in [429, 403]:
-                    continue
-                if attempt == max_retries:
-                    print(f"Lỗi HTTP {e.response.status_code}")
-            except Exception as e:
-                if attempt == max_retries:
-                    print(f"Lỗi không xác định: {e}")
-                continue
+        if response.status_code == 200:
+            return parse_ip_test_response(test_config, response.json(), response_time)
 
-        if results:
-            sorted_results = sorted(results, key=lambda x: (x['weight'], -x['response_time']), reverse=True)
-            best_result = sorted_results[0]
-            return best_result['ip'], best_result['country'], best_result['response_time']
+    except httpx.RequestError as e:
+        if "timeout" not in str(e).lower() and is_last_attempt:
+            console.print(f"Lỗi kết nối: {e}", style="red", markup=False)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code not in [429, 403] and is_last_attempt:
+            console.print(f"Lỗi HTTP {e.response.status_code}", style="red", markup=False)
+    except Exception as e:
+        if is_last_attempt:
+            console.print(f"Lỗi không xác định: {e}", style="red", markup=False)
+    return None
+
+async def race_ip_endpoints_async(proxy_url, client, test_urls, attempt, is_last_attempt, rate_limiter=None):
+    tasks = [
+        asyncio.ensure_future(probe_ip_endpoint_async(proxy_url, client, test_config, attempt, is_last_attempt, rate_limiter))
+        for test_config in test_urls
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            parsed = await next_done
+            if parsed:
+                return parsed
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return None
+
+async def test_proxy_enhanced_async(proxy_url, max_retries=3, rate_limiter=None, probe_mode="best", test_urls=None):
+    test_urls = test_urls or get_ip_test_urls()
+    proxy_config = build_proxy_config(proxy_url)
+    results = []
+    async with async_proxy_client(proxy_config) as client:
+        for attempt in range(max_retries + 1):
+            weighted_urls = host_rate_limiter.prioritize(
+                sorted(test_urls, key=lambda x: x["weight"] * random.uniform(0.8, 1.2), reverse=True),
+                proxy_url
+            )
+            is_last_attempt = attempt == max_retries
 
-        if attempt < max_retries:
-            base_delay = 0.3 * (2 ** attempt)
-            jitter = random.uniform(0, 0.2)
-            time.sleep(base_delay + jitter)
+            if probe_mode == "race":
+                parsed = await race_ip_endpoints_async(proxy_url, client, weighted_urls, attempt, is_last_attempt, rate_limiter)
+                if parsed:
+                    return parsed['ip'], parsed['country'], parsed['response_time']
+            else:
+                for test_config in weighted_urls:
+                    parsed = await probe_ip_endpoint_async(proxy_url, client, test_config, attempt, is_last_attempt, rate_limiter)
+                    if parsed:
+                        if probe_mode == "first":
+                            return parsed['ip'], parsed['country'], parsed['response_time']
+                        results.append(parsed)
+
+            if results:
+                best_result = max(results, key=lambda x: (x['weight'], -x['response_time']))
+                return best_result['ip'], best_result['country'], best_result['response_time']
+
+            if attempt < max_retries:
+                base_delay = 0.3 * (2 ** attempt)
+                jitter = random.uniform(0, 0.2)
+                await asyncio.sleep(base_delay + jitter)
 
     return None, None, 0
 
-def detect_proxy_type(proxy_url):
-    if not proxy_url or not isinstance(proxy_url, str):
-        return "http"
-    
-    proxy_lower = proxy_url.lower()
-    proxy_types = {
-        "socks5://": "socks5",
-        "socks4://": "socks4",
-        "https://": "https"
-    }
-    
-    for prefix, ptype in proxy_types.items():
-        if proxy_lower.startswith(prefix):
-            return ptype
-            
-    return "http"
+async def iter_bounded_checks(items, worker, max_concurrency):
+    pending = set()
+    max_concurrency = max(1, int(max_concurrency))
+    is_async = hasattr(items, '__aiter__')
+    iterator = items.__aiter__() if is_async else iter(items)
+    exhausted = False
 
-def get_dynamic_timeout(proxy_url, base_timeout=5, attempt=0):
-    proxy_type = detect_proxy_type(proxy_url)
-    if proxy_type == "socks4":
-        multiplier = 1.5
-    elif proxy_type == "socks5":
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    item = await iterator.__anext__() if is_async else next(iterator)
+                except (StopIteration, StopAsyncIteration):
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(worker(item)))
+
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if is_async and hasattr(iterator, 'aclose'):
+            await iterator.aclose()
+
+async def run_bounded_checks(items, worker, max_concurrency):
+    return [result async for result in iter_bounded_checks(items, worker, max_concurrency)]
+
+def bounded_thread_map(executor, fn, items, window):
+    pending = deque()
+    window = max(1, int(window))
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def run_coroutine_sync(coro):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def runner():
+        try:
+            result['value'] = asyncio.run(coro)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result.get('value')
+
+def raise_open_file_limit(wanted):
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            new_soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (new_soft, hard))
+            return new_soft
+        return soft
+    except Exception:
+        return None
+
+async def tcp_connect_check(host, port, timeout=1.5):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+    except Exception:
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True
+
+async def iter_tcp_prescreen(proxies, timeout=1.5, max_concurrency=2000, on_unreachable=None):
+    file_limit = raise_open_file_limit(max_concurrency + 256)
+    if file_limit:
+        max_concurrency = max(1, min(max_concurrency, file_limit - 256))
+
+    async def screen(proxy):
+        proxy_info = parse_proxy_auth(proxy)
+        if proxy_info.get('error'):
+            return proxy, False
+        return proxy, await tcp_connect_check(proxy_info['ip'], proxy_info['port'], timeout)
+
+    async for proxy, is_open in iter_bounded_checks(proxies, screen, max_concurrency):
+        if is_open:
+            yield proxy
+        elif on_unreachable:
+            on_unreachable(proxy)
+
+def iter_tcp_prescreen_sync(proxies, timeout=1.5, max_concurrency=2000, on_unreachable=None, buffer_size=1000):
+    output = queue.Queue(maxsize=buffer_size)
+    finished = object()
+    cancelled = threading.Event()
+    errors = []
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                output.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def pump():
+        loop = asyncio.get_running_loop()
+        async for proxy in iter_tcp_prescreen(proxies, timeout, max_concurrency, on_unreachable):
+            try:
+                output.put_nowait(proxy)
+            except queue.Full:
+                if not await loop.run_in_executor(None, put, proxy):
+                    break
+
+    def run():
+        try:
+            asyncio.run(pump())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(finished)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = output.get()
+            if item is finished:
+                break
+            yield item
+    finally:
+        cancelled.set()
+        thread.join(timeout=5)
+
+    if errors:
+        raise errors[0]
+
+PROXY_PROTOCOLS = ('http', 'https', 'socks4', 'socks5')
+
+FINGERPRINT_TARGET = ('1.1.1.1', 443)
+
+async def exchange_proxy_bytes(host, port, payload, reply_size, timeout):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+    except Exception:
+        return None
+    try:
+        writer.write(payload)
+        await writer.drain()
+        return await asyncio.wait_for(reader.read(reply_size), timeout)
+    except Exception:
+        return None
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+async def fingerprint_socks5(host, port, timeout, auth=None):
+    greeting = b'\x05\x02\x00\x02' if auth else b'\x05\x01\x00'
+    reply = await exchange_proxy_bytes(host, port, greeting, 2, timeout)
+    if reply and len(reply) == 2 and reply[0] == 0x05 and reply[1] in (0x00, 0x02, 0xFF):
+        return ['socks5']
+    return []
+
+async def fingerprint_socks4(host, port, timeout, auth=None):
+    target_ip, target_port = FINGERPRINT_TARGET
+    user_id = auth[0].encode() if auth else b''
+    request = b'\x04\x01' + target_port.to_bytes(2, 'big') + bytes(int(part) for part in target_ip.split('.')) + user_id + b'\x00'
+    reply = await exchange_proxy_bytes(host, port, request, 8, timeout)
+    if reply and len(reply) >= 2 and reply[0] == 0x00 and 0x5A <= reply[1] <= 0x5D:
+        return ['socks4']
+    return []
+
+async def fingerprint_http_connect(host, port, timeout, auth=None):
+    target = f"{FINGERPRINT_TARGET[0]}:{FINGERPRINT_TARGET[1]}"
+    headers = f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n"
+    if auth:
+        token = base64.b64encode(f"{auth[0]}:{auth[1]}".encode()).decode()
+        headers += f"Proxy-Authorization: Basic {token}\r\n"
+    reply = await exchange_proxy_bytes(host, port, (headers + "\r\n").encode(), 1024, timeout)
+    if not reply or not reply.startswith(b'HTTP/'):
+        return []
+    lines = reply.split(b'\r\n\r\n', 1)[0].split(b'\r\n')
+    status_line = lines[0].split()
+    status = status_line[1] if len(status_line) >= 2 else b''
+    if status == b'200':
+        return ['http', 'https']
+    header_names = [line.split(b':', 1)[0].strip().lower() for line in lines[1:] if b':' in line]
+    if status == b'407' or any(name.startswith(b'proxy-') or name == b'via' for name in header_names):
+        return ['http']
+    return []
+
+async def detect_proxy_protocols(proxy_url, timeout=5):
+    proxy_info = parse_proxy_auth(proxy_url)
+    if proxy_info.get('error'):
+        return []
+
+    fingerprints = {
+        'http': fingerprint_http_connect,
+        'https': fingerprint_http_connect,
+        'socks4': fingerprint_socks4,
+        'socks5': fingerprint_socks5
+    }
+    explicit_type = detect_proxy_type(proxy_url)
+    if '://' in proxy_url and explicit_type in fingerprints:
+        probes = {fingerprints[explicit_type]}
+    else:
+        probes = set(fingerprints.values())
+
+    results = await asyncio.gather(
+        *(probe(proxy_info['ip'], proxy_info['port'], timeout, proxy_info['auth']) for probe in probes),
+        return_exceptions=True
+    )
+    detected = {protocol for result in results if isinstance(result, list) for protocol in result}
+    return [protocol for protocol in PROXY_PROTOCOLS if protocol in detected]
+
+def detect_proxy_type(proxy_url):
+    if not proxy_url or not isinstance(proxy_url, str):
+        return "http"
+    
+    proxy_lower = proxy_url.lower()
+    proxy_types = {
+        "socks5://": "socks5",
+        "socks4://": "socks4",
+        "https://": "https"
+    }
+    
+    for prefix, ptype in proxy_types.items():
+        if proxy_lower.startswith(prefix):
+            return ptype
+            
+    return "http"
+
+def get_dynamic_timeout(proxy_url, base_timeout=5, attempt=0):
+    proxy_type = detect_proxy_type(proxy_url)
+    if proxy_type == "socks4":
+        multiplier = 1.5
+    elif proxy_type == "socks5":
         multiplier = 1.4
     elif proxy_type == "https":
         multiplier = 1.3
@@ -1105,8 +1765,221 @@ def get_dynamic_timeout(proxy_url, base_timeout=5, attempt=0):
     final_timeout = base_timeout * multiplier * region_multiplier * attempt_multiplier
     return min(final_timeout, 20)
 
+HOSTING_ORG_KEYWORDS = (
+    "hosting", "cloud", "datacenter", "data center", "server", "vps", "colo",
+    "amazon", "aws", "google", "microsoft", "azure", "digitalocean", "ovh",
+    "hetzner", "linode", "vultr", "alibaba", "tencent", "oracle", "leaseweb", "contabo"
+)
+
+def ip_to_key(ip):
+    try:
+        address = ipaddress.ip_address(ip.strip())
+    except ValueError:
+        if ip.strip().isdigit():
+            return int(ip.strip())
+        return None
+    if address.version == 6:
+        return int(address) | (1 << 128)
+    return int(address)
+
+GEOIP_COLUMN_NAMES = {
+    "country": ("country_code", "countrycode", "country_iso_code", "iso_code", "cc", "country"),
+    "asn": ("asn", "as_number", "autonomous_system_number"),
+    "org": ("org", "organization", "as_description", "autonomous_system_organization", "isp", "as_name"),
+    "city": ("city", "city_name")
+}
+CONTINENT_CODES = ("AF", "AN", "AS", "EU", "NA", "OC", "SA")
+IPV4_ARRAY_TYPE = 'I' if array('I').itemsize >= 4 else 'L'
+
+def split_ip_key(key):
+    if key >= 1 << 128:
+        return 6, key - (1 << 128)
+    if key < 1 << 32:
+        return 4, key
+    return 6, key
+
+def parse_asn(field):
+    field = field.upper()
+    if field.startswith("AS"):
+        field = field[2:]
+    return int(field) if field.isdigit() else None
+
+def is_country_code(field):
+    return len(field) == 2 and field.isalpha()
+
+class OfflineGeoIP:
+    def __init__(self):
+        self.path = None
+        self.offline_only = False
+        self.tables = {}
+        self.records = []
+        self.mmdb_reader = None
+        self.lock = threading.Lock()
+
+    def configure(self, config):
+        path = config.get("geoip_database", "")
+        self.offline_only = bool(config.get("geoip_offline_only", False))
+        if path and not os.path.isabs(path):
+            path = os.path.join(get_current_directory(), path)
+        with self.lock:
+            if path != self.path:
+                self.load(path)
+
+    @property
+    def loaded(self):
+        return any(table[0] for table in self.tables.values()) or self.mmdb_reader is not None
+
+    def new_table(self, version):
+        if version == 4:
+            return array(IPV4_ARRAY_TYPE), array(IPV4_ARRAY_TYPE), array('I')
+        return [], [], array('I')
+
+    def header_layout(self, fields):
+        names = [field.lower().replace(" ", "_") for field in fields[2:]]
+        layout = {}
+        for column, aliases in GEOIP_COLUMN_NAMES.items():
+            for alias in aliases:
+                if alias in names:
+                    layout[column] = names.index(alias)
+                    break
+        return layout or None
+
+    def guess_layout(self, fields):
+        if len(fields) >= 4 and fields[0].upper() in CONTINENT_CODES and is_country_code(fields[1]):
+            return {"country": 1, "city": 3}
+        if fields and parse_asn(fields[0]) is not None:
+            if len(fields) >= 3 and (is_country_code(fields[1]) or fields[1] == "None"):
+                return {"asn": 0, "country": 1, "org": 2}
+            return {"asn": 0, "org": 1}
+        if fields and is_country_code(fields[0]):
+            return {"country": 0}
+        return {}
+
+    def load(self, path):
+        self.path = path
+        self.tables = {}
+        self.records = []
+        self.mmdb_reader = None
+        if not path or not os.path.exists(path):
+            return
+
+        if path.lower().endswith(".mmdb"):
+            try:
+                import maxminddb
+                self.mmdb_reader = maxminddb.open_database(path)
+            except Exception as e:
+                console.print(f"[yellow]⚠️ Không mở được GeoIP MMDB {path}: {str(e)}[/yellow]")
+            return
+
+        tables = {4: self.new_table(4), 6: self.new_table(6)}
+        unsorted = set()
+        record_index = {}
+        layout = None
+        count = 0
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                fields = [field.strip().strip('"') for field in re.split(r'[\t,]', line.rstrip("\r\n"))]
+                if len(fields) < 3:
+                    continue
+                start, end = ip_to_key(fields[0]), ip_to_key(fields[1])
+                if start is None or end is None:
+                    if layout is None:
+                        layout = self.header_layout(fields)
+                    continue
+                if layout is None:
+                    layout = self.guess_layout(fields[2:])
+                record = self.parse_record_fields(fields[2:], layout)
+                record_id = record_index.get(record)
+                if record_id is None:
+                    record_id = record_index[record] = len(self.records)
+                    self.records.append(record)
+
+                version, start = split_ip_key(start)
+                end = split_ip_key(end)[1]
+                starts, ends, record_ids = tables[version]
+                if starts and start < starts[-1]:
+                    unsorted.add(version)
+                starts.append(start)
+                ends.append(end)
+                record_ids.append(record_id)
+                count += 1
+
+        for version in unsorted:
+            starts, ends, record_ids = tables[version]
+            order = sorted(range(len(starts)), key=starts.__getitem__)
+            sorted_table = self.new_table(version)
+            for column, values in zip(sorted_table, (starts, ends, record_ids)):
+                column.extend(values[i] for i in order)
+            tables[version] = sorted_table
+        self.tables = tables
+        console.print(f"[green]🗺️ Đã nạp {count:,} dải IP từ GeoIP offline: {path}[/green]")
+
+    def parse_record_fields(self, fields, layout=None):
+        if layout is None:
+            layout = self.guess_layout(fields)
+
+        def column(name):
+            index = layout.get(name)
+            return fields[index] if index is not None and index < len(fields) else ""
+
+        country_code = column("country").upper()
+        if not is_country_code(country_code):
+            country_code = "??"
+        asn = parse_asn(column("asn"))
+        org = column("org") or "Unknown"
+        city = column("city") or "Unknown"
+        is_hosting = any(keyword in org.lower() for keyword in HOSTING_ORG_KEYWORDS)
+        return (country_code, asn, org, is_hosting, city)
+
+    def build_geolocation(self, country_code, asn, org, is_hosting, city="Unknown"):
+        return {
+            "country": country_code,
+            "country_code": country_code,
+            "city": city,
+            "region": "Unknown",
+            "isp": org,
+            "org": org,
+            "asn": asn,
+            "is_proxy": False,
+            "is_hosting": is_hosting,
+            "anonymity": "Unknown"
+        }
+
+    def lookup(self, ip):
+        if self.mmdb_reader is not None:
+            try:
+                data = self.mmdb_reader.get(ip) or {}
+            except Exception:
+                return None
+            country_code = (data.get("country") or data.get("registered_country") or {}).get("iso_code")
+            asn = data.get("autonomous_system_number")
+            org = data.get("autonomous_system_organization") or "Unknown"
+            city = ((data.get("city") or {}).get("names") or {}).get("en") or "Unknown"
+            if not country_code and asn is None:
+                return None
+            is_hosting = any(keyword in org.lower() for keyword in HOSTING_ORG_KEYWORDS)
+            return self.build_geolocation(country_code or "??", asn, org, is_hosting, city)
+
+        key = ip_to_key(ip)
+        if key is None:
+            return None
+        version, key = split_ip_key(key)
+        table = self.tables.get(version)
+        if not table or not table[0]:
+            return None
+        starts, ends, record_ids = table
+        index = bisect.bisect_right(starts, key) - 1
+        if index < 0 or key > ends[index]:
+            return None
+        return self.build_geolocation(*self.records[record_ids[index]])
+
+offline_geoip = OfflineGeoIP()
+
 def get_country_from_ip(ip):
     try:
+        if offline_geoip.loaded:
+            geo_data = offline_geoip.lookup(ip)
+            return geo_data["country_code"] if geo_data else "?"
         if ip.startswith("8.8.") or ip.startswith("1.1."):
             return "US"
         elif ip.startswith("208.67."):
@@ -1116,12 +1989,12 @@ def get_country_from_ip(ip):
     except:
         return "?"
 
-def test_proxy(proxy_url):
+def test_proxy(proxy_url, probe_mode="best", test_urls=None, max_retries=2):
     if not proxy_url:
         return None, None, None
         
     try:
-        ip, country, response_time = test_proxy_enhanced(proxy_url)
+        ip, country, response_time = test_proxy_enhanced(proxy_url, max_retries=max_retries, probe_mode=probe_mode, test_urls=test_urls)
         if ip and response_time >= 0:
             return ip, country or "?", response_time
     except Exception:
@@ -1129,7 +2002,346 @@ def test_proxy(proxy_url):
         
     return None, None, None
 
+async def test_proxy_async(proxy_url, limiter=None, probe_mode="best", test_urls=None, max_retries=2):
+    if not proxy_url:
+        return None, None, None
+
+    try:
+        ip, country, response_time = await test_proxy_enhanced_async(proxy_url, max_retries=max_retries, rate_limiter=limiter, probe_mode=probe_mode, test_urls=test_urls)
+        if ip and response_time >= 0:
+            return ip, country or "?", response_time
+    except Exception:
+        pass
+
+    return None, None, None
+
+def create_ip_echo_app():
+    async def echo(request):
+        ip = request.remote or ""
+        return web.json_response({
+            "ip": ip,
+            "origin": ip,
+            "headers": dict(request.headers)
+        })
+
+    app = web.Application()
+    for path in ['/', '/json', '/ip', '/headers']:
+        app.router.add_get(path, echo)
+    return app
+
+async def start_ip_echo_server(host="0.0.0.0", port=8899):
+    runner = web.AppRunner(create_ip_echo_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+def run_ip_echo_server(host="0.0.0.0", port=8899):
+    console.print(f"[green]🛰️ IP echo server đang chạy tại http://{host}:{port}/json[/green]")
+    console.print(f"[yellow]Thêm URL này vào 'ip_echo_urls' trong config.json để checker sử dụng[/yellow]")
+    web.run_app(create_ip_echo_app(), host=host, port=port, print=None)
+
+class GeolocationCache:
+    def __init__(self, path=None, ttl=86400, max_entries=50000, by_subnet=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.by_subnet = by_subnet
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, config):
+        path = config.get("geo_cache_file", "geo_cache.json")
+        self.path = os.path.join(get_current_directory(), path) if path else None
+        self.ttl = float(config.get("geo_cache_ttl_hours", 24)) * 3600
+        self.max_entries = int(config.get("geo_cache_max_entries", 50000))
+        self.by_subnet = bool(config.get("geo_cache_by_subnet", False))
+        if not self.loaded:
+            self.load()
+
+    def subnet_key(self, ip):
+        parts = ip.split('.')
+        if len(parts) != 4:
+            return None
+        return '.'.join(parts[:3]) + '.0/24'
+
+    def read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in data.items() if entry[0] > now}
+
+    def load(self):
+        entries = self.read_file()
+        with self.lock:
+            for key, (expires_at, data) in sorted(entries.items(), key=lambda item: item[1][0]):
+                self.entries[key] = (expires_at, data)
+            self.evict_locked()
+            self.loaded = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        entries = self.read_file()
+        with self.lock:
+            entries.update(self.entries)
+            self.dirty = False
+        if len(entries) > self.max_entries:
+            entries = dict(sorted(entries.items(), key=lambda item: item[1][0])[-self.max_entries:])
+        try:
+            write_lines_atomic(self.path, [json.dumps(entries, ensure_ascii=False)])
+        except OSError:
+            pass
+
+    def evict_locked(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_locked(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, ip):
+        with self.lock:
+            data = self.get_locked(ip)
+            if data is None and self.by_subnet:
+                subnet = self.subnet_key(ip)
+                if subnet:
+                    data = self.get_locked(subnet)
+            return data
+
+    def put(self, ip, data):
+        expires_at = time.time() + self.ttl
+        with self.lock:
+            self.entries[ip] = (expires_at, data)
+            self.entries.move_to_end(ip)
+            subnet = self.subnet_key(ip) if self.by_subnet else None
+            if subnet:
+                self.entries[subnet] = (expires_at, data)
+                self.entries.move_to_end(subnet)
+            self.evict_locked()
+            self.dirty = True
+
+    async def lookup(self, ip, fetch):
+        if not self.loaded:
+            self.load()
+
+        data = self.get(ip)
+        if data is not None:
+            self.hits += 1
+            return dict(data)
+
+        future = self.inflight.get(ip)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.hits += 1
+            try:
+                data = await asyncio.shield(future)
+                return dict(data) if data else data
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            except Exception:
+                pass
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[ip] = future
+        try:
+            data = await fetch(ip)
+            if data and data.get("country_code", "??") != "??":
+                self.put(ip, data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            if self.inflight.get(ip) is future:
+                del self.inflight[ip]
+
+geolocation_cache = GeolocationCache()
+
+class GeolocationBatcher:
+    def __init__(self, batch_size=100, window=0.2, enabled=True, requests_per_minute=15, fallback_concurrency=4, max_retries=2):
+        self.batch_size = batch_size
+        self.window = window
+        self.enabled = enabled
+        self.limiter = RateLimiter(requests_per_minute / 60, burst_size=1)
+        self.fallback_concurrency = fallback_concurrency
+        self.max_retries = max_retries
+        self.hold_until = 0.0
+        self.loop = None
+        self.pending = {}
+        self.flush_task = None
+        self.tasks = set()
+        self.fallback_semaphore = None
+
+    def configure(self, config):
+        self.enabled = config.get("enable_geo_batching", True)
+        self.batch_size = max(1, min(100, int(config.get("geo_batch_size", 100))))
+        self.window = float(config.get("geo_batch_window", 0.2))
+        self.limiter.set_rate(float(config.get("geo_batch_requests_per_minute", 15)) / 60, burst_size=1)
+        self.fallback_concurrency = max(1, int(config.get("geo_fallback_concurrency", 4)))
+        self.max_retries = max(0, int(config.get("geo_batch_max_retries", 2)))
+
+    async def fetch(self, ip):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.pending = {}
+            self.flush_task = None
+            self.tasks = set()
+            self.fallback_semaphore = asyncio.Semaphore(self.fallback_concurrency)
+
+        future = self.pending.get(ip)
+        if future is None:
+            future = loop.create_future()
+            self.pending[ip] = future
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            elif self.flush_task is None:
+                self.flush_task = loop.create_task(self.flush_later())
+        return await asyncio.shield(future)
+
+    async def flush_later(self):
+        await asyncio.sleep(self.window)
+        self.flush_task = None
+        self.flush()
+
+    def flush(self):
+        if self.flush_task is not None and self.flush_task is not asyncio.current_task():
+            self.flush_task.cancel()
+            self.flush_task = None
+        batch, self.pending = self.pending, {}
+        if batch:
+            task = self.loop.create_task(self.resolve_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def wait_turn(self):
+        while True:
+            delay = self.hold_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        await self.limiter.wait_if_needed_async()
+
+    def hold(self, seconds):
+        self.hold_until = max(self.hold_until, time.monotonic() + min(seconds, 120))
+
+    async def fetch_fallback(self, ip):
+        async with self.fallback_semaphore:
+            return await fetch_detailed_geolocation(ip)
+
+    async def resolve_batch(self, batch):
+        results = None
+        rate_limited = False
+        for _ in range(self.max_retries + 1):
+            await self.wait_turn()
+            try:
+                results, hold = await fetch_geolocation_batch(list(batch))
+            except Exception:
+                results, hold = {}, 0
+            if hold:
+                self.hold(hold)
+            rate_limited = results is None
+            if not rate_limited:
+                break
+
+        results = results or {}
+        missing = [ip for ip in batch if ip not in results]
+        if missing and not rate_limited:
+            fallbacks = await asyncio.gather(*(self.fetch_fallback(ip) for ip in missing), return_exceptions=True)
+            for ip, data in zip(missing, fallbacks):
+                results[ip] = None if isinstance(data, BaseException) else data
+
+        for ip, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(ip))
+
+geolocation_batcher = GeolocationBatcher()
+
+def configure_geolocation(config):
+    offline_geoip.configure(config)
+    geolocation_cache.configure(config)
+    geolocation_batcher.configure(config)
+
 async def get_detailed_geolocation(ip):
+    if offline_geoip.loaded:
+        geo_data = offline_geoip.lookup(ip)
+        if geo_data or offline_geoip.offline_only:
+            return geo_data or offline_geoip.build_geolocation("??", None, "Unknown", False)
+    elif offline_geoip.offline_only:
+        return None
+    if geolocation_batcher.enabled:
+        return await geolocation_cache.lookup(ip, geolocation_batcher.fetch)
+    return await geolocation_cache.lookup(ip, fetch_detailed_geolocation)
+
+def parse_ip_api_geolocation(data):
+    return {
+        "country": data.get("country", "Unknown"),
+        "country_code": data.get("countryCode", "??"),
+        "city": data.get("city", "Unknown"),
+        "region": data.get("region", "Unknown"),
+        "isp": data.get("isp", "Unknown"),
+        "org": data.get("org", "Unknown"),
+        "is_proxy": data.get("proxy", False),
+        "is_hosting": data.get("hosting", False),
+        "anonymity": "Elite" if not data.get("proxy", False) else "Transparent"
+    }
+
+def geolocation_batch_hold(response):
+    if response.status_code == 429:
+        for header in ("X-Ttl", "Retry-After"):
+            try:
+                return max(1.0, float(response.headers[header]))
+            except (KeyError, ValueError):
+                continue
+        return 60.0
+    try:
+        if int(response.headers["X-Rl"]) <= 0:
+            return max(1.0, float(response.headers.get("X-Ttl", 60)))
+    except (KeyError, ValueError):
+        pass
+    return 0
+
+GEOLOCATION_BATCH_URL = "http://ip-api.com/batch?fields=status,query,country,countryCode,region,city,isp,org,as,proxy,hosting"
+
+async def fetch_geolocation_batch(ips, url=GEOLOCATION_BATCH_URL):
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.post(url, json=ips)
+        hold = geolocation_batch_hold(response)
+        if response.status_code == 429:
+            return None, hold
+        if response.status_code != 200:
+            return {}, hold
+        return {
+            data["query"]: parse_ip_api_geolocation(data)
+            for data in response.json()
+            if data.get("status") == "success" and data.get("query")
+        }, hold
+
+async def fetch_detailed_geolocation(ip):
     try:
         apis = [
             f"http://ip-api.com/json/{ip}?fields=status,country,countryCode,region,city,isp,org,as,proxy,hosting",
@@ -1144,17 +2356,7 @@ async def get_detailed_geolocation(ip):
                         data = response.json()
 
                         if "status" in data and data["status"] == "success":
-                            return {
-                                "country": data.get("country", "Unknown"),
-                                "country_code": data.get("countryCode", "??"),
-                                "city": data.get("city", "Unknown"),
-                                "region": data.get("region", "Unknown"),
-                                "isp": data.get("isp", "Unknown"),
-                                "org": data.get("org", "Unknown"),
-                                "is_proxy": data.get("proxy", False),
-                                "is_hosting": data.get("hosting", False),
-                                "anonymity": "Elite" if not data.get("proxy", False) else "Transparent"
-                            }
+                            return parse_ip_api_geolocation(data)
 
                         elif "country_name" in data:
                             return {
@@ -1238,6 +2440,92 @@ def calculate_proxy_health_score(response_time, speed_mbps=0, anonymity="Unknown
     
     return max(0, min(100, total_score))
 
+ANONYMITY_CODES = {"Elite": 0, "Anonymous": 1, "Transparent": 2, "Unknown": 3}
+ANONYMITY_NAMES = ("Elite", "Anonymous", "Transparent", "Unknown")
+ANONYMITY_CODE_SCORES = (25, 20, 10, 15, 15)
+ANONYMITY_OTHER_CODE = 4
+ANONYMITY_NO_MATCH_CODE = -2
+PROXY_TYPE_NAMES = ("http", "https", "socks4", "socks5")
+
+class ResultColumns:
+    def __init__(self):
+        self.results = []
+        self.response_times = []
+        self.speeds = []
+        self.error_rates = []
+        self.anonymity_codes = []
+        self.hosting_flags = []
+        self.has_geo = []
+        self.countries = []
+        self.proxy_types = []
+        self.health_scores = []
+
+    @classmethod
+    def from_results(cls, results):
+        columns = cls()
+        for result in results:
+            columns.append(result)
+        return columns
+
+    def __len__(self):
+        return len(self.results)
+
+    def append(self, result, speed_mbps=0):
+        proxy, ip, country, response_time, geo_data, health_score = result
+        anonymity = geo_data.get("anonymity") if geo_data else None
+        self.results.append(result)
+        self.response_times.append(response_time if ip else float('inf'))
+        self.speeds.append(geo_data.get("speed_mbps", speed_mbps) if geo_data else speed_mbps)
+        self.error_rates.append(geo_data.get("error_rate", -1) if geo_data else -1)
+        self.anonymity_codes.append(ANONYMITY_CODES.get(anonymity, ANONYMITY_OTHER_CODE) if anonymity is not None else -1)
+        self.hosting_flags.append(bool(geo_data.get("is_hosting", False)) if geo_data else False)
+        self.has_geo.append((2 if "speed_mbps" in geo_data else 1) if geo_data else 0)
+        self.countries.append(country if ip else None)
+        self.proxy_types.append(PROXY_TYPE_NAMES.index(detect_proxy_type(proxy)))
+        self.health_scores.append(health_score or 0)
+
+    def rescore(self):
+        self.health_scores = [int(score) for score in calculate_health_scores_batch(
+            self.response_times, self.speeds, self.anonymity_codes, self.hosting_flags
+        )]
+        for result, score in zip(self.results, self.health_scores):
+            if isinstance(result, ProxyResult):
+                result.health_score = score
+        return self.health_scores
+
+    def select(self, mask):
+        return [result for result, keep in zip(self.results, mask) if keep]
+
+def calculate_health_scores_batch(response_times, speeds, anonymity_codes, hosting_flags, error_counts=None):
+    if np is not None:
+        rt = np.asarray(response_times, dtype=np.float64)
+        sp = np.asarray(speeds, dtype=np.float64)
+        codes = np.asarray(anonymity_codes, dtype=np.int64)
+        time_score = np.select(
+            [rt <= 50, rt <= 100, rt <= 300, rt <= 500, rt <= 1000],
+            [50, 40, 30, 20, 10],
+            default=np.maximum(0, 10 - np.floor_divide(np.nan_to_num(rt - 1000, posinf=1e12), 500))
+        )
+        speed_score = np.select([sp >= 10, sp >= 5, sp >= 1, sp >= 0.5], [30, 25, 15, 10], default=5)
+        anonymity_score = np.asarray(ANONYMITY_CODE_SCORES)[np.where(codes < 0, 3, codes)]
+        stability_score = np.where((rt < 1000) & (sp > 1), 10, 0)
+        hosting_penalty = np.where(np.asarray(hosting_flags, dtype=bool), 15, 0)
+        error_penalty = 0 if error_counts is None else np.minimum(20, np.asarray(error_counts) * 5)
+        total = time_score + speed_score + anonymity_score + 15 + stability_score - hosting_penalty - error_penalty
+        return np.clip(total, 0, 100).astype(np.int64)
+
+    error_counts = error_counts or [0] * len(response_times)
+    return [
+        calculate_proxy_health_score(
+            response_time if response_time != float('inf') else 10 ** 9,
+            speed,
+            ANONYMITY_NAMES[code] if 0 <= code < len(ANONYMITY_NAMES) else "Unknown",
+            is_hosting,
+            errors
+        )
+        for response_time, speed, code, is_hosting, errors in zip(response_times, speeds, anonymity_codes, hosting_flags, error_counts)
+    ]
+
 def analyze_proxy_stability(proxy_history):
     if not proxy_history:
         return 0
@@ -1410,60 +2698,220 @@ def adaptive_thread_adjustment(current_threads, performance_data):
 
     return current_threads
 
+GEO_FIELDS = ('country', 'country_code', 'city', 'region', 'isp', 'org', 'asn', 'is_proxy', 'is_hosting', 'anonymity')
+
+def intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class ProxyGeo:
+    __slots__ = GEO_FIELDS
+
+    def __init__(self, data):
+        for field in GEO_FIELDS:
+            setattr(self, field, intern_value(data.get(field)))
+
+    def __contains__(self, key):
+        return key in GEO_FIELDS and getattr(self, key) is not None
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in GEO_FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in GEO_FIELDS if getattr(self, field) is not None}
+
+    def __reduce__(self):
+        return (ProxyGeo, (self.to_dict(),))
+
+class ProxyResult:
+    __slots__ = ('proxy', 'ip', 'country', 'response_time', 'geo_data', 'health_score')
+
+    def __init__(self, proxy, ip, country, response_time, geo_data=None, health_score=0):
+        self.proxy = proxy
+        self.ip = ip
+        self.country = intern_value(country)
+        self.response_time = response_time
+        self.geo_data = ProxyGeo(geo_data) if isinstance(geo_data, dict) else geo_data
+        self.health_score = health_score
+
+    def __iter__(self):
+        return iter((self.proxy, self.ip, self.country, self.response_time, self.geo_data, self.health_score))
+
+    def __len__(self):
+        return 6
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+    def __reduce__(self):
+        return (ProxyResult, tuple(self))
+
+    def __repr__(self):
+        return f"ProxyResult({self.proxy!r}, {self.ip!r}, {self.country!r}, {self.response_time!r}, health_score={self.health_score!r})"
+
+def geo_to_dict(value):
+    if isinstance(value, ProxyGeo):
+        return value.to_dict()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def build_filter_settings(config):
+    return {
+        "max_response_time": config.get("max_response_time", 1000),
+        "min_health_score": config.get("min_health_score", 60),
+        "blacklist_countries": set(config.get("blacklist_countries", [])),
+        "preferred_countries": set(config.get("preferred_countries", [])),
+        "preferred_codes": {ANONYMITY_CODES.get(name, ANONYMITY_NO_MATCH_CODE) for name in config.get("preferred_anonymity", [])},
+        "min_speed": config.get("min_speed_mbps", 0.5),
+        "max_error_rate": config.get("max_error_rate", 0.3),
+        "exclude_hosting": config.get("exclude_hosting", False),
+        "excluded_types": {index for index, name in enumerate(PROXY_TYPE_NAMES) if config.get(f"exclude_{name}", False)}
+    }
+
+def row_passes_filters(settings, country, response_time, health_score, has_geo, code, is_hosting, speed, error_rate, proxy_type):
+    if not country or response_time > settings["max_response_time"] or health_score < settings["min_health_score"]:
+        return False
+    if country in settings["blacklist_countries"]:
+        return False
+    if settings["preferred_countries"] and country not in settings["preferred_countries"]:
+        return False
+    if not has_geo:
+        return True
+    if settings["preferred_codes"] and code >= 0 and code not in settings["preferred_codes"]:
+        return False
+    if settings["exclude_hosting"] and is_hosting:
+        return False
+    if has_geo == 2 and speed < settings["min_speed"]:
+        return False
+    if error_rate > settings["max_error_rate"]:
+        return False
+    return proxy_type not in settings["excluded_types"]
+
+def result_passes_filters(result, settings):
+    proxy, ip, country, response_time, geo_data, health_score = result
+    if not ip:
+        return False
+    anonymity = geo_data.get("anonymity") if geo_data else None
+    return row_passes_filters(
+        settings, country, response_time, health_score,
+        (2 if "speed_mbps" in geo_data else 1) if geo_data else 0,
+        ANONYMITY_CODES.get(anonymity, ANONYMITY_OTHER_CODE) if anonymity is not None else -1,
+        bool(geo_data.get("is_hosting", False)) if geo_data else False,
+        geo_data.get("speed_mbps", 0) if geo_data else 0,
+        geo_data.get("error_rate", -1) if geo_data else -1,
+        PROXY_TYPE_NAMES.index(detect_proxy_type(proxy))
+    )
+
+def advanced_filter_mask(columns, settings):
+    if np is None:
+        return [
+            row_passes_filters(settings, *row)
+            for row in zip(
+                columns.countries, columns.response_times, columns.health_scores, columns.has_geo,
+                columns.anonymity_codes, columns.hosting_flags, columns.speeds, columns.error_rates, columns.proxy_types
+            )
+        ]
+
+    countries = np.asarray(columns.countries, dtype=object)
+    has_geo = np.asarray(columns.has_geo, dtype=np.int8)
+    codes = np.asarray(columns.anonymity_codes, dtype=np.int64)
+    geo = has_geo > 0
+
+    mask = np.fromiter((bool(country) for country in columns.countries), dtype=bool, count=len(columns))
+    mask &= np.asarray(columns.response_times, dtype=np.float64) <= settings["max_response_time"]
+    mask &= np.asarray(columns.health_scores, dtype=np.float64) >= settings["min_health_score"]
+    if settings["blacklist_countries"]:
+        mask &= ~np.isin(countries, list(settings["blacklist_countries"]))
+    if settings["preferred_countries"]:
+        mask &= np.isin(countries, list(settings["preferred_countries"]))
+    if settings["preferred_codes"]:
+        mask &= ~geo | (codes < 0) | np.isin(codes, list(settings["preferred_codes"]))
+    if settings["exclude_hosting"]:
+        mask &= ~geo | ~np.asarray(columns.hosting_flags, dtype=bool)
+    mask &= (has_geo < 2) | (np.asarray(columns.speeds, dtype=np.float64) >= settings["min_speed"])
+    mask &= ~geo | (np.asarray(columns.error_rates, dtype=np.float64) <= settings["max_error_rate"])
+    if settings["excluded_types"]:
+        mask &= ~geo | ~np.isin(np.asarray(columns.proxy_types), list(settings["excluded_types"]))
+    return mask
+
 def apply_advanced_filters(proxy_results, config):
-    filtered_results = []
-    
-    max_response_time = config.get("max_response_time", 1000)
-    min_health_score = config.get("min_health_score", 60)
-    blacklist_countries = set(config.get("blacklist_countries", []))
-    preferred_countries = set(config.get("preferred_countries", []))
-    preferred_anonymity = set(config.get("preferred_anonymity", []))
-    exclude_hosting = config.get("exclude_hosting", False)
-    min_speed = config.get("min_speed_mbps", 0.5)
-    max_error_rate = config.get("max_error_rate", 0.3)
-    
-    for result in proxy_results:
-        proxy, ip, country, response_time, geo_data, health_score = result
-        
-        if not ip or not country:
-            continue
-            
-        if response_time > max_response_time:
-            continue
-            
-        if health_score < min_health_score:
-            continue
-            
-        if country in blacklist_countries:
-            continue
-            
-        if preferred_countries and country not in preferred_countries:
-            continue
-            
-        if geo_data:
-            if "anonymity" in geo_data:
-                if preferred_anonymity and geo_data["anonymity"] not in preferred_anonymity:
-                    continue
-                    
-            if exclude_hosting and geo_data.get("is_hosting", False):
-                continue
-                
-            if "speed_mbps" in geo_data and geo_data["speed_mbps"] < min_speed:
+    settings = build_filter_settings(config)
+    columns = proxy_results if isinstance(proxy_results, ResultColumns) else ResultColumns.from_results(proxy_results)
+    return columns.select(advanced_filter_mask(columns, settings))
+
+def get_history_path(config):
+    path = config.get("history_file", "check_history.jsonl")
+    if path and not os.path.isabs(path):
+        path = os.path.join(get_current_directory(), path)
+    return path
+
+def open_history_writer(config):
+    path = get_history_path(config)
+    if not path:
+        return None
+    try:
+        return NdjsonResultWriter(open(path, 'a', encoding='utf-8'), close_stream=True)
+    except OSError:
+        return None
+
+def load_result_history(path):
+    latest = {}
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
                 continue
-                
-            if "error_rate" in geo_data and geo_data["error_rate"] > max_error_rate:
+            if not isinstance(record, dict) or record.get("status") != "live" or not record.get("proxy"):
                 continue
-                
-            proxy_type = detect_proxy_type(proxy)
-            if config.get(f"exclude_{proxy_type}", False):
-                continue
-        
-        filtered_results.append(result)
-    
-    return filtered_results
+            latest[record["proxy"]] = ProxyResult(
+                record["proxy"],
+                record.get("ip"),
+                record.get("country"),
+                record.get("response_time") or 0,
+                record.get("geo"),
+                record.get("health_score") or 0
+            )
+    columns = ResultColumns.from_results(latest.values())
+    columns.rescore()
+    return columns
+
+def refilter_history(columns, config):
+    results = apply_advanced_filters(columns, config)
+    results.sort(key=lambda result: (result.health_score, -result.response_time), reverse=True)
+    return results
+
+class TopKRanker:
+    def __init__(self, size=500, key=None):
+        self.size = max(1, int(size))
+        self.key = key or (lambda result: (result.health_score, -result.response_time))
+        self.heap = []
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def push(self, result):
+        key = self.key(result)
+        with self.lock:
+            self.counter += 1
+            entry = (key, -self.counter, result)
+            if len(self.heap) < self.size:
+                heapq.heappush(self.heap, entry)
+            elif entry[0] > self.heap[0][0]:
+                heapq.heapreplace(self.heap, entry)
 
-def sort_proxies_by_quality(proxy_results):
-    return sorted(proxy_results, key=lambda x: (-x[5], x[3]))
+    def __len__(self):
+        return len(self.heap)
+
+    def best(self, limit=None):
+        with self.lock:
+            entries = heapq.nlargest(limit or self.size, self.heap)
+        return [entry[2] for entry in entries]
 
 def analyze_proxy_quality_trend(proxy_history):
     if not proxy_history or len(proxy_history) < 2:
@@ -1503,6 +2951,25 @@ def analyze_proxy_quality_trend(proxy_history):
     
     return reliability_score, trend
 
+def get_performance_category(result):
+    proxy, ip, country, response_time, geo_data, health_score = result
+    
+    reliability_score = 0
+    trend = "stable"
+    
+    if hasattr(result, "history"):
+        reliability_score, trend = analyze_proxy_quality_trend(result.history)
+    
+    final_score = (health_score * 0.7 + reliability_score * 0.3)
+    
+    if final_score >= 80 and trend != "degrading":
+        return "premium"
+    elif final_score >= 60 or (trend == "improving" and final_score >= 50):
+        return "good"
+    elif final_score >= 40 or trend == "improving":
+        return "average"
+    return "poor"
+
 def categorize_proxies_by_performance(proxy_results):
     categories = {
         "premium": [],
@@ -1512,37 +2979,110 @@ def categorize_proxies_by_performance(proxy_results):
     }
     
     for result in proxy_results:
-        proxy, ip, country, response_time, geo_data, health_score = result
-        
-        reliability_score = 0
-        trend = "stable"
-        
-        if hasattr(result, "history"):
-            reliability_score, trend = analyze_proxy_quality_trend(result.history)
-        
-        final_score = (health_score * 0.7 + reliability_score * 0.3)
-        
-        if final_score >= 80 and trend != "degrading":
-            categories["premium"].append(result)
-        elif final_score >= 60 or (trend == "improving" and final_score >= 50):
-            categories["good"].append(result)
-        elif final_score >= 40 or trend == "improving":
-            categories["average"].append(result)
-        else:
-            categories["poor"].append(result)
+        categories[get_performance_category(result)].append(result)
     
     return categories
 
-class ProxyAnalyticsDashboard:
+class RunningStats:
     def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def push(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 2),
+            "stddev": round(self.stddev, 2),
+            "min": self.minimum,
+            "max": self.maximum
+        }
+
+class FixedHistogram:
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+        self.total = 0
+
+    def push(self, value):
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+        self.total += 1
+
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        target = self.total * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                low = self.edges[index - 1] if index > 0 else 0
+                if index >= len(self.edges):
+                    return low
+                return low + (self.edges[index] - low) * (target - seen) / count
+            seen += count
+        return self.edges[-1]
+
+    def buckets(self):
+        labels = [f"<{self.edges[0]}"]
+        labels += [f"{low}-{high}" for low, high in zip(self.edges, self.edges[1:])]
+        labels.append(f">={self.edges[-1]}")
+        return dict(zip(labels, self.counts))
+
+class TopKCounter:
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key):
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+        else:
+            smallest = min(counts, key=counts.get)
+            counts[key] = counts.pop(smallest) + 1
+
+    def most_common(self, limit=5):
+        return heapq.nlargest(limit, self.counts.items(), key=lambda item: item[1])
+
+LATENCY_BUCKETS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+HEALTH_BUCKETS = tuple(range(5, 101, 5))
+
+class ProxyAnalyticsDashboard:
+    def __init__(self, top_countries=32):
+        self.latency = RunningStats()
+        self.health = RunningStats()
+        self.latency_histogram = FixedHistogram(LATENCY_BUCKETS)
+        self.health_histogram = FixedHistogram(HEALTH_BUCKETS)
+        self.country_counter = TopKCounter(top_countries)
         self.stats = {
             "total_checked": 0,
             "live_proxies": 0,
             "dead_proxies": 0,
             "avg_response_time": 0,
-            "countries": {},
+            "countries": self.country_counter.counts,
             "anonymity_levels": {},
-            "health_scores": [],
             "start_time": time.time()
         }
 
@@ -1551,10 +3091,7 @@ class ProxyAnalyticsDashboard:
 
         if ip:
             self.stats["live_proxies"] += 1
-
-            if country not in self.stats["countries"]:
-                self.stats["countries"][country] = 0
-            self.stats["countries"][country] += 1
+            self.country_counter.add(country)
 
             if geo_data and "anonymity" in geo_data:
                 anonymity = geo_data["anonymity"]
@@ -1562,57 +3099,406 @@ class ProxyAnalyticsDashboard:
                     self.stats["anonymity_levels"][anonymity] = 0
                 self.stats["anonymity_levels"][anonymity] += 1
 
-            self.stats["health_scores"].append(health_score)
-
-            live_count = self.stats["live_proxies"]
-            current_avg = self.stats["avg_response_time"]
-            self.stats["avg_response_time"] = ((current_avg * (live_count - 1)) + response_time) / live_count
+            self.health.push(health_score or 0)
+            self.health_histogram.push(health_score or 0)
+            self.latency.push(response_time)
+            self.latency_histogram.push(response_time)
+            self.stats["avg_response_time"] = self.latency.mean
 
         else:
             self.stats["dead_proxies"] += 1
 
+    def latency_percentiles(self):
+        if not self.latency.count:
+            return {"p50": 0, "p95": 0, "p99": 0}
+        return {
+            f"p{p}": round(min(self.latency.maximum, max(self.latency.minimum, self.latency_histogram.percentile(p))))
+            for p in (50, 95, 99)
+        }
+
+    def summary(self):
+        summary = dict(self.stats)
+        summary["countries"] = dict(self.country_counter.most_common(len(self.country_counter.counts)))
+        summary["anonymity_levels"] = dict(self.stats["anonymity_levels"])
+        summary["response_time"] = dict(self.latency.to_dict(), **self.latency_percentiles())
+        summary["health_score"] = self.health.to_dict()
+        summary["response_time_histogram"] = self.latency_histogram.buckets()
+        summary["health_score_histogram"] = self.health_histogram.buckets()
+        return summary
+
     def get_live_stats_panel(self):
         elapsed_time = time.time() - self.stats["start_time"]
 
         check_rate = self.stats["total_checked"] / elapsed_time if elapsed_time > 0 else 0
         success_rate = (self.stats["live_proxies"] / self.stats["total_checked"] * 100) if self.stats["total_checked"] > 0 else 0
 
-        top_countries = sorted(self.stats["countries"].items(), key=lambda x: x[1], reverse=True)[:5]
+        top_countries = self.country_counter.most_common(3)
+        percentiles = self.latency_percentiles()
+
+        stats_content = f"""
+[bold bright_cyan]📊 THỐNG KÊ REAL-TIME[/bold bright_cyan]
+
+[bold bright_green]✅ Live:[/bold bright_green] {self.stats["live_proxies"]:,}
+[bold bright_red]❌ Dead:[/bold bright_red] {self.stats["dead_proxies"]:,}
+[bold bright_yellow]📈 Tỷ lệ thành công:[/bold bright_yellow] {success_rate:.1f}%
+[bold bright_magenta]⚡ Tốc độ kiểm tra:[/bold bright_magenta] {check_rate:.1f} proxy/s
+[bold bright_cyan]⏱️ Thời gian phản hồi TB:[/bold bright_cyan] {self.latency.mean:.0f}ms (±{self.latency.stddev:.0f})
+[bold bright_cyan]📐 p50/p95/p99:[/bold bright_cyan] {percentiles["p50"]}/{percentiles["p95"]}/{percentiles["p99"]}ms
+[bold bright_white]🏥 Điểm sức khỏe TB:[/bold bright_white] {self.health.mean:.1f}/100
+
+[bold bright_yellow]🌍 TOP QUỐC GIA:[/bold bright_yellow]
+""" + "\n".join([f"  {country}: {count}" for country, count in top_countries])
+
+        return Panel(
+            stats_content,
+            title="[bold bright_cyan]Analytics Dashboard[/bold bright_cyan]",
+            border_style="bright_cyan",
+            padding=(1, 2)
+        )
+
+print_lock = threading.Lock()
+
+class PeriodicFlusher:
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.writers = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def register(self, writer):
+        with self.lock:
+            self.writers.add(writer)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def unregister(self, writer):
+        with self.lock:
+            self.writers.discard(writer)
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                writers = list(self.writers)
+                if not writers:
+                    self.thread = None
+                    return
+            for writer in writers:
+                try:
+                    writer.flush_if_due()
+                except Exception:
+                    pass
+
+result_flusher = PeriodicFlusher()
+
+class StreamingResultWriter:
+    def __init__(self, path, mode='a', flush_every=50, flush_interval=1.0, fsync_interval=5.0):
+        self.path = path
+        self.mode = mode
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.buffer = []
+        self.count = 0
+        self.lock = threading.Lock()
+        self.last_flush = time.time()
+        self.last_fsync = time.time()
+        self.registered = False
+
+    def open_file(self):
+        needs_separator = False
+        if self.mode == 'a' and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_separator = f.read(1) != b'\n'
+        self.file = open(self.path, self.mode, encoding='utf-8')
+        if needs_separator:
+            self.file.write("\n")
+
+    def write_line(self, line):
+        with self.lock:
+            self.buffer.append(line)
+            self.count += 1
+            if not self.registered:
+                self.registered = True
+                result_flusher.register(self)
+            if len(self.buffer) >= self.flush_every or time.time() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+
+    def flush_if_due(self):
+        with self.lock:
+            if self.buffer and time.time() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+
+    def flush_locked(self, force_fsync=False):
+        if self.buffer:
+            if self.file is None:
+                self.open_file()
+            self.file.write("".join(f"{line}\n" for line in self.buffer))
+            self.buffer.clear()
+        if self.file is None:
+            return
+        self.file.flush()
+        now = time.time()
+        self.last_flush = now
+        if force_fsync or now - self.last_fsync >= self.fsync_interval:
+            try:
+                os.fsync(self.file.fileno())
+            except OSError:
+                pass
+            self.last_fsync = now
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked(force_fsync=True)
 
-        avg_health = sum(self.stats["health_scores"]) / len(self.stats["health_scores"]) if self.stats["health_scores"] else 0
+    def close(self):
+        result_flusher.unregister(self)
+        with self.lock:
+            self.registered = False
+            self.flush_locked(force_fsync=True)
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ClassifiedResultWriter:
+    def __init__(self, classify_type, base_dir=None):
+        self.base_dir = base_dir or get_current_directory()
+        self.by_country = classify_type in ('1', '3')
+        self.by_type = classify_type in ('2', '3')
+        self.writers = {}
+        self.lock = threading.Lock()
 
-        stats_content = f"""
-[bold bright_cyan]📊 THỐNG KÊ REAL-TIME[/bold bright_cyan]
+    def get_writer(self, path):
+        with self.lock:
+            writer = self.writers.get(path)
+            if writer is None:
+                writer = StreamingResultWriter(path)
+                self.writers[path] = writer
+            return writer
+
+    def write(self, proxy_type, country, line):
+        if self.by_country:
+            country_file_path = os.path.join(self.base_dir, "proxy_live_country.txt")
+            self.get_writer(country_file_path).write_line(f"{country}: {line}")
+        if self.by_type:
+            type_file_path = os.path.join(self.base_dir, f"proxy_live_{proxy_type}.txt")
+            self.get_writer(type_file_path).write_line(line)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        return {path: writer.count for path, writer in self.writers.items() if writer.count}
+
+def write_lines_atomic(path, lines):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class CheckJournal:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_current_directory(), "check_journal.jsonl")
+        self.snapshot_path = f"{self.path}.proxies"
+        self.completed = {}
+        self.header = None
+        self.writer = None
+        self.snapshot_writer = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        self.completed.clear()
+        self.header = None
+        if not self.exists():
+            return None
 
-[bold bright_green]✅ Live:[/bold bright_green] {self.stats["live_proxies"]:,}
-[bold bright_red]❌ Dead:[/bold bright_red] {self.stats["dead_proxies"]:,}
-[bold bright_yellow]📈 Tỷ lệ thành công:[/bold bright_yellow] {success_rate:.1f}%
-[bold bright_magenta]⚡ Tốc độ kiểm tra:[/bold bright_magenta] {check_rate:.1f} proxy/s
-[bold bright_cyan]⏱️ Thời gian phản hồi TB:[/bold bright_cyan] {self.stats["avg_response_time"]:.0f}ms
-[bold bright_white]🏥 Điểm sức khỏe TB:[/bold bright_white] {avg_health:.1f}/100
+        with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    self.header = entry
+                elif entry:
+                    self.completed[entry[0]] = entry[1:] or None
+        return self.header
+
+    def start(self, header):
+        self.completed.clear()
+        self.header = header
+        self.writer = StreamingResultWriter(self.path, mode='w')
+        self.writer.write_line(json.dumps(header, ensure_ascii=False))
+
+    def resume(self):
+        self.writer = StreamingResultWriter(self.path)
+
+    def snapshot(self, proxies):
+        self.snapshot_writer = StreamingResultWriter(self.snapshot_path, mode='w')
+        for proxy in proxies:
+            self.snapshot_writer.write_line(proxy)
+            yield proxy
+
+    def rotate(self):
+        rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        os.replace(self.path, rotated)
+        if os.path.exists(self.snapshot_path):
+            os.replace(self.snapshot_path, f"{rotated}.proxies")
+        return rotated
+
+    def unfinished(self):
+        previous = CheckJournal(self.path)
+        header = previous.load()
+        if not header:
+            return None
+        return header, len(previous.completed)
 
-[bold bright_yellow]🌍 TOP QUỐC GIA:[/bold bright_yellow]
-""" + "\n".join([f"  {country}: {count}" for country, count in top_countries[:3]])
+    def pending(self, proxies):
+        return (proxy for proxy in proxies if proxy not in self.completed)
 
-        return Panel(
-            stats_content,
-            title="[bold bright_cyan]Analytics Dashboard[/bold bright_cyan]",
-            border_style="bright_cyan",
-            padding=(1, 2)
-        )
+    def restored_results(self):
+        return [(proxy, *result) for proxy, result in self.completed.items() if result]
 
-print_lock = threading.Lock()
+    def record(self, proxy, result=None):
+        if self.writer is None:
+            return
+        entry = [proxy, *result[1:]] if result else [proxy]
+        self.writer.write_line(json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=geo_to_dict))
+
+    def close(self, finished=False):
+        for writer in (self.snapshot_writer, self.writer):
+            if writer is not None:
+                writer.close()
+        self.writer = self.snapshot_writer = None
+        if finished:
+            for path in (self.path, self.snapshot_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
 
 def create_rich_progress():
     return Progress(
-        SpinnerColumn(spinner_style="bold bright_cyan"),
+        SpinnerColumn(style="bold bright_cyan"),
         TextColumn("[bold bright_magenta][progress.description]{task.description}"),
         BarColumn(bar_width=40, style="bright_green", complete_style="bright_cyan"),
         TaskProgressColumn(style="bold bright_yellow"),
-        TimeElapsedColumn(style="bold bright_blue"),
+        TimeElapsedColumn(),
         console=console
     )
 
+class CheckRenderer:
+    def __init__(self, total=0, dashboard=None, quiet=False, refresh_per_second=8, tail_size=10, ranker=None, top_size=5):
+        self.dashboard = dashboard
+        self.ranker = ranker
+        self.top_size = top_size
+        self.quiet = quiet
+        self.refresh_per_second = refresh_per_second
+        self.tail = deque(maxlen=tail_size)
+        self.live_count = 0
+        self.dead_count = 0
+        self.lock = threading.Lock()
+        self.progress = create_rich_progress()
+        self.task = self.progress.add_task("[cyan]Đang kiểm tra proxy...", total=total)
+        self.view = None
+
+    def __enter__(self):
+        if not self.quiet:
+            self.view = Live(
+                get_renderable=self.render,
+                console=console,
+                refresh_per_second=self.refresh_per_second,
+                transient=True
+            )
+            self.view.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.view:
+            self.view.stop()
+            self.view = None
+        return False
+
+    def live(self, line=None):
+        with self.lock:
+            self.live_count += 1
+            if line:
+                self.tail.append(line)
+        self.progress.advance(self.task)
+
+    def dead(self):
+        with self.lock:
+            self.dead_count += 1
+        self.progress.advance(self.task)
+
+    def render(self):
+        with self.lock:
+            live_count = self.live_count
+            dead_count = self.dead_count
+            tail = list(self.tail)
+        counters = Text.from_markup(
+            f"[bold bright_green]✅ Live: {live_count:,}[/bold bright_green]   "
+            f"[bold bright_red]❌ Dead: {dead_count:,}[/bold bright_red]"
+        )
+        parts = [self.progress.get_renderable(), counters]
+        if tail:
+            parts.append(Panel(
+                "\n".join(tail),
+                title="[bold bright_green]LIVE gần đây[/bold bright_green]",
+                border_style="green"
+            ))
+        if self.ranker and self.top_size > 0:
+            best_results = self.ranker.best(self.top_size)
+            if best_results:
+                parts.append(self.render_top_table(best_results))
+        if self.dashboard:
+            parts.append(self.dashboard.get_live_stats_panel())
+        return Group(*parts)
+
+    def render_top_table(self, best_results):
+        table = Table(
+            title=f"[bold bright_yellow]🏆 Top {len(best_results)} hiện tại[/bold bright_yellow]",
+            show_header=True,
+            header_style="bold magenta",
+            box=ROUNDED
+        )
+        table.add_column("Proxy", style="cyan", min_width=20)
+        table.add_column("Quốc Gia", style="yellow", justify="center")
+        table.add_column("Ping", style="red", justify="center")
+        table.add_column("Sức Khỏe", justify="center")
+        for result in best_results:
+            health_color = get_health_score_color(result.health_score)
+            table.add_row(
+                result.proxy,
+                result.country or "?",
+                f"{result.response_time}ms",
+                f"[{health_color}]{result.health_score}[/{health_color}]"
+            )
+        return table
+
+def create_renderer(config, total=0, dashboard=None, ranker=None):
+    return CheckRenderer(
+        total,
+        dashboard,
+        quiet=config.get("quiet_mode", False),
+        refresh_per_second=config.get("render_refresh_per_second", 8),
+        tail_size=config.get("render_tail_size", 10),
+        ranker=ranker,
+        top_size=config.get("render_top_size", 5)
+    )
+
 def create_proxy_results_table(results):
     table = Table(title="🎯 Kết Quả Kiểm Tra Proxy", show_header=True, header_style="bold magenta")
 
@@ -1699,199 +3585,469 @@ def show_proxy_statistics(total, live, dead):
 
     console.print(stats_table)
 
-def check_proxies_rich(proxies, classify, classify_type, output_path, max_threads):
+async def evaluate_proxy_rich(proxy, config, probe_mode="first", test_urls=None):
+    ip, country, response_time = await test_proxy_async(proxy, probe_mode=probe_mode, test_urls=test_urls, max_retries=config.get("max_retries", 2))
+
+    geo_data = None
+    health_score = 0
+
+    if ip:
+        if config.get("enable_geolocation", True):
+            geo_data = await get_detailed_geolocation(ip)
+            if geo_data:
+                country = geo_data.get("country_code", country)
+
+        if config.get("enable_health_scoring", True):
+            anonymity = geo_data.get("anonymity", "Unknown") if geo_data else "Unknown"
+            is_hosting = geo_data.get("is_hosting", False) if geo_data else False
+            health_score = calculate_proxy_health_score(response_time, 0, anonymity, is_hosting)
+
+    return ProxyResult(proxy, ip, country, response_time, geo_data, health_score)
+
+def get_process_shard_count(config):
+    try:
+        num_shards = int(config.get("process_shards", 1))
+    except (TypeError, ValueError):
+        return 1
+    if num_shards == 0:
+        num_shards = os.cpu_count() or 1
+    return max(1, num_shards)
+
+def sharded_check_worker(task_queue, worker_settings, result_queue):
+    config = worker_settings['config']
+    probe_mode = worker_settings.get('probe_mode', 'first')
+    test_urls = worker_settings.get('test_urls')
+    rich_mode = worker_settings.get('mode') == 'rich'
+    prescreen = worker_settings.get('prescreen')
+    configure_geolocation(config)
+    configure_rate_limits(config, worker_settings.get('shards', 1))
+
+    async def check(proxy):
+        if rich_mode:
+            result = await evaluate_proxy_rich(proxy, config, probe_mode, test_urls)
+        else:
+            ip, country, response_time = await test_proxy_async(proxy, probe_mode=probe_mode, test_urls=test_urls, max_retries=config.get("max_retries", 2))
+            result = (proxy, ip, country, response_time)
+        result_queue.put(result)
+
+    def report_unreachable(proxy):
+        result_queue.put(ProxyResult(proxy, None, None, 0, None, 0) if rich_mode else (proxy, None, None, 0))
+
+    async def iter_tasks():
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, task_queue.get)
+            if chunk is None:
+                return
+            for proxy in chunk:
+                yield proxy
+
+    async def run():
+        source = iter_tasks()
+        if prescreen:
+            source = iter_tcp_prescreen(source, prescreen['timeout'], prescreen['concurrency'], report_unreachable)
+        async for _ in iter_bounded_checks(source, check, worker_settings.get('max_concurrency', 100)):
+            pass
+
+    try:
+        asyncio.run(run())
+    finally:
+        geolocation_cache.save()
+        result_queue.put(None)
+
+def iter_sharded_results(proxies, num_shards, worker_settings):
+    context = multiprocessing.get_context()
+    result_queue = context.Queue()
+    task_queue = context.Queue(maxsize=num_shards * 4)
+    chunk_size = max(1, int(worker_settings.get('max_concurrency', 100)))
+    stop_feeding = threading.Event()
+    workers = [
+        context.Process(target=sharded_check_worker, args=(task_queue, worker_settings, result_queue), daemon=True)
+        for _ in range(num_shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def put_task(item):
+        while not stop_feeding.is_set():
+            try:
+                task_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def feed_tasks():
+        try:
+            chunk = []
+            for proxy in proxies:
+                chunk.append(proxy)
+                if len(chunk) >= chunk_size:
+                    if not put_task(chunk):
+                        return
+                    chunk = []
+            if chunk:
+                put_task(chunk)
+        finally:
+            for _ in workers:
+                if not put_task(None):
+                    break
+
+    feeder = threading.Thread(target=feed_tasks, daemon=True)
+    feeder.start()
+
+    remaining = len(workers)
+    try:
+        while remaining:
+            try:
+                item = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+
+            if item is None:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stop_feeding.set()
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        feeder.join(timeout=5)
+
+RESULT_FIELDS = ("proxy", "ip", "country", "response_time", "geo", "health_score")
+
+class NdjsonResultWriter:
+    def __init__(self, stream=None, include_dead=False, flush_every=50, flush_interval=1.0, close_stream=False):
+        self.stream = stream or sys.stdout
+        self.close_stream = close_stream
+        self.include_dead = include_dead
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.count = 0
+        self.lock = threading.Lock()
+        self.last_flush = time.time()
+        self.registered = False
+
+    def write(self, proxy, result=None):
+        if result is None:
+            if not self.include_dead:
+                return
+            record = {"proxy": proxy, "status": "dead"}
+        else:
+            record = dict(zip(RESULT_FIELDS, result), status="live")
+        line = json.dumps(record, ensure_ascii=False, default=geo_to_dict)
+        with self.lock:
+            self.buffer.append(line)
+            self.count += 1
+            if not self.registered:
+                self.registered = True
+                result_flusher.register(self)
+            if len(self.buffer) >= self.flush_every or time.time() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+
+    def flush_if_due(self):
+        with self.lock:
+            if self.buffer and time.time() - self.last_flush >= self.flush_interval:
+                self.flush_locked()
+
+    def flush_locked(self):
+        self.last_flush = time.time()
+        if not self.buffer or self.stream is None:
+            self.buffer.clear()
+            return
+        try:
+            self.stream.write("".join(f"{line}\n" for line in self.buffer))
+            self.stream.flush()
+        except (BrokenPipeError, ValueError):
+            self.stream = None
+        self.buffer.clear()
+
+    def close(self):
+        result_flusher.unregister(self)
+        with self.lock:
+            self.registered = False
+            self.flush_locked()
+            if self.close_stream and self.stream is not None:
+                self.stream.close()
+                self.stream = None
+
+def format_rich_result_line(result):
+    proxy, ip, country, response_time, geo_data, health_score = result
+    city = geo_data.get('city', 'Unknown') if geo_data else 'Unknown'
+    anonymity = geo_data.get('anonymity', 'Unknown') if geo_data else 'Unknown'
+    return f"{proxy} | {response_time}ms | {health_score}/100 | {country} | {city} | {anonymity}"
+
+def known_length(items):
+    try:
+        return len(items)
+    except TypeError:
+        return None
+
+def check_proxies_rich(proxies, classify, classify_type, output_path, max_threads, total=None, journal=None, result_sink=None, stats=None):
     config = load_config()
-    results = []
-    live_proxies = []
+    if total is None:
+        total = known_length(proxies)
+    if stats is None:
+        stats = {}
+    stats.update(live=0, passed=0)
+    categories = {"premium": 0, "good": 0, "average": 0, "poor": 0}
 
     dashboard = ProxyAnalyticsDashboard()
+    probe_mode = config.get("ip_probe_mode", "first")
+    ip_test_urls = get_ip_test_urls(config.get("ip_echo_urls"))
+    configure_geolocation(config)
+    configure_rate_limits(config)
 
     if config.get("enable_smart_threading", True):
         optimal_threads = get_optimal_thread_count()
         max_threads = min(max_threads, optimal_threads)
         console.print(f"[yellow]🧠 Smart Threading: Sử dụng {max_threads} threads (tối ưu: {optimal_threads})[/yellow]")
 
-    classified_proxies = {
-        "socks4": {},
-        "socks5": {},
-        "http": {},
-        "https": {}
-    }
-
-    with create_rich_progress() as progress:
-        task = progress.add_task("[cyan]Đang kiểm tra proxy...", total=len(proxies))
-
-        async def process_proxy_rich_enhanced(proxy):
-            ip, country, response_time = test_proxy(proxy)
-            progress.advance(task)
-
-            geo_data = None
-            health_score = 0
-
-            if ip:
-                if config.get("enable_geolocation", True):
-                    geo_data = await get_detailed_geolocation(ip)
-                    if geo_data:
-                        country = geo_data.get("country_code", country)
+    live_writer = StreamingResultWriter(output_path, mode='w')
+    classified_writer = ClassifiedResultWriter(classify_type) if classify else None
+    ranker = TopKRanker(config.get("top_k_size", 500))
+    use_filters = config.get("enable_advanced_filtering", True)
+    filter_settings = build_filter_settings(config)
+    report_writer = StreamingReportWriter(output_path) if config.get("auto_export_reports", True) else None
+    history_writer = open_history_writer(config)
+
+    def accept_result(result):
+        stats['live'] += 1
+        if use_filters and not result_passes_filters(result, filter_settings):
+            return
+        stats['passed'] += 1
+        categories[get_performance_category(result)] += 1
+        live_writer.write_line(format_rich_result_line(result))
+        ranker.push(result)
+        if report_writer:
+            report_writer.write(result)
 
-                if config.get("enable_health_scoring", True):
-                    anonymity = geo_data.get("anonymity", "Unknown") if geo_data else "Unknown"
-                    is_hosting = geo_data.get("is_hosting", False) if geo_data else False
-                    health_score = calculate_proxy_health_score(response_time, 0, anonymity, is_hosting)
+    try:
+        proxies_to_check = proxies
+        if journal and journal.completed:
+            for proxy, stored in journal.completed.items():
+                if stored:
+                    result = ProxyResult(proxy, *stored)
+                    dashboard.update_stats(*result)
+                    accept_result(result)
+                else:
+                    dashboard.update_stats(proxy, None, None, 0)
+            console.print(f"[yellow]♻️ Khôi phục {len(journal.completed):,} proxy đã kiểm tra ({stats['live']:,} sống)[/yellow]")
+            proxies_to_check = journal.pending(proxies)
+            if total is not None:
+                total = max(0, total - len(journal.completed))
+
+        prescreen = None
+        prescreen_stats = {'unreachable': 0}
+        if config.get("enable_tcp_prescreen", True):
+            prescreen = {
+                'timeout': config.get("tcp_prescreen_timeout", 1.5),
+                'concurrency': config.get("tcp_prescreen_concurrency", 2000)
+            }
+            console.print(f"[yellow]🔌 Sàng lọc TCP song song với kiểm tra (timeout {prescreen['timeout']}s)[/yellow]")
 
-                dashboard.update_stats(proxy, ip, country, response_time, geo_data, health_score)
+        with create_renderer(config, total, dashboard, ranker) as renderer:
 
-                result = (proxy, ip, country, response_time, geo_data, health_score)
-                live_proxies.append(f"{proxy} | {response_time}ms | {health_score}/100")
+            def record_proxy_result(result):
+                proxy, ip, country, response_time, geo_data, health_score = result
+                if journal:
+                    journal.record(proxy, result if ip else None)
+                if result_sink:
+                    result_sink.write(proxy, result if ip else None)
 
-                health_emoji = get_health_score_emoji(health_score)
-                health_color = get_health_score_color(health_score)
-                city_info = f" | {geo_data.get('city', 'Unknown')}" if geo_data else ""
+                if ip:
+                    dashboard.update_stats(proxy, ip, country, response_time, geo_data, health_score)
+                    if history_writer:
+                        history_writer.write(proxy, result)
 
-                console.print(f"[green]✅ LIVE[/green] {proxy} | {ip} | {country}{city_info} | {response_time}ms | {health_emoji}[{health_color}]{health_score}[/{health_color}]")
+                    accept_result(result)
 
-                if classify:
-                    proxy_type = "http"
-                    if proxy.startswith("socks4://"):
-                        proxy_type = "socks4"
-                    elif proxy.startswith("socks5://"):
-                        proxy_type = "socks5"
-                    elif proxy.startswith("https://"):
-                        proxy_type = "https"
+                    if renderer.quiet:
+                        renderer.live()
+                    else:
+                        health_emoji = get_health_score_emoji(health_score)
+                        health_color = get_health_score_color(health_score)
+                        city_info = f" | {geo_data.get('city', 'Unknown')}" if geo_data else ""
+                        renderer.live(f"[green]✅ LIVE[/green] {proxy} | {ip} | {country}{city_info} | {response_time}ms | {health_emoji}[{health_color}]{health_score}[/{health_color}]")
 
-                    if country not in classified_proxies[proxy_type]:
-                        classified_proxies[proxy_type][country] = []
-                    classified_proxies[proxy_type][country].append((proxy, response_time, health_score))
+                    if classified_writer:
+                        classified_writer.write(detect_proxy_type(proxy), country, f"{proxy} | {response_time}ms | {health_score}/100")
 
-                return result
+                    return result
+                else:
+                    dashboard.update_stats(proxy, None, None, 0)
+                    renderer.dead()
+                    return None
+
+            async def process_proxy_rich_enhanced(proxy):
+                result = await evaluate_proxy_rich(proxy, config, probe_mode, ip_test_urls)
+                return record_proxy_result(result)
+
+            def record_unreachable(proxy):
+                prescreen_stats['unreachable'] += 1
+                record_proxy_result(ProxyResult(proxy, None, None, 0, None, 0))
+
+            async def run_enhanced_checks():
+                source = proxies_to_check
+                if prescreen:
+                    source = iter_tcp_prescreen(source, prescreen['timeout'], prescreen['concurrency'], record_unreachable)
+                async for _ in iter_bounded_checks(source, process_proxy_rich_enhanced, max_threads):
+                    pass
+
+            num_shards = get_process_shard_count(config)
+            if num_shards > 1:
+                console.print(f"[yellow]🧩 Chia proxy cho {num_shards} tiến trình[/yellow]")
+                worker_settings = {
+                    'mode': 'rich',
+                    'config': config,
+                    'probe_mode': probe_mode,
+                    'test_urls': ip_test_urls,
+                    'max_concurrency': max(1, max_threads // num_shards),
+                    'shards': num_shards,
+                    'prescreen': prescreen and dict(prescreen, concurrency=max(1, prescreen['concurrency'] // num_shards))
+                }
+                for result in iter_sharded_results(proxies_to_check, num_shards, worker_settings):
+                    record_proxy_result(result)
             else:
-                dashboard.update_stats(proxy, None, None, 0)
-                console.print(f"[red]❌ DEAD[/red] {proxy}")
-                return None
-
-        async def run_enhanced_checks():
-            tasks = [process_proxy_rich_enhanced(proxy) for proxy in proxies]
-            return await asyncio.gather(*tasks)
-
-        enhanced_results = asyncio.run(run_enhanced_checks())
-        results = list(filter(None, enhanced_results))
+                run_coroutine_sync(run_enhanced_checks())
+                if prescreen:
+                    console.print(f"[yellow]🔌 Đã loại {prescreen_stats['unreachable']:,} proxy không kết nối được TCP[/yellow]")
+    finally:
+        live_writer.close()
+        report_paths = report_writer.close(dashboard.summary()) if report_writer else None
+        if history_writer:
+            history_writer.close()
+        geolocation_cache.save()
+        if classified_writer:
+            for path, count in classified_writer.close().items():
+                console.print(f"[green]✓ Đã lưu {count:,} proxy phân loại: {path}[/green]")
 
     console.print("\n")
     console.print(dashboard.get_live_stats_panel())
 
-    if results and config.get("enable_advanced_filtering", True):
+    live_count = stats['passed']
+    if stats['live'] and use_filters:
         console.print(f"\n[yellow]🔍 Áp dụng bộ lọc nâng cao...[/yellow]")
-        filtered_results = apply_advanced_filters(results, config)
-        console.print(f"[green]✅ Đã lọc: {len(filtered_results)}/{len(results)} proxy đạt tiêu chuẩn[/green]")
-        results = filtered_results
+        console.print(f"[green]✅ Đã lọc: {live_count}/{stats['live']} proxy đạt tiêu chuẩn[/green]")
 
-    if results:
-        results = sort_proxies_by_quality(results)
-        console.print(f"[cyan]📊 Đã sắp xếp theo chất lượng[/cyan]")
+    best_results = ranker.best()
+    if best_results:
+        console.print(f"[cyan]📊 Đã xếp hạng {len(best_results)} proxy tốt nhất theo chất lượng[/cyan]")
 
-    show_proxy_statistics(len(proxies), len(results), len(proxies) - len(results))
+    checked_total = dashboard.stats["total_checked"]
+    show_proxy_statistics(checked_total, live_count, checked_total - live_count)
 
-    if results:
+    if live_count:
         console.print("\n")
 
-        categories = categorize_proxies_by_performance(results)
-        console.print(f"[bold bright_green]🏆 Premium ({len(categories['premium'])})[/bold bright_green] | "
-                     f"[bold bright_yellow]⭐ Good ({len(categories['good'])})[/bold bright_yellow] | "
-                     f"[bold bright_orange1]📈 Average ({len(categories['average'])})[/bold bright_orange1] | "
-                     f"[bold bright_red]📉 Poor ({len(categories['poor'])})[/bold bright_red]")
+        console.print(f"[bold bright_green]🏆 Premium ({categories['premium']})[/bold bright_green] | "
+                     f"[bold bright_yellow]⭐ Good ({categories['good']})[/bold bright_yellow] | "
+                     f"[bold bright_orange1]📈 Average ({categories['average']})[/bold bright_orange1] | "
+                     f"[bold bright_red]📉 Poor ({categories['poor']})[/bold bright_red]")
 
-        results_table = create_enhanced_proxy_results_table(results[:10])
+        results_table = create_enhanced_proxy_results_table(best_results[:10])
         console.print(results_table)
 
-        if len(results) > 10:
-            console.print(f"[yellow]... và {len(results) - 10} proxy khác[/yellow]")
-
-    if results:
-        enhanced_live_proxies = []
-        for result in results:
-            proxy, ip, country, response_time, geo_data, health_score = result
-            city = geo_data.get('city', 'Unknown') if geo_data else 'Unknown'
-            anonymity = geo_data.get('anonymity', 'Unknown') if geo_data else 'Unknown'
-            enhanced_live_proxies.append(f"{proxy} | {response_time}ms | {health_score}/100 | {country} | {city} | {anonymity}")
+        if live_count > 10:
+            console.print(f"[yellow]... và {live_count - 10} proxy khác[/yellow]")
 
-        with open(output_path, "w", encoding='utf-8') as f:
-            f.write('\n'.join(enhanced_live_proxies))
+    if best_results:
+        best_path = f"{os.path.splitext(output_path)[0]}_best.txt"
+        write_lines_atomic(best_path, [format_rich_result_line(result) for result in best_results])
+        console.print(f"[green]🏆 Đã lưu {len(best_results)} proxy tốt nhất: {best_path}[/green]")
 
+    if best_results:
         if config.get("auto_bookmark_quality", True):
-            auto_bookmark_quality_proxies(results)
-
-        if config.get("auto_export_reports", True):
-            export_detailed_reports(results, dashboard.stats, output_path)
-
-        if classify:
-            pass
-
-    return results
-
-def export_detailed_reports(results, stats, base_output_path):
-    import csv
-    from rich.console import Console
-    from rich.table import Table
-    from datetime import datetime
-    import json
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_name = base_output_path.replace('.txt', '')
-
-    json_report = {
-        "timestamp": datetime.now().isoformat(),
-        "summary": stats,
-        "proxies": [],
-        "performance_metrics": {
-            "response_times": [],
-            "health_scores": [],
-            "countries": {},
-            "proxy_types": {
-                "http": 0,
-                "https": 0,
-                "socks4": 0,
-                "socks5": 0
-            }
-        }
-    }
-
-    for result in results:
+            auto_bookmark_quality_proxies(best_results)
+
+    if report_paths:
+        console.print(f"[green]📊 Đã xuất báo cáo: {report_paths[0]}, {report_paths[1]}[/green]")
+
+    return best_results
+
+class StreamingReportWriter:
+    CSV_HEADER = ['Proxy', 'IP', 'Country', 'City', 'Response_Time', 'Health_Score', 'Anonymity', 'ISP']
+
+    def __init__(self, base_output_path):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = base_output_path.replace('.txt', '')
+        self.json_path = f"{base_name}_report_{timestamp}.json"
+        self.csv_path = f"{base_name}_report_{timestamp}.csv"
+        self.json_writer = StreamingResultWriter(self.json_path, mode='w')
+        self.csv_writer = StreamingResultWriter(self.csv_path, mode='w')
+        self.json_writer.write_line(f'{{"timestamp": {json.dumps(datetime.now().isoformat())}, "proxies": [')
+        self.csv_writer.write_line(self.format_csv_row(self.CSV_HEADER))
+        self.count = 0
+        self.lock = threading.Lock()
+        self.response_times = array('d')
+        self.health_scores = array('d')
+        self.countries = {}
+        self.proxy_types = {"http": 0, "https": 0, "socks4": 0, "socks5": 0}
+
+    @staticmethod
+    def format_csv_row(row):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow(row)
+        return buffer.getvalue()
+
+    def write(self, result):
         proxy, ip, country, response_time, geo_data, health_score = result
+        proxy_type = detect_proxy_type(proxy)
         proxy_data = {
             "proxy": proxy,
             "ip": ip,
             "country": country,
             "response_time": response_time,
             "health_score": health_score,
-            "geolocation": geo_data,
-            "proxy_type": detect_proxy_type(proxy),
+            "geolocation": geo_data.to_dict() if geo_data else None,
+            "proxy_type": proxy_type,
             "stability_score": analyze_proxy_stability([{"success": True, "response_time": response_time}])
         }
-        json_report["proxies"].append(proxy_data)
-        
-        json_report["performance_metrics"]["response_times"].append(response_time)
-        json_report["performance_metrics"]["health_scores"].append(health_score)
-        json_report["performance_metrics"]["countries"][country] = json_report["performance_metrics"]["countries"].get(country, 0) + 1
-        json_report["performance_metrics"]["proxy_types"][proxy_data["proxy_type"]] += 1
-
-    json_file = f"{base_name}_report_{timestamp}.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(json_report, f, indent=2, ensure_ascii=False)
-
-    csv_file = f"{base_name}_report_{timestamp}.csv"
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Proxy', 'IP', 'Country', 'City', 'Response_Time', 'Health_Score', 'Anonymity', 'ISP'])
-
-        for result in results:
-            proxy, ip, country, response_time, geo_data, health_score = result
-            city = geo_data.get('city', 'Unknown') if geo_data else 'Unknown'
-            anonymity = geo_data.get('anonymity', 'Unknown') if geo_data else 'Unknown'
-            isp = geo_data.get('isp', 'Unknown') if geo_data else 'Unknown'
+        city = geo_data.get('city', 'Unknown') if geo_data else 'Unknown'
+        anonymity = geo_data.get('anonymity', 'Unknown') if geo_data else 'Unknown'
+        isp = geo_data.get('isp', 'Unknown') if geo_data else 'Unknown'
 
-            writer.writerow([proxy, ip, country, city, response_time, health_score, anonymity, isp])
+        with self.lock:
+            self.json_writer.write_line(f"{',' if self.count else ' '} {json.dumps(proxy_data, ensure_ascii=False)}")
+            self.csv_writer.write_line(self.format_csv_row([proxy, ip, country, city, response_time, health_score, anonymity, isp]))
+            self.count += 1
+            self.response_times.append(response_time)
+            self.health_scores.append(health_score)
+            self.countries[country] = self.countries.get(country, 0) + 1
+            self.proxy_types[proxy_type] = self.proxy_types.get(proxy_type, 0) + 1
+
+    def close(self, stats=None):
+        metrics = {
+            "response_times": [int(value) if value.is_integer() else value for value in self.response_times],
+            "health_scores": [int(value) if value.is_integer() else value for value in self.health_scores],
+            "countries": self.countries,
+            "proxy_types": self.proxy_types
+        }
+        self.json_writer.write_line(f'], "summary": {json.dumps(stats, ensure_ascii=False)}, "performance_metrics": {json.dumps(metrics, ensure_ascii=False)}}}')
+        self.json_writer.close()
+        self.csv_writer.close()
+        if not self.count:
+            for path in (self.json_path, self.csv_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return None
+        return self.json_path, self.csv_path
 
-    console.print(f"[green]📊 Đã xuất báo cáo: {json_file}, {csv_file}[/green]")
+def export_detailed_reports(results, stats, base_output_path):
+    report_writer = StreamingReportWriter(base_output_path)
+    for result in results:
+        report_writer.write(result)
+    paths = report_writer.close(stats)
+    if paths:
+        console.print(f"[green]📊 Đã xuất báo cáo: {paths[0]}, {paths[1]}[/green]")
 
 def manage_proxy_favorites():
     favorites_file = os.path.join(get_current_directory(), "proxy_favorites.json")
@@ -1972,114 +4128,105 @@ def auto_bookmark_quality_proxies(results):
                 "country": country,
                 "response_time": response_time,
                 "health_score": health_score,
-                "geolocation": geo_data
+                "geolocation": geo_data.to_dict() if geo_data else None
             }
             favorites_manager['add'](proxy_data)
 
-def check_proxies(proxies, classify, classify_type, output_path, max_threads):
+def check_proxies(proxies, classify, classify_type, output_path, max_threads, total=None, journal=None, result_sink=None):
     results = []
-    live_proxies = []
-
-    classified_proxies = {
-        "socks4": {},
-        "socks5": {},
-        "http": {},
-        "https": {}
-    }
-
-    def process_proxy(proxy):
-        ip, country, response_time = test_proxy(proxy)
+    config = load_config()
+    probe_mode = config.get("ip_probe_mode", "first")
+    ip_test_urls = get_ip_test_urls(config.get("ip_echo_urls"))
+    max_retries = config.get("max_retries", 2)
+    offline_geoip.configure(config)
+    configure_rate_limits(config)
+
+    live_writer = StreamingResultWriter(output_path)
+    classified_writer = ClassifiedResultWriter(classify_type) if classify else None
+    if total is None:
+        total = known_length(proxies)
+    renderer = create_renderer(config, total)
+
+    def record_proxy_result(proxy, ip, country, response_time):
+        if journal:
+            journal.record(proxy, (proxy, ip, country, response_time) if ip else None)
+        if result_sink:
+            result_sink.write(proxy, (proxy, ip, country, response_time) if ip else None)
         if ip:
             result = (proxy, ip, country, response_time)
-            live_proxies.append(f"{proxy} | {response_time}ms")
-
-            with print_lock:
-                console.print(f"[green][LIVE] {proxy} | {ip} | {country} | {response_time}ms[/green]")
-
-            if classify:
-                proxy_type = "http"
-                if proxy.startswith("socks4://"):
-                    proxy_type = "socks4"
-                elif proxy.startswith("socks5://"):
-                    proxy_type = "socks5"
-                elif proxy.startswith("https://"):
-                    proxy_type = "https"
+            live_writer.write_line(f"{proxy} | {response_time}ms")
+            renderer.live(None if renderer.quiet else f"[green][LIVE] {proxy} | {ip} | {country} | {response_time}ms[/green]")
 
-                if country not in classified_proxies[proxy_type]:
-                    classified_proxies[proxy_type][country] = []
-                classified_proxies[proxy_type][country].append((proxy, response_time))
+            if classified_writer:
+                classified_writer.write(detect_proxy_type(proxy), country, f"{proxy} | {response_time}ms")
 
             return result
         else:
-            with print_lock:
-                console.print(f"[red][DEAD] {proxy}[/red]")
+            renderer.dead()
             return None
 
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        results = list(filter(None, executor.map(process_proxy, proxies)))
+    def process_proxy(proxy):
+        return record_proxy_result(proxy, *test_proxy(proxy, probe_mode, ip_test_urls, max_retries))
+
+    try:
+        proxies_to_check = proxies
+        restored = []
+        if journal and journal.completed:
+            restored = journal.restored_results()
+            with print_lock:
+                console.print(f"[yellow]♻️ Bỏ qua {len(journal.completed):,} proxy đã kiểm tra ({len(restored):,} sống)[/yellow]")
+            proxies_to_check = journal.pending(proxies)
+            if total is not None:
+                renderer.progress.update(renderer.task, total=max(0, total - len(journal.completed)))
+
+        prescreen = None
+        if config.get("enable_tcp_prescreen", True):
+            prescreen = {
+                'timeout': config.get("tcp_prescreen_timeout", 1.5),
+                'concurrency': config.get("tcp_prescreen_concurrency", 2000)
+            }
+            with print_lock:
+                console.print(f"[yellow]🔌 Sàng lọc TCP song song với kiểm tra (timeout {prescreen['timeout']}s)[/yellow]")
+
+        num_shards = get_process_shard_count(config)
+        if num_shards > 1:
+            with print_lock:
+                console.print(f"[yellow]🧩 Chia proxy cho {num_shards} tiến trình[/yellow]")
+            worker_settings = {
+                'mode': 'basic',
+                'config': config,
+                'probe_mode': probe_mode,
+                'test_urls': ip_test_urls,
+                'max_concurrency': max(1, max_threads // num_shards),
+                'shards': num_shards,
+                'prescreen': prescreen and dict(prescreen, concurrency=max(1, prescreen['concurrency'] // num_shards))
+            }
+            with renderer:
+                results = list(filter(None, (
+                    record_proxy_result(*result)
+                    for result in iter_sharded_results(proxies_to_check, num_shards, worker_settings)
+                )))
+        else:
+            if prescreen:
+                proxies_to_check = iter_tcp_prescreen_sync(
+                    proxies_to_check,
+                    prescreen['timeout'],
+                    prescreen['concurrency'],
+                    on_unreachable=lambda proxy: record_proxy_result(proxy, None, None, 0)
+                )
+            with renderer, ThreadPoolExecutor(max_workers=max_threads) as executor:
+                results = list(filter(None, bounded_thread_map(executor, process_proxy, proxies_to_check, max_threads * 2)))
+        results = restored + results
+    finally:
+        live_writer.close()
+        classified_paths = classified_writer.close() if classified_writer else {}
 
     if not results:
         console.print(f"\n[red]✗ Không có proxy nào sống! Không có file nào được xuất ra.[/red]")
         return results
 
-    with open(output_path, "a", encoding='utf-8') as f:
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            f.write("\n")
-        f.write("\n".join(live_proxies))
-
-    if classify:
-        if classify_type == '1':
-            country_file_path = os.path.join(get_current_directory(), "proxy_live_country.txt")
-            with open(country_file_path, "a", encoding='utf-8') as f:
-                if os.path.exists(country_file_path) and os.path.getsize(country_file_path) > 0:
-                    f.write("\n")
-                for proxy_type, countries in classified_proxies.items():
-                    for country, proxy_list in countries.items():
-                        if proxy_list:
-                            f.write(f"{country}:\n")
-                            for proxy, resp_time in proxy_list:
-                                f.write(f"{proxy} | {resp_time}ms\n")
-                            f.write("\n")
-            console.print(f"[green]✓ Đã lưu proxy phân loại theo quốc gia: {country_file_path}[/green]")
-
-        elif classify_type == '2':
-            for proxy_type, countries in classified_proxies.items():
-                proxy_list = []
-                for country, plist in countries.items():
-                    proxy_list.extend(plist)
-                if proxy_list:
-                    type_file_path = os.path.join(get_current_directory(), f"proxy_live_{proxy_type}.txt")
-                    with open(type_file_path, "a", encoding='utf-8') as f:
-                        if os.path.exists(type_file_path) and os.path.getsize(type_file_path) > 0:
-                            f.write("\n")
-                        f.write("\n".join([f"{proxy} | {resp_time}ms" for proxy, resp_time in proxy_list]))
-                    console.print(f"[green]✓ Đã lưu proxy {proxy_type}: {type_file_path}[/green]")
-
-        elif classify_type == '3':
-            country_file_path = os.path.join(get_current_directory(), "proxy_live_country.txt")
-            with open(country_file_path, "a", encoding='utf-8') as f:
-                if os.path.exists(country_file_path) and os.path.getsize(country_file_path) > 0:
-                    f.write("\n")
-                for proxy_type, countries in classified_proxies.items():
-                    for country, proxy_list in countries.items():
-                        if proxy_list:
-                            f.write(f"{country}:\n")
-                            for proxy, resp_time in proxy_list:
-                                f.write(f"{proxy} | {resp_time}ms\n")
-                            f.write("\n")
-            console.print(f"[green]✓ Đã lưu proxy phân loại theo quốc gia: {country_file_path}[/green]")
-
-            for proxy_type, countries in classified_proxies.items():
-                proxy_list = []
-                for country, plist in countries.items():
-                    proxy_list.extend(plist)
-                if proxy_list:
-                    type_file_path = os.path.join(get_current_directory(), f"proxy_live_{proxy_type}.txt")
-                    with open(type_file_path, "a", encoding='utf-8') as f:
-                        if os.path.exists(type_file_path) and os.path.getsize(type_file_path) > 0:
-                            f.write("\n")
-                        f.write("\n".join([f"{proxy} | {resp_time}ms" for proxy, resp_time in proxy_list]))
-                    console.print(f"[green]✓ Đã lưu proxy {proxy_type}: {type_file_path}[/green]")
+    for path, count in classified_paths.items():
+        console.print(f"[green]✓ Đã lưu {count:,} proxy phân loại: {path}[/green]")
 
     return results
 
@@ -2186,6 +4333,8 @@ def reset_session_data():
     if os.path.exists(cache_file):
         os.remove(cache_file)
 
+config_overrides = {}
+
 def load_config():
     config_file = os.path.join(get_current_directory(), "config.json")
     default_config = {
@@ -2210,7 +4359,35 @@ def load_config():
         "enable_advanced_filtering": True,
         "auto_export_reports": True,
         "auto_bookmark_quality": True,
-        "rate_limit_requests_per_second": 15
+        "rate_limit_requests_per_second": 15,
+        "ip_probe_mode": "first",
+        "enable_tcp_prescreen": True,
+        "tcp_prescreen_timeout": 1.5,
+        "tcp_prescreen_concurrency": 2000,
+        "ip_echo_urls": [],
+        "process_shards": 1,
+        "enable_check_journal": True,
+        "geo_cache_file": "geo_cache.json",
+        "geo_cache_ttl_hours": 24,
+        "geo_cache_max_entries": 50000,
+        "geo_cache_by_subnet": False,
+        "enable_geo_batching": True,
+        "geo_batch_size": 100,
+        "geo_batch_window": 0.2,
+        "geo_batch_requests_per_minute": 15,
+        "geo_batch_max_retries": 2,
+        "geo_fallback_concurrency": 4,
+        "geoip_database": "",
+        "geoip_offline_only": False,
+        "host_rate_limit_per_second": 10,
+        "host_rate_limits": {},
+        "host_max_backoff": 60,
+        "top_k_size": 500,
+        "quiet_mode": False,
+        "render_refresh_per_second": 8,
+        "render_tail_size": 10,
+        "render_top_size": 5,
+        "history_file": "check_history.jsonl"
     }
 
     if os.path.exists(config_file):
@@ -2220,11 +4397,14 @@ def load_config():
                 for key, value in default_config.items():
                     if key not in config:
                         config[key] = value
+                config.update(config_overrides)
                 return config
         except:
+            default_config.update(config_overrides)
             return default_config
     else:
         save_config(default_config)
+        default_config.update(config_overrides)
         return default_config
 
 def save_config(config):
@@ -2945,6 +5125,7 @@ async def download_proxies_with_progress_async(proxy_types, count, classify_outp
     urls = get_proxy_urls()
     session_data = load_session_data()
     all_proxies = []
+    index = ProxyDedupeIndex()
     
     stop_event = threading.Event()
     loading_thread = threading.Thread(target=show_loading_animation, args=("Đang thu thập proxy từ internet", stop_event))
@@ -2990,10 +5171,14 @@ async def download_proxies_with_progress_async(proxy_types, count, classify_outp
                 
                 new_proxies = []
                 for proxy in proxies_list:
+                    proxy = normalize_proxy_line(proxy)
+                    if not proxy:
+                        continue
                     proxy_hash = hashlib.md5(proxy.encode()).hexdigest()
                     if proxy_hash not in downloaded_hashes:
-                        new_proxies.append(proxy)
                         downloaded_hashes.add(proxy_hash)
+                        if index.add(proxy):
+                            new_proxies.append(proxy)
                 
                 all_proxies.extend(new_proxies)
                 session_data[f'{proxy_type}_{url_index}_downloaded'] = list(downloaded_hashes)
@@ -3277,7 +5462,7 @@ async def handle_config_file(proxy_manager):
             with open(export_path, 'w') as f:
                 json.dump({
                     'config': proxy_manager.config,
-                    'database': proxy_manager.proxies_db
+                    'database': dict(proxy_manager.proxies_db.items())
                 }, f, indent=4)
             console.print(f"\n[green]Đã xuất cấu hình tại: {export_path}[/green]")
         
@@ -3494,12 +5679,14 @@ async def handle_proxy_check(proxy_manager, source_type='file', proxy_file=None,
     checker = ProxyChecker(proxy_manager)
     
     if source_type == 'file':
-        with open(proxy_file, 'r') as f:
-            proxy_list = [line.strip() for line in f if line.strip()]
+        total = count_file_lines(proxy_file)
+        proxy_list = iter_proxy_file(proxy_file)
+    else:
+        total = len(proxy_list)
     
-    console.print(f"\n[yellow]Bắt đầu kiểm tra {len(proxy_list)} proxy...[/yellow]")
+    console.print(f"\n[yellow]Bắt đầu kiểm tra {total:,} proxy...[/yellow]")
     
-    results = await checker.check_proxies(proxy_list, settings['level'])
+    results = await checker.check_proxies(proxy_list, settings['level'], total=total)
     
     working_proxies = [r for r in results if r['status'] == 'working']
     slow_proxies = [r for r in results if r['status'] == 'slow']
@@ -3509,7 +5696,7 @@ async def handle_proxy_check(proxy_manager, source_type='file', proxy_file=None,
     show_header()
     
     console.print("\n[green]✓ KIỂM TRA HOÀN TẤT![/green]")
-    console.print(f"[cyan]Tổng số proxy:[/cyan] [white]{len(proxy_list):,}[/white]")
+    console.print(f"[cyan]Tổng số proxy:[/cyan] [white]{len(results):,}[/white]")
     console.print(f"[cyan]Proxy hoạt động tốt:[/cyan] [green]{len(working_proxies):,}[/green]")
     console.print(f"[cyan]Proxy chậm:[/cyan] [yellow]{len(slow_proxies):,}[/yellow]")
     console.print(f"[cyan]Proxy không hoạt động:[/cyan] [red]{len(failed_proxies):,}[/red]")
@@ -3565,48 +5752,200 @@ async def handle_proxy_collection(proxy_manager):
         console.print(f"\n[green]Đã lưu danh sách proxy vào:[/green] [white]{save_path}[/white]")
         console.input("\n[cyan]Nhấn Enter để quay lại menu chính...[/cyan]")
 
-    if live_count > 0:
-        console.print(f"\n[green]✓ KIỂM TRA HOÀN TẤT![/green]")
-        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{len(proxies):,}[/white]")
-        console.print(f"[cyan]Proxy sống:[/cyan] [white]{live_count:,}[/white]")
-        console.print(f"[cyan]Proxy chết:[/cyan] [white]{len(proxies) - live_count:,}[/white]")
-        console.print(f"[cyan]Kết quả lưu tại:[/cyan] [white]{output_path}[/white]")
-    else:
-        console.print(f"\n[red]✓ KIỂM TRA HOÀN TẤT![/red]")
-        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{len(proxies):,}[/white]")
-        console.print(f"[cyan]Proxy sống:[/cyan] [white]{live_count:,}[/white]")
-        console.print(f"[cyan]Proxy chết:[/cyan] [white]{len(proxies) - live_count:,}[/white]")
+def claim_check_journal(journal=None):
+    journal = journal or CheckJournal()
+    unfinished = journal.unfinished()
+    if unfinished is None:
+        return journal
+
+    header, done = unfinished
+    console.print(f"[yellow]⚠️ Có phiên kiểm tra dang dở cho {header.get('source', '?')} ({done:,} proxy đã xong): {journal.path}[/yellow]")
+    if not sys.stdin.isatty():
+        rotated = journal.rotate()
+        console.print(f"[yellow]Đã chuyển phiên cũ sang {rotated} và bắt đầu kiểm tra mới.[/yellow]")
+        return journal
+    if get_yes_no_input("[cyan]Bỏ phiên cũ và bắt đầu kiểm tra mới? (y/n): [/cyan]"):
+        return journal
+    console.print("[red]Không ghi đè phiên dang dở. Chạy với --resume để tiếp tục hoặc xóa file journal để bắt đầu lại.[/red]")
+    return None
+
+def run_proxy_check_from_memory(proxy_list, settings, result_sink=None):
+    journal = None
+    input_stats = {}
+    proxies = iter_proxy_lines(proxy_list, input_stats)
+    if load_config().get("enable_check_journal", True):
+        journal = claim_check_journal()
+        if journal is None:
+            return []
+        journal.start({"source": journal.snapshot_path, "settings": settings})
+        proxies = journal.snapshot(proxies)
+    return check_proxy_source(proxies, settings, known_length(proxy_list), input_stats, journal, result_sink)
+
+def resume_proxy_check(journal_path=None, result_sink=None):
+    journal = CheckJournal(journal_path)
+    header = journal.load()
+    if not header or not os.path.exists(header.get("source", "")):
+        console.print("[red]Không tìm thấy phiên kiểm tra dang dở để tiếp tục![/red]")
+        return None
 
-def run_proxy_check(proxy_file, settings):
-    console.print(f"\n[yellow]Đang kiểm tra proxy với {settings['max_threads']} luồng...\n[/yellow]")
+    console.print(f"[green]♻️ Tiếp tục kiểm tra {header['source']} ({len(journal.completed):,} proxy đã xong)[/green]")
+    return run_proxy_check(header["source"], header["settings"], journal=journal, result_sink=result_sink)
+
+def run_history_refilter(history_path, settings, result_sink=None):
+    config = load_config()
+    history_path = history_path or get_history_path(config)
+    if not history_path or not os.path.exists(history_path):
+        console.print(f"[red]Không tìm thấy lịch sử kết quả: {history_path}[/red]")
+        return []
+
+    columns = load_result_history(history_path)
+    results = refilter_history(columns, config)
+    for result in results:
+        if result_sink:
+            result_sink.write(result.proxy, result)
 
-    with open(proxy_file, 'r', encoding='utf-8') as f:
-        proxies = [line.strip() for line in f if line.strip()]
+    output_path = os.path.join(get_current_directory(), settings['output_file'])
+    write_lines_atomic(output_path, [format_rich_result_line(result) for result in results])
+    console.print(f"[green]🔍 Đã lọc lại: {len(results):,}/{len(columns):,} proxy đạt tiêu chuẩn, lưu tại {output_path}[/green]")
+    return results
+
+def run_proxy_check(proxy_file, settings, journal=None, result_sink=None):
+    if journal is None and load_config().get("enable_check_journal", True):
+        journal = claim_check_journal()
+        if journal is None:
+            return []
+        journal.start({"source": os.path.abspath(proxy_file), "settings": settings})
+    elif journal is not None and journal.writer is None:
+        journal.resume()
 
+    input_stats = {}
+    proxies = iter_proxy_file(proxy_file, input_stats)
+    return check_proxy_source(proxies, settings, count_file_lines(proxy_file), input_stats, journal, result_sink)
+
+def check_proxy_source(proxies, settings, total, input_stats, journal=None, result_sink=None):
+    console.print(f"\n[yellow]Đang kiểm tra proxy với {settings['max_threads']} luồng...\n[/yellow]")
     output_path = os.path.join(get_current_directory(), settings['output_file'])
 
-    results = check_proxies(
-        proxies,
-        settings['classify'],
-        settings.get('classify_option', 'n'),
-        output_path,
-        settings['max_threads']
-    )
-    live_count = len(results)
+    finished = False
+    check_stats = {}
+    try:
+        if settings.get('check_level', 'basic') == 'full':
+            results = check_proxies_rich(
+                proxies,
+                settings['classify'],
+                settings.get('classify_option', 'n'),
+                output_path,
+                settings['max_threads'],
+                total=total,
+                journal=journal,
+                result_sink=result_sink,
+                stats=check_stats
+            )
+        else:
+            results = check_proxies(
+                proxies,
+                settings['classify'],
+                settings.get('classify_option', 'n'),
+                output_path,
+                settings['max_threads'],
+                total=total,
+                journal=journal,
+                result_sink=result_sink
+            )
+        finished = True
+    finally:
+        if journal:
+            journal.close(finished=finished)
+            if not finished:
+                console.print(f"\n[yellow]Tiến trình đã được lưu, chạy lại với --resume để tiếp tục: {journal.path}[/yellow]")
+    live_count = check_stats.get('passed', len(results))
+    total_count = input_stats.get('unique', 0)
+
+    if input_stats.get('duplicates'):
+        console.print(f"[yellow]Đã bỏ qua {input_stats['duplicates']:,} proxy trùng lặp[/yellow]")
 
     if live_count > 0:
         console.print(f"\n[green]✓ KIỂM TRA HOÀN TẤT![/green]")
-        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{len(proxies):,}[/white]")
+        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{total_count:,}[/white]")
         console.print(f"[cyan]Proxy sống:[/cyan] [white]{live_count:,}[/white]")
-        console.print(f"[cyan]Proxy chết:[/cyan] [white]{len(proxies) - live_count:,}[/white]")
+        console.print(f"[cyan]Proxy chết:[/cyan] [white]{total_count - live_count:,}[/white]")
         console.print(f"[cyan]Kết quả lưu tại:[/cyan] [white]{output_path}[/white]")
     else:
         console.print(f"\n[red]✓ KIỂM TRA HOÀN TẤT![/red]")
-        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{len(proxies):,}[/white]")
+        console.print(f"[cyan]Tổng proxy:[/cyan] [white]{total_count:,}[/white]")
         console.print(f"[cyan]Proxy sống:[/cyan] [white]{live_count:,}[/white]")
-        console.print(f"[cyan]Proxy chết:[/cyan] [white]{len(proxies) - live_count:,}[/white]")
+        console.print(f"[cyan]Proxy chết:[/cyan] [white]{total_count - live_count:,}[/white]")
+
+    return results
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Kiểm tra proxy không cần tương tác, kết quả được ghi ra stdout dạng NDJSON."
+    )
+    parser.add_argument("-i", "--input", help="file proxy cần kiểm tra, '-' để đọc từ stdin")
+    parser.add_argument("-s", "--source", help="tải proxy public theo loại: all, http, https, socks4, socks5 (cách nhau bởi dấu phẩy)")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="số proxy tối đa lấy từ nguồn public (mặc định: 1000)")
+    parser.add_argument("-o", "--output", default="proxy_live.txt", help="file lưu proxy sống (mặc định: proxy_live.txt)")
+    parser.add_argument("-c", "--classify", choices=["1", "2", "3"], help="phân loại kết quả: 1 quốc gia, 2 giao thức, 3 cả hai")
+    parser.add_argument("-t", "--threads", type=int, help="số luồng kiểm tra (mặc định: max_threads trong config)")
+    parser.add_argument("-l", "--level", choices=["basic", "full"], default="basic", help="basic: chỉ kiểm tra sống/chết, full: thêm geo, điểm sức khỏe, bộ lọc")
+    parser.add_argument("--include-dead", action="store_true", help="ghi cả proxy chết ra stdout")
+    parser.add_argument("--no-ndjson", action="store_true", help="không ghi kết quả ra stdout")
+    parser.add_argument("-q", "--quiet", action="store_true", help="tắt giao diện tiến trình")
+    parser.add_argument("--resume", nargs="?", const="", metavar="JOURNAL", help="tiếp tục phiên kiểm tra dang dở")
+    parser.add_argument("--refilter", nargs="?", const="", metavar="HISTORY", help="lọc lại lịch sử kết quả theo ngưỡng hiện tại trong config, không kiểm tra lại")
+    parser.add_argument("--echo-server", nargs="?", type=int, const=8899, metavar="PORT", help="chạy máy chủ trả IP")
+    parser.add_argument("--debug", action="store_true", help="in traceback khi có lỗi")
+    return parser
+
+def run_headless(args):
+    console.file = sys.stderr
+    if args.quiet:
+        config_overrides["quiet_mode"] = True
+
+    if args.threads is not None and args.threads < 1:
+        console.print("[red]Số luồng phải lớn hơn 0![/red]")
+        return 2
+
+    output_file = args.output if args.output.endswith('.txt') else args.output + '.txt'
+    settings = {
+        'output_file': output_file,
+        'classify': bool(args.classify),
+        'classify_option': args.classify or 'n',
+        'max_threads': args.threads or load_config().get("max_threads", 100),
+        'check_level': args.level
+    }
+    result_sink = None if args.no_ndjson else NdjsonResultWriter(include_dead=args.include_dead)
 
+    try:
+        if args.resume is not None:
+            results = resume_proxy_check(args.resume or None, result_sink=result_sink)
+            if results is None:
+                return 2
+        elif args.refilter is not None:
+            results = run_history_refilter(args.refilter or None, settings, result_sink=result_sink)
+        elif args.source:
+            proxy_types = [item.strip().lower() for item in args.source.split(',') if item.strip()]
+            unknown = [item for item in proxy_types if item not in ('all', 'http', 'https', 'socks4', 'socks5')]
+            if unknown:
+                console.print(f"[red]Loại proxy không hợp lệ: {', '.join(unknown)}[/red]")
+                return 2
+            proxy_list, _ = run_coroutine_sync(download_proxies_with_progress_async(proxy_types, args.count, will_check=True))
+            if not proxy_list:
+                return 1
+            results = run_proxy_check_from_memory(proxy_list, settings, result_sink=result_sink)
+        elif args.input == '-':
+            results = run_proxy_check_from_memory(sys.stdin, settings, result_sink=result_sink)
+        else:
+            if not os.path.exists(args.input):
+                console.print(f"[red]Không tìm thấy file: {args.input}[/red]")
+                return 2
+            results = run_proxy_check(args.input, settings, result_sink=result_sink)
+    finally:
+        if result_sink:
+            result_sink.close()
 
+    return 0 if results else 1
 
 def proceed_with_check_rich(source_type, proxy_file=None, proxy_list=None, user_settings=None):
     config_title = create_rainbow_text("◆ CẤU HÌNH XÁC THỰC ◆")
@@ -3713,9 +6052,10 @@ async def main():
         clear_screen()
         show_header()
 
-        welcome_text = create_rainbow_text("◆◆◆ CHÀO MỪNG ĐẾN VỚI PROXY MASTER SUITE ◆◆◆")
-
-         rainbow_line = create_rainbow_text("─" * 140)
+        config = load_config()
+        if config.get('use_rich_interface', True):
+            welcome_text = create_rainbow_text("◆◆◆ CHÀO MỪNG ĐẾN VỚI PROXY MASTER SUITE ◆◆◆")
+            rainbow_line = create_rainbow_text("─" * 140)
 
             menu_items = [
                 [Text("【 1 】", style="bold red on black"), "🔍", Text("Kiểm tra và phân tích proxy", style="bold bright_green")],
@@ -3807,122 +6147,47 @@ async def main():
                 print(f"{Fore.WHITE}2. Nhập thủ công")
                 print(f"{Fore.YELLOW}Ghi chú: Định dạng proxy phải là ip:port và mỗi proxy một hàng{Style.RESET_ALL}")
                 input_choice = input(f"\n{Fore.CYAN}Nhập lựa chọn của bạn (1 hoặc 2):{Style.RESET_ALL} {Fore.WHITE}").strip()
-            
-            if choice == '1':
-                clear_screen()
-                show_header()
-                console.print("\n[cyan]Chọn nguồn proxy:[/cyan]")
-                console.print("1. Từ file")
-                console.print("2. Nhập trực tiếp")
-                
-                try:
-                    source_choice = int(console.input("\n[bold bright_cyan]Lựa chọn của bạn (1-2): [/bold bright_cyan]"))
-                    
-                    if source_choice == 1:
-                        console.print("\n[cyan]Vui lòng chọn file proxy...[/cyan]")
-                        proxy_file = filedialog.askopenfilename(
-                            title="Chọn file proxy",
-                            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
-                        )
-                        
-                        if proxy_file:
-                            await handle_proxy_check(proxy_manager, 'file', proxy_file=proxy_file)
-                        else:
-                            console.print("\n[red]Không có file nào được chọn![/red]")
-                    
-                    elif source_choice == 2:
-                        console.print("\n[cyan]Nhập proxy (một proxy mỗi dòng, nhấn Enter hai lần để kết thúc):[/cyan]")
-                        proxies = []
-                        while True:
-                            line = console.input().strip()
-                            if not line:
-                                break
-                            if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d+$', line):
-                                proxies.append(line)
-                        
-                        if proxies:
-                            await handle_proxy_check(proxy_manager, 'memory', proxy_list=proxies)
-                        else:
-                            console.print("\n[red]Không có proxy nào được nhập![/red]")
-                
-                except ValueError:
-                    console.print("[red]Lựa chọn không hợp lệ![/red]")
-            
-            elif choice == '2':
-                await handle_proxy_collection(proxy_manager)
-            
-            elif choice == '3':
-                await handle_system_config(proxy_manager)
-            
-            elif choice == '4':
-                if get_yes_no_input("\n[yellow]Bạn có chắc muốn thoát? (y/n): [/yellow]"):
-                    clear_screen()
-                    show_header()
-                    console.print("\n[green]Cảm ơn bạn đã sử dụng Proxy Master Suite![/green]")
-                    await asyncio.sleep(1)
-                    break
-            
-            else:
-                console.print("[red]Lựa chọn không hợp lệ![/red]")
-                await asyncio.sleep(1)
+
+            if input_choice == '1':
+                proxy_file = select_proxy_file()
+                if not proxy_file:
+                    console.print("\n[red]Không có file nào được chọn![/red]")
                     input(f"\n{Fore.CYAN}Nhấn Enter để quay lại menu chính...{Style.RESET_ALL}")
                     continue
-                
+
                 if not validate_proxy_file(proxy_file):
                     input(f"\n{Fore.CYAN}Nhấn Enter để quay lại menu chính...{Style.RESET_ALL}")
                     continue
-                
+
                 if config.get('use_rich_interface', True):
                     proceed_with_check_rich('file', proxy_file=proxy_file, user_settings=user_settings)
                 else:
                     proceed_with_check('file', proxy_file=proxy_file)
 
             elif input_choice == '2':
-                proxy_list = await input_proxies_manually()
+                proxy_list = input_proxies_manually()
                 if not proxy_list:
-                    console.print("[yellow]Không có proxy nào được nhập![/yellow]")
                     await asyncio.sleep(1)
                     continue
 
-                try:
-                    results = await check_proxies(proxy_list, user_settings)
-                    display_results(results)
-                except Exception as e:
-                    console.print(f"[red]Lỗi khi kiểm tra proxy: {str(e)}[/red]")
-                finally:
-                    console.input("[cyan]Nhấn Enter để tiếp tục...[/cyan]")
-            
+                if config.get('use_rich_interface', True):
+                    proceed_with_check_rich('memory', proxy_list=proxy_list, user_settings=user_settings)
+                else:
+                    proceed_with_check('memory', proxy_list=proxy_list)
+
             else:
                 console.print("[red]Lựa chọn không hợp lệ![/red]")
                 await asyncio.sleep(1)
                 continue
-            
+
             input(f"\n{Fore.CYAN}Nhấn Enter để quay lại menu chính...{Style.RESET_ALL}")
 
         elif choice == '2':
-            try:
-                proxies = await get_free_proxies()
-                if proxies:
-                    console.print(f"[green]Đã tìm thấy {len(proxies)} proxy![/green]")
-                    save_path = os.path.join(os.path.dirname(__file__), 'free_proxies.txt')
-                    with open(save_path, 'w') as f:
-                        f.write('\n'.join(proxies))
-                    console.print(f"[green]Đã lưu proxy vào {save_path}[/green]")
-                else:
-                    console.print("[yellow]Không tìm thấy proxy nào![/yellow]")
-            except Exception as e:
-                console.print(f"[red]Lỗi khi tìm proxy: {str(e)}[/red]")
-            finally:
-                console.input("[cyan]Nhấn Enter để tiếp tục...[/cyan]")
-                
+            await get_free_proxies_async()
+
         elif choice == '3':
-            try:
-                await show_config_menu()
-                config = await load_config()
-            except Exception as e:
-                console.print(f"[red]Lỗi khi cấu hình: {str(e)}[/red]")
-                await asyncio.sleep(1)
-                
+            show_config_menu()
+
         elif choice == '4':
             farewell_text = create_rainbow_text("◆ TẠM BIỆT VÀ HẸN GẶP LẠI ◆")
             console.print("\n" + farewell_text)
@@ -3944,6 +6209,15 @@ if __name__ == "__main__":
             console.print("[red]Error: Python 3.7 or higher is required[/red]")
             sys.exit(1)
 
+        args = build_arg_parser().parse_args()
+
+        if args.echo_server is not None:
+            run_ip_echo_server(port=args.echo_server)
+            sys.exit(0)
+
+        if args.input or args.source or args.refilter is not None or args.resume is not None:
+            sys.exit(run_headless(args))
+
         # Kiểm tra và cài đặt dependencies
         if not os.path.exists(os.path.join(os.path.dirname(__file__), '.deps_checked')):
             check_and_install_dependencies()